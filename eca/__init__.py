@@ -5,34 +5,44 @@ __version__ = "0.1.3"
 
 # --- Componentes Principais (Sempre disponíveis) ---
 from .orchestrator import ECAOrchestrator
+from .async_orchestrator import AsyncECAOrchestrator
 from .models import Persona, PersonaConfig, DomainState, CognitiveWorkspace
 from .memory.types import SemanticMemory, EpisodicMemory
+from .embeddings import CachedEmbeddingFunction
+from .routing import KeywordDomainRouter
+from .codec import WorkspaceCodec, JSONWorkspaceCodec, BinaryWorkspaceCodec
 
 # --- Interfaces Base (Sempre disponíveis) ---
-from .adapters.base import PersonaProvider, MemoryProvider, SessionProvider
+from .adapters.base import PersonaProvider, MemoryProvider, SessionProvider, VersionedSessionProvider
+from .adapters.async_base import AsyncPersonaProvider, AsyncMemoryProvider, AsyncSessionProvider, AsyncTool
 
 # --- Adaptadores Padrão (Sempre disponíveis) ---
-from .adapters.json_adapter import JSONPersonaProvider, JSONMemoryProvider, JSONSessionProvider
+from .adapters.json_adapter import JSONPersonaProvider, JSONMemoryProvider, JSONSessionProvider, ShardedJSONSessionProvider
+from .adapters.write_behind import WriteBehindSessionProvider
+from .adapters.near_cache import NearCacheSessionProvider
 
 # --- Mecanismos de Atenção ---
-from .attention import AttentionMechanism, PassthroughAttention, SimpleSemanticAttention
+from .attention import AttentionMechanism, PassthroughAttention, SimpleSemanticAttention, BM25Attention
 
 # Lista para exportação pública, com os componentes principais
 __all__ = [
-    "ECAOrchestrator",
+    "ECAOrchestrator", "AsyncECAOrchestrator",
     "Persona", "PersonaConfig", "DomainState", "CognitiveWorkspace",
     "SemanticMemory", "EpisodicMemory",
-    "PersonaProvider", "MemoryProvider", "SessionProvider",
-    "JSONPersonaProvider", "JSONMemoryProvider", "JSONSessionProvider",
-    "AttentionMechanism", "PassthroughAttention", "SimpleSemanticAttention"
+    "CachedEmbeddingFunction", "KeywordDomainRouter",
+    "WorkspaceCodec", "JSONWorkspaceCodec", "BinaryWorkspaceCodec",
+    "PersonaProvider", "MemoryProvider", "SessionProvider", "VersionedSessionProvider",
+    "AsyncPersonaProvider", "AsyncMemoryProvider", "AsyncSessionProvider", "AsyncTool",
+    "JSONPersonaProvider", "JSONMemoryProvider", "JSONSessionProvider", "ShardedJSONSessionProvider", "WriteBehindSessionProvider", "NearCacheSessionProvider",
+    "AttentionMechanism", "PassthroughAttention", "SimpleSemanticAttention", "BM25Attention"
 ]
 
 # --- Componentes Opcionais (Disponíveis apenas se os extras forem instalados) ---
 
 # Tenta importar o adaptador Redis
 try:
-    from .adapters.redis_adapter import RedisSessionProvider
-    __all__.append("RedisSessionProvider")
+    from .adapters.redis_adapter import RedisSessionProvider, RedisMemoryProvider
+    __all__.extend(["RedisSessionProvider", "RedisMemoryProvider"])
 except ImportError:
     pass
 
@@ -43,6 +53,13 @@ try:
 except ImportError:
     pass
 
+# Tenta importar o armazenamento mapeado em memória (requer o extra 'numpy')
+try:
+    from .adapters.mmap_adapter import MMapMemoryProvider, convert_json_to_mmap_store
+    __all__.extend(["MMapMemoryProvider", "convert_json_to_mmap_store"])
+except ImportError:
+    pass
+
 # Tenta importar o mecanismo de atenção vetorial
 try:
     from .attention import VectorizedSemanticAttention
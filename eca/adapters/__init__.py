@@ -12,19 +12,25 @@ from .json_adapter import (
     JSONMemoryProvider,
     JSONPersonaProvider,
     JSONSessionProvider,
+    ShardedJSONSessionProvider,
 )
+from .write_behind import WriteBehindSessionProvider
+from .near_cache import NearCacheSessionProvider
 
 # Lista para exportação pública, começamos com os adaptadores padrão
 __all__ = [
     "JSONMemoryProvider",
     "JSONPersonaProvider",
     "JSONSessionProvider",
+    "ShardedJSONSessionProvider",
+    "WriteBehindSessionProvider",
+    "NearCacheSessionProvider",
 ]
 
 # Tenta importar o adaptador Redis. Se falhar, é porque o 'redis' extra não foi instalado.
 try:
-    from .redis_adapter import RedisSessionProvider
-    __all__.append("RedisSessionProvider")
+    from .redis_adapter import RedisSessionProvider, RedisMemoryProvider
+    __all__.extend(["RedisSessionProvider", "RedisMemoryProvider"])
 except ImportError:
     pass 
 
@@ -33,4 +39,11 @@ try:
     from .postgres_adapter import PostgresPersonaProvider, PostgresMemoryProvider
     __all__.extend(["PostgresPersonaProvider", "PostgresMemoryProvider"])
 except ImportError:
-    pass  
\ No newline at end of file
+    pass
+
+# Tenta importar o armazenamento mapeado em memória. Se falhar, o 'numpy' extra não foi instalado.
+try:
+    from .mmap_adapter import MMapMemoryProvider, convert_json_to_mmap_store
+    __all__.extend(["MMapMemoryProvider", "convert_json_to_mmap_store"])
+except ImportError:
+    pass
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Variantes assíncronas das interfaces de provedores e ferramentas.
+
+Estas classes espelham os contratos definidos em `eca.adapters.base`, com os
+mesmos nomes de métodos, mas declarados como corrotinas (`async def`). Elas
+são consumidas pelo `AsyncECAOrchestrator`, que também aceita as versões
+síncronas e, nesse caso, executa as chamadas em um executor de threads.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from eca.models import Persona, CognitiveWorkspace
+from eca.memory import SemanticMemory, EpisodicMemory
+
+
+class AsyncTool(ABC):
+    """Versão assíncrona da interface `Tool`.
+
+    Apenas o método `load` é assíncrono: `can_handle` continua síncrono, pois
+    deve ser uma verificação leve e sem I/O.
+    """
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Um nome único e descritivo para a ferramenta."""
+        pass
+
+    @abstractmethod
+    def can_handle(self, user_input: str, attachment: Optional[Any] = None) -> bool:
+        """Verifica se esta ferramenta é a apropriada para a entrada fornecida.
+
+        Args:
+            user_input (str): O texto da mensagem do usuário.
+            attachment (Optional[Any]): Qualquer dado não textual anexado.
+
+        Returns:
+            bool: `True` se esta ferramenta deve ser executada.
+        """
+        pass
+
+    @abstractmethod
+    async def load(self, user_input: str, attachment: Optional[Any] = None) -> Optional[Dict[str, Any]]:
+        """Executa a lógica principal da ferramenta de forma assíncrona.
+
+        Args:
+            user_input (str): O texto da mensagem do usuário.
+            attachment (Optional[Any]): O dado não textual anexado.
+
+        Returns:
+            Optional[Dict[str, Any]]: Os dados carregados, ou `None`.
+        """
+        pass
+
+
+class AsyncPersonaProvider(ABC):
+    """Versão assíncrona da interface `PersonaProvider`."""
+
+    @abstractmethod
+    async def get_persona_by_id(self, persona_id: str) -> Optional[Persona]:
+        """Busca e retorna uma persona específica pelo seu identificador.
+
+        Args:
+            persona_id (str): O ID único da persona a ser carregada.
+
+        Returns:
+            Optional[Persona]: A persona encontrada, ou `None`.
+        """
+        pass
+
+    @abstractmethod
+    async def detect_domain(self, user_input: str, query_embedding: Optional[List[float]] = None) -> str:
+        """Detecta o domínio de conhecimento mais provável para uma dada entrada.
+
+        Args:
+            user_input (str): O texto fornecido pelo usuário.
+            query_embedding (Optional[List[float]], optional): O embedding da
+                entrada, quando já calculado pelo orquestrador.
+
+        Returns:
+            str: O identificador (ID) do domínio detectado.
+        """
+        pass
+
+
+class AsyncMemoryProvider(ABC):
+    """Versão assíncrona da interface `MemoryProvider`."""
+
+    @abstractmethod
+    async def fetch_semantic_memories(self, user_input: str, domain_id: str, top_k: int = 3, query_embedding: Optional[List[float]] = None) -> List[SemanticMemory]:
+        """Busca fatos e regras (memória semântica) relevantes para a entrada.
+
+        Args:
+            user_input (str): O texto do usuário, usado para a busca.
+            domain_id (str): O ID do domínio para filtrar a busca.
+            top_k (int, optional): O número máximo de memórias. Padrão é 3.
+            query_embedding (Optional[List[float]], optional): O embedding da
+                entrada, quando já calculado pelo orquestrador.
+
+        Returns:
+            List[SemanticMemory]: As memórias semânticas relevantes.
+        """
+        pass
+
+    @abstractmethod
+    async def fetch_episodic_memories(self, user_id: str, domain_id: str, last_n: int = 5) -> List[EpisodicMemory]:
+        """Busca os últimos N episódios de conversa de um usuário em um domínio.
+
+        Args:
+            user_id (str): O ID único do usuário.
+            domain_id (str): O ID do domínio da conversa.
+            last_n (int, optional): O número de interações. Padrão é 5.
+
+        Returns:
+            List[EpisodicMemory]: O histórico da conversa.
+        """
+        pass
+
+    @abstractmethod
+    async def log_interaction(self, interaction: EpisodicMemory):
+        """Salva um novo episódio (interação) no histórico de conversas.
+
+        Args:
+            interaction (EpisodicMemory): A interação a ser salva.
+        """
+        pass
+
+
+class AsyncSessionProvider(ABC):
+    """Versão assíncrona da interface `SessionProvider`."""
+
+    @abstractmethod
+    async def get_workspace(self, user_id: str) -> Optional[CognitiveWorkspace]:
+        """Carrega a área de trabalho cognitiva de um usuário.
+
+        Args:
+            user_id (str): O ID único do usuário.
+
+        Returns:
+            Optional[CognitiveWorkspace]: A sessão do usuário, ou `None`.
+        """
+        pass
+
+    @abstractmethod
+    async def save_workspace(self, workspace: CognitiveWorkspace):
+        """Salva o estado atual da área de trabalho cognitiva de um usuário.
+
+        Args:
+            workspace (CognitiveWorkspace): A área de trabalho a ser persistida.
+        """
+        pass
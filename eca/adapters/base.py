@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from eca.models import Persona, CognitiveWorkspace
 from eca.memory import SemanticMemory, EpisodicMemory
 
@@ -108,7 +108,7 @@ class PersonaProvider(ABC):
         pass
 
     @abstractmethod
-    def detect_domain(self, user_input: str) -> str:
+    def detect_domain(self, user_input: str, query_embedding: Optional[List[float]] = None) -> str:
         """Detecta o domínio de conhecimento mais provável para uma dada entrada.
 
         Esta função atua como um roteador, analisando o texto do usuário para
@@ -117,12 +117,39 @@ class PersonaProvider(ABC):
 
         Args:
             user_input (str): O texto fornecido pelo usuário.
+            query_embedding (Optional[List[float]], optional): O embedding de
+                `user_input`, quando já calculado pelo orquestrador. Provedores
+                vetoriais devem usá-lo em vez de vetorizar a entrada de novo.
+                Implementações que não declaram este parâmetro continuam
+                compatíveis: o orquestrador só o repassa a quem o aceita.
 
         Returns:
             str: O identificador (ID) do domínio detectado.
         """
         pass
 
+    def detect_domains(self, user_inputs: List[str], query_embeddings: Optional[List[List[float]]] = None) -> List[str]:
+        """Detecta os domínios de várias entradas de uma só vez.
+
+        A implementação padrão chama `detect_domain` para cada entrada.
+        Provedores baseados em embeddings devem sobrescrevê-la para vetorizar
+        todas as entradas em uma única chamada.
+
+        Args:
+            user_inputs (List[str]): Os textos fornecidos pelos usuários.
+            query_embeddings (Optional[List[List[float]]], optional): Os
+                embeddings já calculados das entradas, na mesma ordem.
+
+        Returns:
+            List[str]: Os IDs dos domínios detectados, na ordem de entrada.
+        """
+        if query_embeddings is None:
+            return [self.detect_domain(user_input) for user_input in user_inputs]
+        return [
+            self.detect_domain(user_input, query_embedding=query_embedding)
+            for user_input, query_embedding in zip(user_inputs, query_embeddings)
+        ]
+
 
 class MemoryProvider(ABC):
     """Define a interface para um provedor de memória do agente.
@@ -134,7 +161,7 @@ class MemoryProvider(ABC):
     """
 
     @abstractmethod
-    def fetch_semantic_memories(self, user_input: str, domain_id: str, top_k: int = 3) -> List[SemanticMemory]:
+    def fetch_semantic_memories(self, user_input: str, domain_id: str, top_k: int = 3, query_embedding: Optional[List[float]] = None) -> List[SemanticMemory]:
         """Busca fatos e regras (memória semântica) relevantes para a entrada.
 
         Args:
@@ -143,6 +170,8 @@ class MemoryProvider(ABC):
             domain_id (str): O ID do domínio para filtrar a busca.
             top_k (int, optional): O número máximo de memórias a serem
                 retornadas. Padrão é 3.
+            query_embedding (Optional[List[float]], optional): O embedding de
+                `user_input`, quando já calculado pelo orquestrador.
 
         Returns:
             List[SemanticMemory]: Uma lista de objetos `SemanticMemory`
@@ -150,6 +179,32 @@ class MemoryProvider(ABC):
         """
         pass
 
+    def fetch_semantic_memories_batch(self, user_inputs: List[str], domain_id: str, top_k: int = 3, query_embeddings: Optional[List[List[float]]] = None) -> List[List[SemanticMemory]]:
+        """Busca memórias semânticas para várias entradas de um mesmo domínio.
+
+        A implementação padrão chama `fetch_semantic_memories` para cada
+        entrada. Provedores com busca vetorial devem sobrescrevê-la para gerar
+        todos os embeddings de uma vez e reutilizar a mesma conexão.
+
+        Args:
+            user_inputs (List[str]): Os textos dos usuários.
+            domain_id (str): O ID do domínio comum a todas as entradas.
+            top_k (int, optional): O número máximo de memórias por entrada.
+                Padrão é 3.
+            query_embeddings (Optional[List[List[float]]], optional): Os
+                embeddings já calculados das entradas, na mesma ordem.
+
+        Returns:
+            List[List[SemanticMemory]]: Uma lista de resultados por entrada,
+            na mesma ordem de `user_inputs`.
+        """
+        if query_embeddings is None:
+            return [self.fetch_semantic_memories(user_input, domain_id, top_k) for user_input in user_inputs]
+        return [
+            self.fetch_semantic_memories(user_input, domain_id, top_k, query_embedding=query_embedding)
+            for user_input, query_embedding in zip(user_inputs, query_embeddings)
+        ]
+
     @abstractmethod
     def fetch_episodic_memories(self, user_id: str, domain_id: str, last_n: int = 5) -> List[EpisodicMemory]:
         """Busca os últimos N episódios de conversa de um usuário em um domínio.
@@ -221,4 +276,77 @@ class SessionProvider(ABC):
             None: Esta função não retorna valor.
         """
         pass
-    
\ No newline at end of file
+
+    def get_workspaces(self, user_ids: List[str]) -> List[Optional[CognitiveWorkspace]]:
+        """Carrega as áreas de trabalho de vários usuários.
+
+        A implementação padrão chama `get_workspace` para cada usuário.
+        Provedores remotos devem sobrescrevê-la para buscar tudo em uma única
+        ida e volta.
+
+        Args:
+            user_ids (List[str]): Os IDs dos usuários.
+
+        Returns:
+            List[Optional[CognitiveWorkspace]]: Os workspaces encontrados (ou
+            `None`), na mesma ordem de `user_ids`.
+        """
+        return [self.get_workspace(user_id) for user_id in user_ids]
+
+    def save_workspaces(self, workspaces: List[CognitiveWorkspace]):
+        """Salva as áreas de trabalho de vários usuários.
+
+        A implementação padrão chama `save_workspace` para cada workspace.
+
+        Args:
+            workspaces (List[CognitiveWorkspace]): Os workspaces a persistir.
+        """
+        for workspace in workspaces:
+            self.save_workspace(workspace)
+
+
+class VersionedSessionProvider(SessionProvider):
+    """Provedor de sessão que mantém um carimbo de versão por workspace.
+
+    A versão muda a cada gravação que altera o workspace e pode ser
+    consultada sem transferir nem decodificar o workspace. Caches locais
+    (como o `NearCacheSessionProvider`) a usam para saber se a cópia que
+    guardam ainda é a mais recente.
+    """
+    @abstractmethod
+    def get_versions(self, user_ids: List[str]) -> List[Optional[str]]:
+        """Retorna a versão atual de cada workspace.
+
+        Args:
+            user_ids (List[str]): Os IDs dos usuários.
+
+        Returns:
+            List[Optional[str]]: As versões (ou `None`, se o workspace não
+            existir ou não tiver versão), na ordem de `user_ids`.
+        """
+        pass
+
+    @abstractmethod
+    def get_workspaces_versioned(self, user_ids: List[str]) -> List[Tuple[Optional[CognitiveWorkspace], Optional[str]]]:
+        """Carrega vários workspaces junto com suas versões, de forma consistente.
+
+        Args:
+            user_ids (List[str]): Os IDs dos usuários.
+
+        Returns:
+            List[Tuple[Optional[CognitiveWorkspace], Optional[str]]]: Pares
+            (workspace, versão), na ordem de `user_ids`.
+        """
+        pass
+
+    @abstractmethod
+    def save_workspaces_versioned(self, workspaces: List[CognitiveWorkspace]) -> List[Optional[str]]:
+        """Salva vários workspaces e retorna a versão de cada um após a gravação.
+
+        Args:
+            workspaces (List[CognitiveWorkspace]): Os workspaces a persistir.
+
+        Returns:
+            List[Optional[str]]: As versões, na ordem de `workspaces`.
+        """
+        pass
@@ -1,12 +1,283 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
 from dataclasses import asdict
-from typing import List, Optional, Dict, Any, Type
+from typing import Callable, Deque, IO, Iterator, List, Optional, Dict, Any, Tuple
 
 # Importa os modelos e as interfaces base
-from eca.models import Persona, PersonaConfig, CognitiveWorkspace
+from eca.models import Persona, PersonaConfig, CognitiveWorkspace, DomainState
 from eca.memory import SemanticMemory, EpisodicMemory
 from eca.adapters.base import PersonaProvider, MemoryProvider, SessionProvider
+from eca.codec import (
+    JSONWorkspaceCodec, WorkspaceCodec, check_compression, compress_payload, decompress_payload,
+    domain_to_dict, workspace_from_dict, workspace_to_dict,
+)
+from eca.embeddings import embed_texts
+from eca.memory.ann import IVFIndex
+from eca.routing import KeywordDomainRouter
+
+# Nome do registro com o ID do usuário e o foco no layout por domínio do
+# `ShardedJSONSessionProvider` (os arquivos de domínio usam nomes em hexadecimal).
+_WORKSPACE_RECORD = "workspace"
+
+
+def _atomic_write_bytes(file_path: str, data: bytes, fsync: bool = False):
+    """Grava os dados em um arquivo temporário e o renomeia sobre o destino.
+
+    A troca via `os.replace` é atômica, então leitores concorrentes (ou uma
+    queda do processo no meio da escrita) nunca veem um arquivo parcial.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _atomic_write_json(file_path: str, data: Any, **dump_kwargs: Any):
+    """Grava um JSON de forma atômica (veja `_atomic_write_bytes`)."""
+    _atomic_write_bytes(file_path, json.dumps(data, ensure_ascii=False, **dump_kwargs).encode('utf-8'))
+
+
+def _read_sessions_file(file_path: str) -> Dict[str, Any]:
+    """Lê o arquivo do `JSONSessionProvider`, comprimido ou não.
+
+    Um arquivo ausente, vazio ou malformado resulta em um dicionário vazio.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            content = decompress_payload(f.read())
+        return json.loads(content) if content else {}
+    except (FileNotFoundError, ValueError, zlib.error):
+        return {}
+
+
+def _detached(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia um dicionário passando pela serialização JSON usada nos arquivos de sessão."""
+    return json.loads(json.dumps(data, ensure_ascii=False, default=str))
+
+
+def _jsonl_bytes(interactions: List[EpisodicMemory]) -> bytes:
+    """Serializa interações no formato JSON Lines."""
+    return "".join(json.dumps(asdict(inter), ensure_ascii=False) + '\n' for inter in interactions).encode('utf-8')
+
+
+def _retain_last(interactions: List[EpisodicMemory], keep_last: int) -> List[EpisodicMemory]:
+    """Mantém apenas as últimas `keep_last` interações de cada par usuário/domínio."""
+    remaining: Dict[Tuple[str, str], int] = {}
+    kept = []
+    for inter in reversed(interactions):
+        key = (inter.user_id, inter.domain_id)
+        count = remaining.get(key, 0)
+        if count < keep_last:
+            remaining[key] = count + 1
+            kept.append(inter)
+    kept.reverse()
+    return kept
+
+
+def _iter_json_array(file_path: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[Any, str]]:
+    """Percorre os itens de um array JSON sem carregar o arquivo inteiro.
+
+    O arquivo é lido em blocos de `chunk_size` caracteres e cada item é
+    decodificado com `JSONDecoder.raw_decode` assim que estiver completo no
+    buffer, que então descarta o trecho já consumido.
+
+    Args:
+        file_path (str): O caminho de um arquivo contendo um array JSON.
+        chunk_size (int, optional): Tamanho dos blocos de leitura.
+
+    Yields:
+        Tuple[Any, str]: Cada item decodificado e seu texto JSON original.
+
+    Raises:
+        json.JSONDecodeError: Se o arquivo não for um array JSON válido.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        expect_open = True
+
+        while True:
+            # Avança sobre espaços e separadores, lendo mais se necessário.
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+
+            if pos >= len(buffer):
+                if expect_open:
+                    return
+                raise json.JSONDecodeError("Array JSON não terminado", buffer, pos)
+            if expect_open:
+                if buffer[pos] != '[':
+                    raise json.JSONDecodeError("Esperado um array JSON", buffer, pos)
+                pos += 1
+                expect_open = False
+                continue
+            if buffer[pos] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # Um valor que termina no fim do buffer (ex: um número) pode
+                # continuar no próximo bloco.
+                if end == len(buffer) and not eof:
+                    raise json.JSONDecodeError("Item possivelmente incompleto", buffer, end)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Item incompleto: mantém o trecho pendente e lê mais um bloco,
+                # dobrando o tamanho para itens maiores que o bloco.
+                chunk = f.read(max(chunk_size, len(buffer) - pos))
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield item, buffer[pos:end]
+            pos = end
+
+
+# Pula números, literais e separadores e captura a próxima string JSON (com
+# escapes) ou delimitador de objeto/array.
+_JSON_STRUCTURE = re.compile(rb'[^"\[\]{}]*("[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}])')
+_JSON_SKIP = re.compile(rb'[^"\[\]{}]*')
+_JSON_WHITESPACE = re.compile(rb'[ \t\r\n]*')
+
+
+def _scan_json_array(f: IO[bytes], key: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[Any, int, int]]:
+    """Localiza os objetos de um array JSON sem decodificá-los.
+
+    O arquivo é lido em blocos, como em `_iter_json_array`, e apenas strings
+    e delimitadores são percorridos (por expressão regular), então listas de
+    números, como os embeddings, não são convertidas. De cada objeto, só o
+    valor string do campo `key` é decodificado; o texto do objeto não é
+    guardado, apenas sua posição em bytes no arquivo.
+
+    Args:
+        f (IO[bytes]): O arquivo (aberto em modo binário) com um array JSON
+            de objetos, posicionado no início.
+        key (str): O campo de primeiro nível a ser extraído de cada objeto.
+        chunk_size (int, optional): Tamanho dos blocos de leitura.
+
+    Yields:
+        Tuple[Any, int, int]: O valor de `key`, o deslocamento e o tamanho
+        (em bytes) do objeto no arquivo.
+
+    Raises:
+        json.JSONDecodeError: Se o arquivo não for um array JSON bem delimitado.
+        KeyError: Se um objeto não tiver `key` como string.
+    """
+    quoted_key = json.dumps(key).encode('utf-8')
+    buffer = b''
+    base = 0  # Deslocamento, no arquivo, do início de `buffer`.
+    pos = 0
+    eof = False
+    depth = 0
+    start = 0
+    value: Any = None
+    value_at = -1
+
+    while True:
+        match = _JSON_STRUCTURE.match(buffer, pos)
+        if match is not None and depth == 2 and match.group(1) == quoted_key and not eof:
+            # O ':' e o início do valor precisam estar no buffer para que o
+            # campo seja reconhecido.
+            colon = _JSON_WHITESPACE.match(buffer, match.end()).end()
+            if colon == len(buffer) or (
+                buffer.startswith(b':', colon) and _JSON_WHITESPACE.match(buffer, colon + 1).end() == len(buffer)
+            ):
+                match = None
+        if match is None:
+            if eof:
+                break
+            # Token incompleto (ou buffer esgotado): descarta o trecho já
+            # percorrido e lê mais um bloco, dobrando o tamanho para strings
+            # maiores que o bloco.
+            skip = _JSON_SKIP.match(buffer, pos).end()
+            chunk = f.read(max(chunk_size, len(buffer) - skip))
+            eof = not chunk
+            base += skip
+            buffer, pos = buffer[skip:] + chunk, 0
+            continue
+
+        token, token_start = match.group(1), base + match.start(1)
+        pos = match.end()
+        if depth == 0:
+            if token != b'[':
+                raise json.JSONDecodeError("Esperado um array JSON", "", token_start)
+            depth = 1
+        elif token in (b'[', b'{'):
+            depth += 1
+            if depth == 2:
+                start, value, value_at = token_start, None, -1
+        elif token in (b']', b'}'):
+            if depth == 2:
+                if value is None:
+                    raise KeyError(key)
+                yield value, start, base + pos - start
+            depth -= 1
+            if depth == 0:
+                return
+        elif depth == 2:
+            if token_start == value_at:
+                value = json.loads(token)
+            elif token == quoted_key:
+                colon = _JSON_WHITESPACE.match(buffer, pos).end()
+                if buffer.startswith(b':', colon):
+                    value_at = base + _JSON_WHITESPACE.match(buffer, colon + 1).end()
+    if depth:
+        raise json.JSONDecodeError("Array JSON não terminado", "", base + len(buffer))
+
+
+def _stat_fingerprint(stat: os.stat_result) -> Dict[str, int]:
+    """Identifica a versão de um arquivo pelo tamanho e mtime."""
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _file_fingerprint(file_path: str) -> Optional[Dict[str, int]]:
+    """Identifica a versão de um arquivo pelo tamanho e mtime (ou `None` se ausente)."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return _stat_fingerprint(stat)
+
+
+def _start_periodic(interval: float, action: Callable[[], Any], stop_event: threading.Event, description: str) -> threading.Thread:
+    """Executa `action` a cada `interval` segundos em uma thread daemon, até `stop_event`.
+
+    Erros são reportados como aviso e não interrompem o laço.
+    """
+    def loop():
+        while not stop_event.wait(interval):
+            try:
+                action()
+            except Exception as e:
+                print(f"Aviso: Falha ao {description}: {e}")
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return thread
 
 
 class JSONPersonaProvider(PersonaProvider):
@@ -16,28 +287,93 @@ class JSONPersonaProvider(PersonaProvider):
     a partir de um único arquivo JSON no início. É ideal para prototipagem,
     testes ou aplicações onde as personas são estáticas.
 
+    Cada persona pode declarar, no próprio arquivo, um objeto `routing` com
+    `keywords`, `patterns` e `priority`, usado por `detect_domain` (veja
+    `eca.routing.KeywordDomainRouter`).
+
+    Com `reload_interval`, uma thread verifica periodicamente o tamanho e o
+    mtime do arquivo e, se mudaram, recarrega as personas e o roteador fora
+    do caminho das requisições, trocando-os de uma só vez.
+
     Attributes:
+        file_path (str): O caminho do arquivo de personas.
         personas (Dict[str, Persona]): Um dicionário que armazena as instâncias
             de `Persona` em memória, usando o ID da persona como chave.
+        router (KeywordDomainRouter): O roteador compilado a partir das regras
+            de roteamento das personas.
     """
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, reload_interval: Optional[float] = None):
         """Inicializa o provedor carregando as personas do arquivo especificado.
 
         Args:
             file_path (str): O caminho para o arquivo JSON contendo a lista
                 de definições de persona.
+            reload_interval (Optional[float], optional): Se informado, o
+                arquivo é verificado a cada `reload_interval` segundos e
+                recarregado quando muda. Padrão `None` (sem recarga).
         """
-        self.personas: Dict[str, Persona] = {}
-        with open(file_path, 'r', encoding='utf-8') as f:
+        self.file_path = file_path
+        self._fingerprint = _file_fingerprint(file_path)
+        self._state: Tuple[Dict[str, Persona], KeywordDomainRouter] = self._load_state()
+        self._stop_event = threading.Event()
+        self._reload_thread: Optional[threading.Thread] = None
+        if reload_interval:
+            self._reload_thread = _start_periodic(reload_interval, self.reload, self._stop_event, "recarregar personas")
+
+    @property
+    def personas(self) -> Dict[str, Persona]:
+        """As personas atualmente carregadas."""
+        return self._state[0]
+
+    @property
+    def router(self) -> KeywordDomainRouter:
+        """O roteador compilado das personas atualmente carregadas."""
+        return self._state[1]
+
+    def reload(self) -> bool:
+        """Recarrega o arquivo de personas se ele mudou desde a última carga.
+
+        O novo estado é montado por completo antes de substituir o anterior,
+        então chamadas concorrentes veem as personas antigas ou as novas,
+        nunca uma mistura. Se o arquivo estiver malformado (ex: no meio de
+        uma escrita), o estado atual é mantido.
+
+        Returns:
+            bool: `True` se as personas foram recarregadas.
+        """
+        fingerprint = _file_fingerprint(self.file_path)
+        if fingerprint is None or fingerprint == self._fingerprint:
+            return False
+        self._fingerprint = fingerprint
+        try:
+            state = self._load_state()
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            print(f"Aviso: Arquivo de personas {self.file_path} inválido; mantendo a versão anterior: {e}")
+            return False
+        self._state = state
+        return True
+
+    def close(self):
+        """Interrompe a verificação periódica do arquivo, se ativa."""
+        self._stop_event.set()
+        if self._reload_thread is not None:
+            self._reload_thread.join()
+            self._reload_thread = None
+
+    def _load_state(self) -> Tuple[Dict[str, Persona], KeywordDomainRouter]:
+        """Lê o arquivo e monta as personas e o roteador."""
+        personas: Dict[str, Persona] = {}
+        with open(self.file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
             for p_data in data:
                 config = PersonaConfig(**p_data['persona_config'])
-                self.personas[p_data['id']] = Persona(
+                personas[p_data['id']] = Persona(
                     id=p_data['id'],
                     name=p_data['name'],
                     semantic_description=p_data['semantic_description'],
                     config=config
                 )
+        return personas, KeywordDomainRouter.from_personas(data)
 
     def get_persona_by_id(self, persona_id: str) -> Optional[Persona]:
         """Recupera uma persona da memória pelo seu ID.
@@ -51,7 +387,7 @@ class JSONPersonaProvider(PersonaProvider):
         """
         return self.personas.get(persona_id)
 
-    def detect_domain(self, user_input: str) -> str:
+    def detect_domain(self, user_input: str, query_embedding: Optional[List[float]] = None) -> str:
         """Detecta um domínio com base em palavras-chave na entrada do usuário.
 
         Esta é uma implementação simples e baseada em regras para roteamento.
@@ -60,17 +396,35 @@ class JSONPersonaProvider(PersonaProvider):
 
         Args:
             user_input (str): O texto a ser analisado.
+            query_embedding (Optional[List[float]], optional): Ignorado; o
+                roteamento é feito por palavras-chave.
 
         Returns:
-            str: O ID do domínio detectado ('fiscal', 'product_catalog' ou
-            'default').
+            str: O ID do domínio detectado, ou 'default'.
         """
-        user_input_lower = user_input.lower()
-        if any(kw in user_input_lower for kw in ["nota", "icms", "fiscal", "nfe", "nf-e"]):
-            return "fiscal"
-        if any(kw in user_input_lower for kw in ["produto", "cadastrar", "sku", "item"]):
-            return "product_catalog"
-        return "default"
+        return self.router.detect(user_input)
+
+
+class _SemanticState:
+    """Estruturas derivadas do arquivo semântico.
+
+    Agrupá-las em um único objeto permite que a recarga troque tudo de uma
+    vez: cada chamada lê `self._semantic` uma única vez e trabalha sempre
+    sobre o mesmo estado, mesmo que uma recarga aconteça no meio dela.
+    """
+    def __init__(self, fingerprint: Optional[Dict[str, int]]):
+        self.fingerprint = fingerprint
+        self.memories: Optional[List[SemanticMemory]] = None
+        self.by_domain: Dict[str, List[SemanticMemory]] = {}
+        # No modo 'lazy': deslocamento e tamanho (em bytes) dos itens de cada
+        # domínio ainda não materializado, e a versão do arquivo a que se referem.
+        self.pending_domains: Dict[str, List[Tuple[int, int]]] = {}
+        self.pending_fingerprint: Optional[Dict[str, int]] = None
+        self.domain_positions: Dict[str, List[int]] = {}
+        self.ann_indexes: Dict[str, Tuple[List[int], IVFIndex]] = {}
+        self.persisted_ann: Dict[str, Dict[str, Any]] = {}
+        self.load_lock = threading.Lock()
+        self.ann_lock = threading.Lock()
 
 
 class JSONMemoryProvider(MemoryProvider):
@@ -80,6 +434,44 @@ class JSONMemoryProvider(MemoryProvider):
     prazo (semântico) e o histórico de conversas (episódico) em arquivos
     JSON separados. É adequada para testes e aplicações de pequena escala.
 
+    Quando há um embedding da consulta (fornecido pelo orquestrador ou
+    calculado com `embedding_function`), a busca semântica retorna as
+    memórias mais próximas usando um índice IVF (`eca.memory.ann.IVFIndex`)
+    construído por domínio na primeira consulta. Domínios com pelo menos
+    `ann_min_domain_size` memórias têm o índice persistido ao lado do arquivo
+    semântico (`<semantic_path>.ann.json`), evitando reconstruí-lo a cada
+    inicialização; domínios menores usam busca exata.
+
+    O log episódico pode ser gravado em dois formatos (`episodic_format`):
+
+    - 'json' (padrão): um array JSON reescrito por inteiro a cada interação.
+    - 'jsonl': JSON Lines, somente anexação. Cada turno grava uma única linha,
+      e `compact_episodic_log` (chamado manualmente ou em segundo plano, a
+      cada `compaction_interval` segundos) reescreve o arquivo de forma
+      atômica. Arquivos existentes no formato de array são lidos e
+      convertidos na carga.
+
+    As interações recentes de cada par usuário/domínio ficam também em um
+    índice de buffers limitados (`episodic_index_size` por par), de modo que
+    `fetch_episodic_memories` não precisa percorrer o log inteiro.
+
+    O arquivo semântico pode ser carregado de três formas
+    (`semantic_load_mode`):
+
+    - 'eager' (padrão): lê e decodifica o arquivo inteiro de uma vez.
+    - 'stream': decodifica um item por vez, montando as partições por domínio
+      à medida que lê, o que reduz o pico de memória da carga.
+    - 'lazy': lê o arquivo em blocos, apenas localizando os limites de cada
+      memória e lendo seu `domain_id`, sem decodificar o restante (ex: os
+      embeddings), e guarda só a posição de cada uma no arquivo; os objetos
+      de um domínio só são lidos e criados na primeira consulta a ele.
+
+    Com `reload_interval`, uma thread verifica periodicamente o tamanho e o
+    mtime do arquivo semântico e, se mudaram, reconstrói as partições (e
+    descarta os índices ANN antigos) fora do caminho das requisições,
+    trocando o estado de uma só vez. O log episódico não é recarregado, pois
+    é escrito pelo próprio provedor.
+
     Attributes:
         semantic_memories (List[SemanticMemory]): Lista de memórias semânticas
             carregadas em memória.
@@ -87,59 +479,432 @@ class JSONMemoryProvider(MemoryProvider):
             carregadas em memória.
         episodic_path (str): Caminho para o arquivo de log episódico, usado
             para salvar novas interações.
+        ann_index_path (str): Caminho do arquivo onde os índices ANN são
+            persistidos.
     """
-    def __init__(self, semantic_path: str, episodic_path: str):
+    def __init__(
+        self,
+        semantic_path: str,
+        episodic_path: str,
+        embedding_function: Optional[Callable[[str], List[float]]] = None,
+        ann_min_domain_size: int = 256,
+        ann_n_probe: int = 8,
+        persist_ann_index: bool = True,
+        episodic_format: str = 'json',
+        fsync_policy: str = 'never',
+        fsync_interval: float = 1.0,
+        compaction_interval: Optional[float] = None,
+        episodic_keep_last: Optional[int] = None,
+        episodic_index_size: int = 50,
+        semantic_load_mode: str = 'eager',
+        reload_interval: Optional[float] = None,
+    ):
         """Inicializa o provedor de memória carregando os arquivos JSON.
 
         Args:
             semantic_path (str): Caminho para o arquivo JSON de memória semântica.
             episodic_path (str): Caminho para o arquivo JSON de memória episódica.
+            embedding_function (Optional[Callable], optional): Função que
+                converte texto em vetor, usada quando o orquestrador não
+                fornece `query_embedding`. Sem ela (e sem `query_embedding`),
+                a busca semântica retorna as primeiras memórias do domínio.
+            ann_min_domain_size (int, optional): Tamanho mínimo de um domínio
+                para usar (e persistir) o índice aproximado. Padrão 256.
+            ann_n_probe (int, optional): Quantas listas do índice IVF examinar
+                por consulta. Padrão 8.
+            persist_ann_index (bool, optional): Se True, grava os índices
+                construídos em `ann_index_path`. Padrão True.
+            episodic_format (str, optional): 'json' (array reescrito a cada
+                interação) ou 'jsonl' (somente anexação). Padrão 'json'.
+            fsync_policy (str, optional): No formato 'jsonl', quando forçar a
+                gravação em disco: 'always' (a cada turno), 'interval' (no
+                máximo a cada `fsync_interval` segundos) ou 'never' (deixa a
+                cargo do sistema operacional). Padrão 'never'.
+            fsync_interval (float, optional): Intervalo, em segundos, da
+                política 'interval'. Padrão 1.0.
+            compaction_interval (Optional[float], optional): Se informado, uma
+                thread em segundo plano compacta o log 'jsonl' a cada
+                `compaction_interval` segundos. Padrão `None`.
+            episodic_keep_last (Optional[int], optional): Retenção do log
+                episódico: quantas interações manter por usuário/domínio, no
+                arquivo (a cada compactação) e em memória. Padrão `None`
+                (mantém todo o histórico).
+            episodic_index_size (int, optional): Quantas interações recentes
+                manter indexadas por usuário/domínio. Pedidos de `last_n`
+                maiores recorrem a uma varredura do log. Padrão 50.
+            semantic_load_mode (str, optional): 'eager', 'stream' ou 'lazy'.
+                Padrão 'eager'.
+            reload_interval (Optional[float], optional): Se informado, o
+                arquivo semântico é verificado a cada `reload_interval`
+                segundos e recarregado quando muda. Padrão `None`.
+
+        Raises:
+            ValueError: Se `episodic_format`, `fsync_policy` ou
+                `semantic_load_mode` forem inválidos.
         """
-        self.semantic_memories: List[SemanticMemory] = self._load_json(semantic_path, SemanticMemory)
-        self.episodic_log: List[EpisodicMemory] = self._load_json(episodic_path, EpisodicMemory)
+        if episodic_format not in ('json', 'jsonl'):
+            raise ValueError(f"Formato de log episódico desconhecido: '{episodic_format}'")
+        if fsync_policy not in ('always', 'interval', 'never'):
+            raise ValueError(f"Política de fsync desconhecida: '{fsync_policy}'")
+        if semantic_load_mode not in ('eager', 'stream', 'lazy'):
+            raise ValueError(f"Modo de carga semântica desconhecido: '{semantic_load_mode}'")
+
+        self.semantic_path = semantic_path
+        self.semantic_load_mode = semantic_load_mode
+        self.ann_index_path = f"{semantic_path}.ann.json"
+        self._semantic_fingerprint = _file_fingerprint(semantic_path)
+        try:
+            self._semantic = self._load_semantic()
+        except FileNotFoundError:
+            self._semantic = _SemanticState(None)
+        except json.JSONDecodeError as e:
+            print(f"Aviso: Arquivo semântico {semantic_path} malformado e ignorado: {e}")
+            self._semantic = _SemanticState(self._semantic_fingerprint)
+
         self.episodic_path = episodic_path
+        self.episodic_format = episodic_format
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.episodic_keep_last = episodic_keep_last
+        self._episodic_lock = threading.Lock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_tail: Optional[List[EpisodicMemory]] = None
+        self._episodic_file: Optional[IO[str]] = None
+        self._last_fsync = time.monotonic()
+        self._appended_since_compaction = 0
+        self.episodic_log: List[EpisodicMemory] = self._load_episodic_log()
+        if episodic_keep_last is not None:
+            self.episodic_log = _retain_last(self.episodic_log, episodic_keep_last)
+        self._trim_threshold = max(2 * len(self.episodic_log), 1024)
+        self.episodic_index_size = episodic_index_size
+        self._episodic_index: Dict[Tuple[str, str], Deque[EpisodicMemory]] = {}
+        self._rebuild_episodic_index()
+        self.embed = embedding_function
+        self.ann_min_domain_size = ann_min_domain_size
+        self.ann_n_probe = ann_n_probe
+        self.persist_ann_index = persist_ann_index
 
-    def _load_json(self, file_path: str, model_class: Type) -> List[Any]:
-        """Carrega e desserializa um arquivo JSON para uma lista de objetos.
+        self._stop_event = threading.Event()
+        self._background_threads: List[threading.Thread] = []
+        if compaction_interval and episodic_format == 'jsonl':
+            self._background_threads.append(_start_periodic(
+                compaction_interval, self._compact_if_needed, self._stop_event, "compactar o log episódico"
+            ))
+        if reload_interval:
+            self._background_threads.append(_start_periodic(
+                reload_interval, self.reload, self._stop_event, "recarregar as memórias semânticas"
+            ))
 
-        Args:
-            file_path (str): O caminho do arquivo a ser lido.
-            model_class (Type): A classe de modelo (ex: `SemanticMemory`) a ser
-                instanciada para cada item no JSON.
+    @property
+    def semantic_memories(self) -> List[SemanticMemory]:
+        """Todas as memórias semânticas, na ordem do arquivo.
+
+        No modo 'lazy', acessar esta propriedade materializa todos os domínios.
+        """
+        state = self._semantic
+        if state.memories is None:
+            while state.pending_domains:
+                self._domain_memories(state, next(iter(state.pending_domains), None))
+            with state.load_lock:
+                positioned = [
+                    (position, memory)
+                    for domain_id, memories in state.by_domain.items()
+                    for position, memory in zip(state.domain_positions.get(domain_id, []), memories)
+                ]
+                positioned.sort(key=lambda pair: pair[0])
+                state.memories = [memory for _, memory in positioned]
+        return state.memories
+
+    def reload(self) -> bool:
+        """Recarrega o arquivo semântico se ele mudou desde a última verificação.
+
+        O novo estado é montado por completo antes de substituir o anterior;
+        se o arquivo estiver malformado (ex: no meio de uma escrita), o estado
+        atual é mantido até a próxima mudança. Os índices ANN dos domínios já
+        consultados também são montados antes da troca, reaproveitando os
+        daqueles cujas memórias não mudaram, para que nenhuma consulta
+        precise reconstruí-los.
 
         Returns:
-            List[Any]: Uma lista de instâncias de `model_class`, ou uma lista
-            vazia se o arquivo não for encontrado ou estiver malformado.
+            bool: `True` se as memórias foram recarregadas.
+        """
+        fingerprint = _file_fingerprint(self.semantic_path)
+        if fingerprint is None or fingerprint == self._semantic_fingerprint:
+            return False
+        self._semantic_fingerprint = fingerprint
+        try:
+            state = self._load_semantic()
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            print(f"Aviso: Arquivo semântico {self.semantic_path} inválido; mantendo a versão anterior: {e}")
+            return False
+        self._prepare_ann_indexes(self._semantic, state)
+        self._semantic = state
+        if self.persist_ann_index and state.persisted_ann:
+            # Regrava os índices com a nova versão do arquivo semântico, para
+            # que continuem válidos após um reinício.
+            self._write_ann_file(state)
+        return True
+
+    def _prepare_ann_indexes(self, previous: _SemanticState, state: _SemanticState):
+        """Monta no novo estado os índices ANN já construídos no anterior.
+
+        O índice de um domínio cujos IDs (na mesma ordem) não mudaram é
+        reaproveitado, como faria o índice persistido; os demais são
+        reconstruídos aqui, fora do caminho das consultas.
+        """
+        for domain_id, (positions, index) in list(previous.ann_indexes.items()):
+            if domain_id not in state.persisted_ann and len(positions) >= self.ann_min_domain_size:
+                previous_memories = self._domain_memories(previous, domain_id)
+                ids = [previous_memories[position].id for position in positions]
+                state.persisted_ann[domain_id] = dict(index.to_dict(), ids=ids)
+            positions, _ = self._get_ann_index(state, domain_id)
+            persisted = state.persisted_ann.get(domain_id)
+            if persisted is not None:
+                memories = self._domain_memories(state, domain_id)
+                if persisted.get("ids") != [memories[position].id for position in positions]:
+                    # Entrada reaproveitada que não corresponde mais ao domínio.
+                    del state.persisted_ann[domain_id]
+
+    def _load_semantic(self) -> _SemanticState:
+        """Carrega o arquivo semântico de acordo com `semantic_load_mode`.
+
+        Raises:
+            FileNotFoundError: Se o arquivo não existir.
+            json.JSONDecodeError: Se o arquivo estiver malformado.
+        """
+        state = _SemanticState(_file_fingerprint(self.semantic_path))
+        if self.semantic_load_mode == 'eager':
+            with open(self.semantic_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            state.memories = [SemanticMemory(**item) for item in json.loads(content)] if content else []
+            for memory in state.memories:
+                state.by_domain.setdefault(memory.domain_id, []).append(memory)
+        elif self.semantic_load_mode == 'lazy':
+            # Só a posição de cada item e o `domain_id` são lidos agora; cada
+            # item é relido e decodificado na primeira consulta ao domínio.
+            with open(self.semantic_path, 'rb') as f:
+                self._scan_pending_domains(state, f)
+            if not state.pending_domains:
+                state.memories = []
+        else:
+            state.memories = []
+            for position, (item, _) in enumerate(_iter_json_array(self.semantic_path)):
+                memory = SemanticMemory(**item)
+                state.memories.append(memory)
+                state.domain_positions.setdefault(memory.domain_id, []).append(position)
+                state.by_domain.setdefault(memory.domain_id, []).append(memory)
+        state.persisted_ann = self._load_ann_file(state.fingerprint)
+        return state
+
+    def _domain_memories(self, state: _SemanticState, domain_id: str) -> List[SemanticMemory]:
+        """Retorna as memórias de um domínio, materializando-as se necessário."""
+        memories = state.by_domain.get(domain_id)
+        if memories is not None:
+            return memories
+        if domain_id not in state.pending_domains:
+            return []
+        with state.load_lock:
+            memories = state.by_domain.get(domain_id)
+            if memories is None:
+                with open(self.semantic_path, 'rb') as f:
+                    if _stat_fingerprint(os.fstat(f.fileno())) != state.pending_fingerprint:
+                        # O arquivo mudou desde a varredura: as posições dos
+                        # domínios pendentes são recalculadas sobre a versão atual.
+                        self._scan_pending_domains(state, f)
+                    memories = []
+                    for offset, length in state.pending_domains.get(domain_id, []):
+                        f.seek(offset)
+                        memories.append(SemanticMemory(**json.loads(f.read(length))))
+                state.by_domain[domain_id] = memories
+                state.pending_domains.pop(domain_id, None)
+            return memories
+
+    @staticmethod
+    def _scan_pending_domains(state: _SemanticState, f: IO[bytes]):
+        """Registra a posição dos itens dos domínios ainda não materializados.
+
+        Na carga inicial, todos os domínios estão pendentes; em uma nova
+        varredura, os domínios já materializados são mantidos como estão.
+        """
+        fingerprint = _stat_fingerprint(os.fstat(f.fileno()))
+        f.seek(0)
+        pending: Dict[str, List[Tuple[int, int]]] = {}
+        positions: Dict[str, List[int]] = {}
+        for position, (domain_id, offset, length) in enumerate(_scan_json_array(f, "domain_id")):
+            if domain_id not in state.by_domain:
+                pending.setdefault(domain_id, []).append((offset, length))
+                positions.setdefault(domain_id, []).append(position)
+        for domain_id in state.pending_domains:
+            state.domain_positions.pop(domain_id, None)
+        state.domain_positions.update(positions)
+        state.pending_domains = pending
+        state.pending_fingerprint = fingerprint
+
+    def _load_episodic_log(self) -> List[EpisodicMemory]:
+        """Carrega o log episódico, aceitando tanto array JSON quanto JSON Lines.
+
+        No formato 'jsonl', um arquivo legado (array JSON) é convertido para
+        JSON Lines, para que as próximas interações possam ser anexadas.
+        Linhas corrompidas (ex: uma escrita interrompida) são ignoradas e
+        removidas do arquivo antes de qualquer nova anexação.
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open(self.episodic_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-                if not content:
-                    return []
-                data = json.loads(content)
-                return [model_class(**item) for item in data]
-        except (FileNotFoundError, json.JSONDecodeError):
+        except FileNotFoundError:
             return []
 
-    def fetch_semantic_memories(self, user_input: str, domain_id: str, top_k: int = 3) -> List[SemanticMemory]:
-        """Simula uma busca por memórias semânticas filtrando por domínio.
+        if content.lstrip().startswith('['):
+            try:
+                interactions = [EpisodicMemory(**item) for item in json.loads(content)]
+            except json.JSONDecodeError:
+                return []
+            if self.episodic_format == 'jsonl':
+                self._rewrite_episodic_file(interactions)
+            return interactions
+
+        interactions = []
+        invalid_lines = False
+        for line_number, line in enumerate(content.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                interactions.append(EpisodicMemory(**json.loads(line)))
+            except (json.JSONDecodeError, TypeError):
+                invalid_lines = True
+                print(f"Aviso: Linha {line_number} inválida em {self.episodic_path} foi ignorada.")
+        if self.episodic_format == 'json' and interactions:
+            self._rewrite_episodic_file(interactions)
+        elif invalid_lines or (content and not content.endswith('\n')):
+            # Uma última linha incompleta (ex: queda no meio da escrita) ficaria
+            # colada à próxima interação anexada, e as duas se perderiam.
+            self._rewrite_episodic_file(interactions)
+        return interactions
+
+    def fetch_semantic_memories(self, user_input: str, domain_id: str, top_k: int = 3, query_embedding: Optional[List[float]] = None) -> List[SemanticMemory]:
+        """Busca as memórias semânticas mais próximas da entrada no domínio.
 
         Nota:
-            Esta é uma simulação simplificada. Uma implementação de produção
-            usaria técnicas de busca por similaridade de vetores (embeddings)
-            em vez de apenas retornar os primeiros K itens.
+            Sem `query_embedding` e sem `embedding_function`, não há como
+            medir similaridade e são retornados os primeiros K itens do
+            domínio, como na simulação original.
 
         Args:
-            user_input (str): A entrada do usuário (não utilizada nesta
-                implementação simples).
+            user_input (str): A entrada do usuário, vetorizada com
+                `embedding_function` se `query_embedding` não for fornecido.
             domain_id (str): O domínio para filtrar as memórias.
             top_k (int): O número máximo de memórias a retornar.
+            query_embedding (Optional[List[float]], optional): O embedding da
+                entrada, quando já calculado pelo orquestrador.
 
         Returns:
-            List[SemanticMemory]: Uma lista de memórias filtradas.
+            List[SemanticMemory]: As memórias do domínio, das mais para as
+            menos similares.
         """
-        domain_memories = [m for m in self.semantic_memories if m.domain_id == domain_id]
-        return domain_memories[:top_k]
+        state = self._semantic
+        domain_memories = self._domain_memories(state, domain_id)
+        if query_embedding is None and self.embed is not None:
+            query_embedding = self.embed(user_input)
+        if query_embedding is None:
+            return domain_memories[:top_k]
+
+        positions, index = self._get_ann_index(state, domain_id)
+        if index.dimension != len(query_embedding):
+            return domain_memories[:top_k]
+        return [domain_memories[positions[hit]] for hit in index.search(query_embedding, top_k, self.ann_n_probe)]
+
+    def fetch_semantic_memories_batch(self, user_inputs: List[str], domain_id: str, top_k: int = 3, query_embeddings: Optional[List[List[float]]] = None) -> List[List[SemanticMemory]]:
+        """Busca memórias semânticas para um lote, vetorizando as entradas de uma vez.
+
+        Args:
+            user_inputs (List[str]): As entradas dos usuários.
+            domain_id (str): O domínio para filtrar as memórias.
+            top_k (int): O número máximo de memórias por entrada.
+            query_embeddings (Optional[List[List[float]]], optional): Os
+                embeddings das entradas, quando já calculados.
+
+        Returns:
+            List[List[SemanticMemory]]: Uma lista de memórias por entrada.
+        """
+        if query_embeddings is None and self.embed is not None:
+            query_embeddings = embed_texts(self.embed, user_inputs)
+        if query_embeddings is None:
+            domain_memories = self._domain_memories(self._semantic, domain_id)[:top_k]
+            return [list(domain_memories) for _ in user_inputs]
+        return [
+            self.fetch_semantic_memories(user_input, domain_id, top_k, query_embedding=query_embedding)
+            for user_input, query_embedding in zip(user_inputs, query_embeddings)
+        ]
+
+    def _get_ann_index(self, state: _SemanticState, domain_id: str) -> Tuple[List[int], IVFIndex]:
+        """Retorna o índice do domínio, carregando-o ou construindo-o na primeira vez.
+
+        Returns:
+            Tuple[List[int], IVFIndex]: As posições (na lista do domínio) das
+            memórias indexadas e o índice em si.
+        """
+        entry = state.ann_indexes.get(domain_id)
+        if entry is not None:
+            return entry
+
+        with state.ann_lock:
+            entry = state.ann_indexes.get(domain_id)
+            if entry is not None:
+                return entry
+
+            domain_memories = self._domain_memories(state, domain_id)
+            dimension = next((len(m.embedding) for m in domain_memories if isinstance(m.embedding, list)), 0)
+            positions = [
+                i for i, m in enumerate(domain_memories)
+                if isinstance(m.embedding, list) and len(m.embedding) == dimension
+            ]
+            vectors = [domain_memories[i].embedding for i in positions]
+            ids = [domain_memories[i].id for i in positions]
+
+            persisted = state.persisted_ann.get(domain_id)
+            if persisted is not None and persisted.get("ids") == ids:
+                index = IVFIndex.from_dict(persisted, vectors)
+            elif len(vectors) < self.ann_min_domain_size:
+                # Com uma única lista, a busca é exata.
+                index = IVFIndex.build(vectors, n_lists=1)
+            else:
+                index = IVFIndex.build(vectors)
+                if self.persist_ann_index:
+                    self._persist_ann_index(state, domain_id, ids, index)
+
+            entry = (positions, index)
+            state.ann_indexes[domain_id] = entry
+            return entry
+
+    def _load_ann_file(self, fingerprint: Optional[Dict[str, int]]) -> Dict[str, Dict[str, Any]]:
+        """Carrega os índices persistidos, se corresponderem à versão do arquivo semântico."""
+        if fingerprint is None:
+            return {}
+        try:
+            with open(self.ann_index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if data.get("source") != fingerprint:
+            return {}
+        return data.get("domains", {})
+
+    def _persist_ann_index(self, state: _SemanticState, domain_id: str, ids: List[str], index: IVFIndex):
+        """Grava o índice de um domínio junto aos demais já persistidos."""
+        state.persisted_ann[domain_id] = dict(index.to_dict(), ids=ids)
+        # Um estado antigo (substituído por uma recarga) não deve sobrescrever
+        # o arquivo; um estado ainda em montagem é gravado pela própria recarga.
+        if state is self._semantic:
+            self._write_ann_file(state)
+
+    def _write_ann_file(self, state: _SemanticState):
+        """Grava os índices persistidos de um estado, marcados com a versão do arquivo semântico."""
+        if state.fingerprint is None:
+            return
+        try:
+            _atomic_write_json(self.ann_index_path, {"source": state.fingerprint, "domains": state.persisted_ann})
+        except OSError as e:
+            print(f"Aviso: Não foi possível persistir o índice ANN em {self.ann_index_path}: {e}")
 
     def fetch_episodic_memories(self, user_id: str, domain_id: str, last_n: int = 5) -> List[EpisodicMemory]:
         """Recupera as últimas N interações de um usuário em um domínio.
@@ -152,6 +917,16 @@ class JSONMemoryProvider(MemoryProvider):
         Returns:
             List[EpisodicMemory]: O histórico de conversa filtrado.
         """
+        if self.episodic_keep_last is not None:
+            last_n = min(last_n, self.episodic_keep_last)
+        if last_n <= 0:
+            return []
+        if last_n <= self.episodic_index_size:
+            # A cópia custa no máximo `episodic_index_size` itens e é atômica
+            # em relação a `log_interaction`.
+            recent = list(self._episodic_index.get((user_id, domain_id), ()))
+            return recent[-last_n:]
+
         user_domain_interactions = [
             inter for inter in self.episodic_log
             if inter.user_id == user_id and inter.domain_id == domain_id
@@ -159,20 +934,141 @@ class JSONMemoryProvider(MemoryProvider):
         return user_domain_interactions[-last_n:]
 
     def log_interaction(self, interaction: EpisodicMemory):
-        """Adiciona uma nova interação ao log e reescreve o arquivo JSON.
+        """Adiciona uma nova interação ao log e a persiste.
 
         Nota:
-            Reescrever o arquivo inteiro a cada interação não é performático
-            para logs grandes. Em produção, seria preferível um formato de
-            append (JSON Lines) ou um banco de dados.
+            No formato 'json', o arquivo inteiro é reescrito a cada interação,
+            o que não é performático para logs grandes. Prefira 'jsonl', que
+            anexa uma única linha por turno.
 
         Args:
             interaction (EpisodicMemory): A interação a ser salva.
         """
-        self.episodic_log.append(interaction)
-        data_to_save = [asdict(inter) for inter in self.episodic_log]
-        with open(self.episodic_path, 'w', encoding='utf-8') as f:
-            json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+        with self._episodic_lock:
+            self.episodic_log.append(interaction)
+            self._index_interaction(interaction)
+            if self._compaction_tail is not None:
+                self._compaction_tail.append(interaction)
+            if self.episodic_keep_last is not None and len(self.episodic_log) >= self._trim_threshold:
+                # Corte amortizado: o log em memória fica limitado a cerca de
+                # duas vezes a retenção.
+                self.episodic_log = _retain_last(self.episodic_log, self.episodic_keep_last)
+                self._rebuild_episodic_index()
+                self._trim_threshold = max(2 * len(self.episodic_log), 1024)
+            if self.episodic_format == 'json':
+                data_to_save = [asdict(inter) for inter in self.episodic_log]
+                with open(self.episodic_path, 'w', encoding='utf-8') as f:
+                    json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+                return
+
+            if self._episodic_file is None:
+                self._episodic_file = open(self.episodic_path, 'a', encoding='utf-8')
+            self._episodic_file.write(json.dumps(asdict(interaction), ensure_ascii=False) + '\n')
+            self._episodic_file.flush()
+            self._appended_since_compaction += 1
+
+            now = time.monotonic()
+            if self.fsync_policy == 'always' or (
+                self.fsync_policy == 'interval' and now - self._last_fsync >= self.fsync_interval
+            ):
+                os.fsync(self._episodic_file.fileno())
+                self._last_fsync = now
+
+    def compact_episodic_log(self, keep_last: Optional[int] = None):
+        """Reescreve o log episódico de forma atômica, uma interação por linha.
+
+        A compactação descarta linhas corrompidas e aplica a retenção por par
+        usuário/domínio. Pode ser chamada a qualquer momento (inclusive de um
+        script de manutenção, com a aplicação parada). O novo arquivo é
+        escrito fora do lock de `log_interaction`; as interações anexadas
+        nesse meio-tempo são acrescentadas a ele antes da troca, então não
+        são perdidas.
+
+        Args:
+            keep_last (Optional[int], optional): Retenção por usuário/domínio.
+                Padrão `episodic_keep_last` (`None` mantém todo o histórico).
+        """
+        if keep_last is None:
+            keep_last = self.episodic_keep_last
+        with self._compaction_lock:
+            with self._episodic_lock:
+                if keep_last is not None:
+                    self.episodic_log = _retain_last(self.episodic_log, keep_last)
+                    self._rebuild_episodic_index()
+                    self._trim_threshold = max(2 * len(self.episodic_log), 1024)
+                if self.episodic_format == 'json':
+                    self._rewrite_episodic_file(self.episodic_log)
+                    return
+                snapshot = list(self.episodic_log)
+                self._compaction_tail = []
+                self._appended_since_compaction = 0
+
+            directory = os.path.dirname(os.path.abspath(self.episodic_path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(_jsonl_bytes(snapshot))
+                    with self._episodic_lock:
+                        tail, self._compaction_tail = self._compaction_tail, None
+                        f.write(_jsonl_bytes(tail))
+                        f.flush()
+                        os.fsync(f.fileno())
+                        self._close_episodic_file()
+                        os.replace(tmp_path, self.episodic_path)
+            except BaseException:
+                with self._episodic_lock:
+                    self._compaction_tail = None
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    def close(self):
+        """Interrompe as tarefas em segundo plano e fecha o log episódico."""
+        self._stop_event.set()
+        for thread in self._background_threads:
+            thread.join()
+        self._background_threads = []
+        with self._episodic_lock:
+            self._close_episodic_file()
+
+    def _rebuild_episodic_index(self):
+        """Reconstrói o índice de interações recentes a partir do log."""
+        self._episodic_index = {}
+        for interaction in self.episodic_log:
+            self._index_interaction(interaction)
+
+    def _index_interaction(self, interaction: EpisodicMemory):
+        """Insere uma interação no buffer do seu par usuário/domínio."""
+        key = (interaction.user_id, interaction.domain_id)
+        recent = self._episodic_index.get(key)
+        if recent is None:
+            size = self.episodic_index_size
+            if self.episodic_keep_last is not None:
+                size = min(size, self.episodic_keep_last)
+            recent = self._episodic_index[key] = deque(maxlen=size)
+        recent.append(interaction)
+
+    def _compact_if_needed(self):
+        """Compacta o log se houve anexações desde a última compactação."""
+        if self._appended_since_compaction:
+            self.compact_episodic_log()
+
+    def _rewrite_episodic_file(self, interactions: List[EpisodicMemory]):
+        """Reescreve o arquivo episódico inteiro no formato configurado."""
+        if self.episodic_format == 'json':
+            _atomic_write_json(self.episodic_path, [asdict(inter) for inter in interactions], indent=2)
+            return
+
+        _atomic_write_bytes(self.episodic_path, _jsonl_bytes(interactions), fsync=True)
+
+    def _close_episodic_file(self):
+        """Fecha o arquivo de anexação, garantindo que ele esteja em disco."""
+        if self._episodic_file is not None:
+            self._episodic_file.flush()
+            if self.fsync_policy != 'never':
+                os.fsync(self._episodic_file.fileno())
+            self._episodic_file.close()
+            self._episodic_file = None
 
 
 class JSONSessionProvider(SessionProvider):
@@ -181,24 +1077,35 @@ class JSONSessionProvider(SessionProvider):
     Gerencia o `CognitiveWorkspace` de múltiplos usuários, armazenando
     todos eles em um único arquivo JSON, onde cada chave é um `user_id`.
 
+    Com `compression`, o arquivo é gravado comprimido quando passa de
+    `compression_threshold` bytes. Arquivos sem compressão continuam
+    legíveis, e a conversão acontece na próxima gravação.
+
     Attributes:
         file_path (str): O caminho para o arquivo JSON de sessões.
         sessions (Dict[str, Any]): Um dicionário em memória com os dados
             das sessões de todos os usuários.
+        compression (Optional[str]): 'zlib', 'lz4' ou `None`.
+        compression_threshold (int): Tamanho mínimo, em bytes, para comprimir.
     """
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, compression: Optional[str] = None, compression_threshold: int = 1024):
         """Inicializa o provedor de sessão carregando o arquivo de sessões.
 
         Args:
             file_path (str): O caminho para o arquivo JSON de sessões.
+            compression (Optional[str], optional): 'zlib', 'lz4' (requer o
+                extra 'lz4') ou `None`. Padrão `None`.
+            compression_threshold (int, optional): Tamanho mínimo do arquivo
+                para comprimir. Padrão 1024 bytes.
+
+        Raises:
+            ValueError: Se o algoritmo de compressão for desconhecido.
         """
+        check_compression(compression)
         self.file_path = file_path
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                self.sessions = json.loads(content) if content else {}
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.sessions = {}
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.sessions = _read_sessions_file(file_path)
 
     def get_workspace(self, user_id: str) -> Optional[CognitiveWorkspace]:
         """Carrega a área de trabalho de um usuário a partir do cache em memória.
@@ -212,12 +1119,17 @@ class JSONSessionProvider(SessionProvider):
         """
         user_session_data = self.sessions.get(user_id)
         if user_session_data:
-            return CognitiveWorkspace(**user_session_data)
+            workspace = workspace_from_dict(user_session_data)
+            workspace.mark_clean()
+            return workspace
         return None
 
     def save_workspace(self, workspace: CognitiveWorkspace):
         """Salva a área de trabalho e reescreve o arquivo JSON de sessões.
 
+        Apenas os domínios alterados são convertidos novamente; se nada
+        mudou desde a leitura, o arquivo não é reescrito.
+
         Nota:
             Assim como no `JSONMemoryProvider`, reescrever o arquivo inteiro
             pode não ser ideal para um número muito grande de usuários/sessões.
@@ -226,6 +1138,213 @@ class JSONSessionProvider(SessionProvider):
             workspace (CognitiveWorkspace): O objeto de área de trabalho
                 a ser salvo.
         """
-        self.sessions[workspace.user_id] = asdict(workspace)
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.sessions, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+        self.save_workspaces([workspace])
+
+    def save_workspaces(self, workspaces: List[CognitiveWorkspace]):
+        """Salva vários workspaces reescrevendo o arquivo de sessões uma única vez.
+
+        Args:
+            workspaces (List[CognitiveWorkspace]): Os workspaces a serem salvos.
+        """
+        changed = [self._apply_changes(workspace) for workspace in workspaces]
+        if not any(changed):
+            return
+        # A indentação só ajuda a leitura do arquivo sem compressão.
+        indent = None if self.compression else 2
+        data = json.dumps(self.sessions, indent=indent, ensure_ascii=False, default=str).encode('utf-8')
+        _atomic_write_bytes(self.file_path, compress_payload(data, self.compression, self.compression_threshold))
+
+    def _apply_changes(self, workspace: CognitiveWorkspace) -> bool:
+        """Aplica ao cache em memória o que mudou no workspace.
+
+        Returns:
+            bool: `True` se a sessão em memória foi alterada.
+        """
+        # `workspace_to_dict` referencia o `task_data`, os metadados e os
+        # embeddings do chamador; o cache guarda uma cópia já no formato do
+        # arquivo, para que alterações posteriores (sem salvar) não vazem
+        # para a próxima gravação de outro usuário.
+        session = self.sessions.get(workspace.user_id)
+        if session is None or not workspace.is_persisted():
+            self.sessions[workspace.user_id] = _detached(workspace_to_dict(workspace))
+        elif workspace.is_dirty():
+            session["current_focus"] = workspace.current_focus
+            domains = session.setdefault("active_domains", {})
+            for domain_id in workspace.dirty_domains():
+                domains[domain_id] = _detached(domain_to_dict(workspace.active_domains[domain_id]))
+            for domain_id in workspace.removed_domains():
+                domains.pop(domain_id, None)
+        else:
+            return False
+        workspace.mark_clean()
+        return True
+
+
+class ShardedJSONSessionProvider(SessionProvider):
+    """Implementação de `SessionProvider` com um arquivo JSON por usuário.
+
+    Diferente do `JSONSessionProvider`, que mantém todas as sessões em um
+    único arquivo (lido por inteiro na inicialização e reescrito a cada
+    turno), este provedor grava cada workspace em seu próprio arquivo. O
+    custo de carregar ou salvar uma sessão depende apenas daquele usuário.
+
+    Os arquivos ficam em `directory/<hh>/<hash><extensão>`, onde `<hash>` é
+    o SHA-256 do `user_id` (seguro para qualquer caractere), `<hh>` seus dois
+    primeiros dígitos, distribuindo os arquivos em até 256 subdiretórios, e a
+    extensão depende do codec ('.json' por padrão). As gravações usam um
+    arquivo temporário renomeado sobre o destino, então uma sessão nunca fica
+    parcialmente escrita.
+
+    Com `per_domain=True`, cada usuário tem um diretório
+    `directory/<hh>/<hash>/` com um registro do workspace (ID do usuário e
+    foco) e um arquivo por domínio, e cada gravação reescreve apenas os
+    domínios alterados no turno. Em ambos os layouts, salvar um workspace
+    sem alterações desde a leitura não grava nada.
+
+    Attributes:
+        directory (str): O diretório raiz das sessões.
+        codec (WorkspaceCodec): O codec usado para serializar os workspaces.
+        per_domain (bool): Se cada domínio é gravado em um arquivo próprio.
+    """
+    def __init__(self, directory: str, codec: Optional[WorkspaceCodec] = None, per_domain: bool = False):
+        """Inicializa o provedor, criando o diretório se necessário.
+
+        Nenhuma sessão é lida aqui: cada uma é carregada sob demanda.
+
+        Args:
+            directory (str): O diretório onde as sessões serão armazenadas.
+            codec (Optional[WorkspaceCodec], optional): O codec dos arquivos
+                de sessão. Padrão `JSONWorkspaceCodec`.
+            per_domain (bool, optional): Grava um arquivo por domínio. Sessões
+                gravadas no layout de arquivo único continuam legíveis e são
+                convertidas na próxima gravação. Padrão False.
+        """
+        self.directory = directory
+        self.codec = codec or JSONWorkspaceCodec()
+        self.per_domain = per_domain
+        os.makedirs(directory, exist_ok=True)
+
+    def get_workspace(self, user_id: str) -> Optional[CognitiveWorkspace]:
+        """Carrega a área de trabalho de um usuário a partir do seu arquivo.
+
+        Args:
+            user_id (str): O ID do usuário cuja sessão será recuperada.
+
+        Returns:
+            Optional[CognitiveWorkspace]: O workspace, ou `None` se o usuário
+            não tiver sessão (ou se o arquivo estiver malformado).
+        """
+        try:
+            workspace = self._read_domains(user_id) if self.per_domain else None
+            if workspace is None:
+                with open(self._session_path(user_id), 'rb') as f:
+                    workspace = self.codec.decode(f.read())
+                if self.per_domain:
+                    # Veio do layout de arquivo único: a próxima gravação
+                    # precisa criar todos os arquivos de domínio.
+                    return workspace
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError):
+            print(f"Aviso: Sessão malformada para o usuário '{user_id}' foi ignorada.")
+            return None
+        workspace.mark_clean()
+        return workspace
+
+    def save_workspace(self, workspace: CognitiveWorkspace):
+        """Grava a área de trabalho do usuário, de forma atômica.
+
+        No layout por domínio, cada arquivo é substituído atomicamente, e os
+        domínios são gravados antes do registro do workspace.
+
+        Args:
+            workspace (CognitiveWorkspace): O objeto de área de trabalho
+                a ser salvo.
+        """
+        if workspace.is_persisted() and not workspace.is_dirty():
+            return
+        if not self.per_domain:
+            path = self._session_path(workspace.user_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _atomic_write_bytes(path, self.codec.encode(workspace))
+            workspace.mark_clean()
+            return
+
+        user_dir = self._user_dir(workspace.user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        for domain_id in workspace.dirty_domains():
+            state = workspace.active_domains[domain_id]
+            _atomic_write_bytes(self._domain_path(user_dir, domain_id), self.codec.encode_domain(domain_id, state))
+
+        if workspace.is_persisted():
+            stale = [self._domain_path(user_dir, domain_id) for domain_id in workspace.removed_domains()]
+        else:
+            # Sem histórico do que foi gravado, remove qualquer domínio que
+            # não pertença mais ao workspace.
+            keep = {os.path.basename(self._domain_path(user_dir, d)) for d in workspace.active_domains}
+            keep.add(_WORKSPACE_RECORD + self.codec.extension)
+            stale = [
+                os.path.join(user_dir, name) for name in os.listdir(user_dir)
+                if name.endswith(self.codec.extension) and name not in keep
+            ]
+        for path in stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        if workspace.is_focus_dirty():
+            header = CognitiveWorkspace(user_id=workspace.user_id, current_focus=workspace.current_focus)
+            _atomic_write_bytes(os.path.join(user_dir, _WORKSPACE_RECORD + self.codec.extension), self.codec.encode(header))
+        if not workspace.is_persisted():
+            legacy_path = self._session_path(workspace.user_id)
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+        workspace.mark_clean()
+
+    def import_sessions(self, file_path: str) -> int:
+        """Migra as sessões de um arquivo do `JSONSessionProvider`.
+
+        Args:
+            file_path (str): O arquivo JSON com todas as sessões, indexadas
+                por `user_id`.
+
+        Returns:
+            int: O número de sessões importadas.
+        """
+        sessions = _read_sessions_file(file_path)
+        for session in sessions.values():
+            self.save_workspace(workspace_from_dict(session))
+        return len(sessions)
+
+    def _session_path(self, user_id: str) -> str:
+        """Calcula o caminho do arquivo de sessão de um usuário."""
+        return self._user_dir(user_id) + self.codec.extension
+
+    def _user_dir(self, user_id: str) -> str:
+        """Calcula o caminho base (sem extensão) da sessão de um usuário."""
+        digest = hashlib.sha256(user_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _domain_path(self, user_dir: str, domain_id: str) -> str:
+        """Calcula o caminho do arquivo de um domínio no layout por domínio."""
+        digest = hashlib.sha256(domain_id.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(user_dir, f"{digest}{self.codec.extension}")
+
+    def _read_domains(self, user_id: str) -> Optional[CognitiveWorkspace]:
+        """Lê uma sessão no layout por domínio; `None` se ela não existir nesse layout."""
+        user_dir = self._user_dir(user_id)
+        record = _WORKSPACE_RECORD + self.codec.extension
+        try:
+            with open(os.path.join(user_dir, record), 'rb') as f:
+                header = self.codec.decode(f.read())
+        except FileNotFoundError:
+            return None
+        domains: Dict[str, DomainState] = {}
+        for name in sorted(os.listdir(user_dir)):
+            if name == record or not name.endswith(self.codec.extension):
+                continue
+            with open(os.path.join(user_dir, name), 'rb') as f:
+                domain_id, state = self.codec.decode_domain(f.read())
+            domains[domain_id] = state
+        return CognitiveWorkspace(user_id=header.user_id, current_focus=header.current_focus, active_domains=domains)
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+Armazenamento binário, mapeado em memória, para bases de conhecimento grandes.
+
+O formato é um diretório com os seguintes arquivos:
+
+- `manifest.json`: versão, quantidade de registros, dimensão dos embeddings e,
+  para cada domínio, o intervalo `[início, fim)` de seus registros (os
+  registros são agrupados por domínio na conversão).
+- `embeddings.f32`: matriz contígua `quantidade x dimensão` em float32.
+- `norms.f32`: a norma de cada linha (0 para registros sem embedding).
+- `records.bin`: id, domínio, tipo, texto e metadados de cada registro,
+  serializados em JSON (UTF-8) um após o outro.
+- `offsets.u64`: `quantidade + 1` deslocamentos de cada registro em
+  `records.bin`.
+
+Como os arquivos são abertos com `mmap` (e `numpy.memmap`), a inicialização
+não lê os dados, e as páginas são compartilhadas entre os processos de
+trabalho que abrem o mesmo diretório. O texto de uma memória só é
+desserializado quando ela aparece em um resultado.
+"""
+import json
+import mmap
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(
+        "O pacote 'numpy' não está instalado. "
+        "Por favor, instale a eca-lib com o suporte a NumPy: pip install eca-lib[numpy]"
+    )
+
+from .base import MemoryProvider
+from ..embeddings import embed_texts
+from ..memory import SemanticMemory, EpisodicMemory
+
+STORE_VERSION = 1
+
+
+def convert_json_to_mmap_store(semantic_path: str, output_dir: str) -> Dict[str, Any]:
+    """Converte um arquivo JSON de memórias semânticas para o formato binário.
+
+    Memórias sem embedding (ou com dimensão diferente da primeira encontrada)
+    são mantidas, mas nunca pontuam na busca por similaridade.
+
+    Args:
+        semantic_path (str): O arquivo JSON usado pelo `JSONMemoryProvider`.
+        output_dir (str): O diretório de destino (criado se necessário).
+
+    Returns:
+        Dict[str, Any]: O manifesto gravado.
+    """
+    with open(semantic_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+
+    dimension = next((len(r["embedding"]) for r in records if r.get("embedding")), 0)
+    # Ordenação estável: a ordem original é mantida dentro de cada domínio.
+    domain_order: Dict[str, int] = {}
+    for record in records:
+        domain_order.setdefault(record["domain_id"], len(domain_order))
+    records.sort(key=lambda r: domain_order[r["domain_id"]])
+
+    os.makedirs(output_dir, exist_ok=True)
+    matrix = np.zeros((len(records), dimension), dtype=np.float32)
+    domains: Dict[str, List[int]] = {}
+    offsets = [0]
+    with open(os.path.join(output_dir, "records.bin"), 'wb') as f:
+        for row, record in enumerate(records):
+            embedding = record.get("embedding")
+            if embedding and len(embedding) == dimension:
+                matrix[row] = embedding
+            elif embedding:
+                print(f"Aviso: Embedding da memória '{record['id']}' tem dimensão diferente de {dimension} e foi ignorado.")
+            payload = {key: value for key, value in record.items() if key != "embedding"}
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+            span = domains.setdefault(record["domain_id"], [row, row])
+            span[1] = row + 1
+
+    matrix.tofile(os.path.join(output_dir, "embeddings.f32"))
+    np.linalg.norm(matrix, axis=1).astype(np.float32).tofile(os.path.join(output_dir, "norms.f32"))
+    np.asarray(offsets, dtype=np.uint64).tofile(os.path.join(output_dir, "offsets.u64"))
+
+    manifest = {"version": STORE_VERSION, "count": len(records), "dimension": dimension, "domains": domains}
+    with open(os.path.join(output_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+class MMapMemoryProvider(MemoryProvider):
+    """Implementação de `MemoryProvider` sobre o armazenamento mapeado em memória.
+
+    A memória semântica é lida de um diretório gerado por
+    `convert_json_to_mmap_store`. A busca calcula a similaridade de cossenos
+    apenas sobre o intervalo de linhas do domínio, sem copiar a matriz, e
+    desserializa somente as memórias retornadas.
+
+    A memória episódica é delegada a outro `MemoryProvider` (ex: um
+    `JSONMemoryProvider`), já que o armazenamento binário é somente leitura.
+
+    Attributes:
+        store_dir (str): O diretório do armazenamento.
+        episodic_provider (MemoryProvider): O provedor usado para o histórico
+            de conversas.
+        dimension (int): A dimensão dos embeddings.
+        count (int): O número de memórias semânticas.
+    """
+    def __init__(
+        self,
+        store_dir: str,
+        episodic_provider: MemoryProvider,
+        embedding_function: Optional[Callable[[str], List[float]]] = None,
+    ):
+        """Abre (mapeia) o armazenamento sem ler seu conteúdo.
+
+        Args:
+            store_dir (str): O diretório gerado por `convert_json_to_mmap_store`.
+            episodic_provider (MemoryProvider): O provedor do histórico.
+            embedding_function (Optional[Callable], optional): Função usada
+                para vetorizar a entrada quando o orquestrador não fornece
+                `query_embedding`.
+
+        Raises:
+            ValueError: Se a versão do armazenamento não for suportada.
+        """
+        with open(os.path.join(store_dir, "manifest.json"), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") != STORE_VERSION:
+            raise ValueError(f"Versão de armazenamento não suportada: {manifest.get('version')}")
+
+        self.store_dir = store_dir
+        self.episodic_provider = episodic_provider
+        self.embed = embedding_function
+        self.dimension: int = manifest["dimension"]
+        self.count: int = manifest["count"]
+        self._domains: Dict[str, Tuple[int, int]] = {d: tuple(span) for d, span in manifest["domains"].items()}
+
+        if self.count and self.dimension:
+            self._embeddings = np.memmap(
+                os.path.join(store_dir, "embeddings.f32"), dtype=np.float32, mode='r', shape=(self.count, self.dimension)
+            )
+            self._norms = np.memmap(os.path.join(store_dir, "norms.f32"), dtype=np.float32, mode='r', shape=(self.count,))
+        else:
+            self._embeddings = np.zeros((self.count, self.dimension), dtype=np.float32)
+            self._norms = np.zeros(self.count, dtype=np.float32)
+        self._offsets = np.fromfile(os.path.join(store_dir, "offsets.u64"), dtype=np.uint64)
+
+        self._records_file = open(os.path.join(store_dir, "records.bin"), 'rb')
+        size = os.fstat(self._records_file.fileno()).st_size
+        self._records = mmap.mmap(self._records_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def fetch_semantic_memories(self, user_input: str, domain_id: str, top_k: int = 3, query_embedding: Optional[List[float]] = None) -> List[SemanticMemory]:
+        """Busca as memórias do domínio mais similares à entrada.
+
+        Sem `query_embedding` nem `embedding_function`, retorna as primeiras
+        `top_k` memórias do domínio.
+
+        Args:
+            user_input (str): A entrada do usuário.
+            domain_id (str): O domínio da busca.
+            top_k (int, optional): O número máximo de memórias. Padrão 3.
+            query_embedding (Optional[List[float]], optional): O embedding da
+                entrada, quando já calculado pelo orquestrador.
+
+        Returns:
+            List[SemanticMemory]: As memórias, da mais para a menos similar.
+        """
+        if query_embedding is None and self.embed is not None:
+            query_embedding = self.embed(user_input)
+        return self._search(domain_id, top_k, None if query_embedding is None else [query_embedding])[0]
+
+    def fetch_semantic_memories_batch(self, user_inputs: List[str], domain_id: str, top_k: int = 3, query_embeddings: Optional[List[List[float]]] = None) -> List[List[SemanticMemory]]:
+        """Busca memórias para várias entradas com um único produto de matrizes.
+
+        Args:
+            user_inputs (List[str]): As entradas dos usuários.
+            domain_id (str): O domínio da busca.
+            top_k (int, optional): O número máximo de memórias por entrada.
+            query_embeddings (Optional[List[List[float]]], optional): Os
+                embeddings das entradas, quando já calculados.
+
+        Returns:
+            List[List[SemanticMemory]]: Uma lista de memórias por entrada.
+        """
+        if not user_inputs:
+            return []
+        if query_embeddings is None and self.embed is not None:
+            query_embeddings = embed_texts(self.embed, user_inputs)
+        if query_embeddings is None:
+            return [list(memories) for memories in self._search(domain_id, top_k, None) * len(user_inputs)]
+        return self._search(domain_id, top_k, query_embeddings)
+
+    def fetch_episodic_memories(self, user_id: str, domain_id: str, last_n: int = 5) -> List[EpisodicMemory]:
+        """Delega a busca do histórico ao `episodic_provider`."""
+        return self.episodic_provider.fetch_episodic_memories(user_id, domain_id, last_n)
+
+    def log_interaction(self, interaction: EpisodicMemory):
+        """Delega o registro da interação ao `episodic_provider`."""
+        self.episodic_provider.log_interaction(interaction)
+
+    def close(self):
+        """Libera os mapeamentos de memória."""
+        if isinstance(self._records, mmap.mmap):
+            self._records.close()
+        self._records_file.close()
+        self._embeddings = self._norms = None
+
+    def _search(self, domain_id: str, top_k: int, queries: Optional[List[List[float]]]) -> List[List[SemanticMemory]]:
+        """Ranqueia o intervalo do domínio para cada consulta (ou para nenhuma)."""
+        start, end = self._domains.get(domain_id, (0, 0))
+        if queries is None or not self.dimension:
+            return [[self._load_record(row) for row in range(start, min(end, start + top_k))]]
+        if start == end or top_k <= 0:
+            return [[] for _ in queries]
+
+        q = np.asarray(queries, dtype=np.float32).reshape(len(queries), -1)
+        if q.shape[1] != self.dimension:
+            return [[self._load_record(row) for row in range(start, min(end, start + top_k))] for _ in queries]
+        q_norms = np.linalg.norm(q, axis=1, keepdims=True)
+        q = np.divide(q, q_norms, out=np.zeros_like(q), where=q_norms != 0)
+
+        norms = self._norms[start:end]
+        scores = (q @ self._embeddings[start:end].T) / np.where(norms == 0, 1, norms)
+        scores[:, norms == 0] = -np.inf
+        valid = int(np.count_nonzero(norms))
+        k = min(top_k, valid)
+
+        results = []
+        for row_scores in scores:
+            if k <= 0:
+                results.append([])
+                continue
+            if k < len(row_scores):
+                # Os empatados com a k-ésima pontuação podem ficar de fora do
+                # `argpartition` de forma arbitrária: todos entram antes do
+                # corte, e a linha original desempata.
+                kth_score = row_scores[np.argpartition(-row_scores, k - 1)[k - 1]]
+                selected = np.flatnonzero(row_scores >= kth_score)
+            else:
+                selected = np.arange(len(row_scores))
+            order = selected[np.lexsort((selected, -row_scores[selected]))][:k]
+            results.append([self._load_record(start + int(i)) for i in order])
+        return results
+
+    def _load_record(self, row: int) -> SemanticMemory:
+        """Desserializa uma memória a partir do seu deslocamento em `records.bin`."""
+        payload = json.loads(bytes(self._records[int(self._offsets[row]):int(self._offsets[row + 1])]).decode('utf-8'))
+        norm = float(self._norms[row])
+        embedding = self._embeddings[row].tolist() if norm else None
+        return SemanticMemory(embedding=embedding, **payload)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from eca.models import CognitiveWorkspace
+from eca.adapters.base import SessionProvider, VersionedSessionProvider
+
+
+class NearCacheSessionProvider(SessionProvider):
+    """Cache local (LRU) de workspaces decodificados na frente de um provedor remoto.
+
+    Turnos seguidos do mesmo usuário no mesmo processo reaproveitam o
+    workspace gravado no turno anterior, sem transferir nem decodificar o
+    workspace de novo. A coerência entre processos usa o carimbo de versão do
+    provedor interno: antes de devolver uma cópia local, apenas as versões
+    são consultadas (um único MGET de poucos bytes), e uma versão diferente
+    significa que outro processo gravou o workspace.
+
+    Com `revalidate_after > 0`, entradas validadas há menos desse tempo são
+    devolvidas sem nenhuma ida à rede, aceitando até `revalidate_after`
+    segundos de defasagem em relação a gravações de outros processos.
+
+    O workspace em cache é o mesmo objeto recebido em `save_workspace` e é
+    entregue (e retirado do cache) no próximo `get_workspace`, sem cópia.
+    Se o chamador o alterar depois de salvo (por atribuição ou no próprio
+    objeto, ex: `task_data["x"] = 1`), o rastreamento de alterações do
+    workspace o invalida.
+
+    Attributes:
+        inner (VersionedSessionProvider): O provedor remoto.
+        max_entries (int): Número máximo de workspaces em cache.
+        revalidate_after (float): Janela, em segundos, em que uma entrada é
+            usada sem consultar a versão remota.
+    """
+    def __init__(self, inner: VersionedSessionProvider, max_entries: int = 1024, revalidate_after: float = 0.0):
+        """Inicializa o cache.
+
+        Args:
+            inner (VersionedSessionProvider): O provedor a ser envolvido (ex:
+                um `RedisSessionProvider`).
+            max_entries (int, optional): Capacidade do LRU. Padrão 1024.
+            revalidate_after (float, optional): Janela sem revalidação, em
+                segundos. Padrão 0 (sempre consulta a versão).
+
+        Raises:
+            TypeError: Se `inner` não mantiver versões dos workspaces.
+        """
+        if not isinstance(inner, VersionedSessionProvider):
+            raise TypeError("O NearCacheSessionProvider requer um VersionedSessionProvider (ex: RedisSessionProvider).")
+        self.inner = inner
+        self.max_entries = max_entries
+        self.revalidate_after = revalidate_after
+        self._entries: "OrderedDict[str, Tuple[CognitiveWorkspace, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_workspace(self, user_id: str) -> Optional[CognitiveWorkspace]:
+        """Carrega a área de trabalho, do cache local quando ainda for a versão atual.
+
+        Args:
+            user_id (str): O ID do usuário.
+
+        Returns:
+            Optional[CognitiveWorkspace]: O workspace, ou `None`.
+        """
+        return self.get_workspaces([user_id])[0]
+
+    def get_workspaces(self, user_ids: List[str]) -> List[Optional[CognitiveWorkspace]]:
+        """Carrega vários workspaces, buscando no provedor apenas os ausentes ou desatualizados.
+
+        Args:
+            user_ids (List[str]): Os IDs dos usuários.
+
+        Returns:
+            List[Optional[CognitiveWorkspace]]: Os workspaces, na ordem de
+            `user_ids`.
+        """
+        now = time.monotonic()
+        results: List[Optional[CognitiveWorkspace]] = [None] * len(user_ids)
+        candidates: List[Tuple[int, CognitiveWorkspace, str]] = []
+        missing: List[int] = []
+        with self._lock:
+            for i, user_id in enumerate(user_ids):
+                entry = self._entries.pop(user_id, None)
+                if entry is None or entry[0].is_dirty():
+                    missing.append(i)
+                elif now - entry[2] < self.revalidate_after:
+                    results[i] = entry[0]
+                else:
+                    candidates.append((i, entry[0], entry[1]))
+
+        if candidates:
+            versions = self.inner.get_versions([user_ids[i] for i, _, _ in candidates])
+            for (i, workspace, version), current in zip(candidates, versions):
+                if current == version:
+                    results[i] = workspace
+                else:
+                    missing.append(i)
+
+        with self._lock:
+            self.hits += len(user_ids) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            missing.sort()
+            loaded = self.inner.get_workspaces_versioned([user_ids[i] for i in missing])
+            for i, (workspace, _) in zip(missing, loaded):
+                results[i] = workspace
+        return results
+
+    def save_workspace(self, workspace: CognitiveWorkspace):
+        """Salva no provedor remoto e guarda o workspace no cache local.
+
+        Args:
+            workspace (CognitiveWorkspace): O workspace a ser salvo.
+        """
+        self.save_workspaces([workspace])
+
+    def save_workspaces(self, workspaces: List[CognitiveWorkspace]):
+        """Salva vários workspaces e os guarda no cache local.
+
+        Args:
+            workspaces (List[CognitiveWorkspace]): Os workspaces a persistir.
+        """
+        try:
+            versions = self.inner.save_workspaces_versioned(workspaces)
+        except Exception:
+            with self._lock:
+                for workspace in workspaces:
+                    self._entries.pop(workspace.user_id, None)
+            raise
+        now = time.monotonic()
+        with self._lock:
+            for workspace, version in zip(workspaces, versions):
+                self._entries.pop(workspace.user_id, None)
+                if version is not None:
+                    self._entries[workspace.user_id] = (workspace, version, now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Descarta a entrada de um usuário, ou todo o cache.
+
+        Args:
+            user_id (Optional[str], optional): O usuário. Se omitido, limpa tudo.
+        """
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
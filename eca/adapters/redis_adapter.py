@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
-import json
-from dataclasses import asdict
-from typing import Optional
+import os
+from typing import Dict, List, Optional, Tuple
 
 try:
     import redis
@@ -11,11 +10,18 @@ except ImportError:
         "Por favor, instale a eca-lib com o suporte a Redis: pip install eca-lib[redis]"
     )
 
-from .base import SessionProvider
-from ..models import CognitiveWorkspace
+from .base import MemoryProvider, VersionedSessionProvider
+from ..codec import JSONWorkspaceCodec, WorkspaceCodec
+from ..memory import EpisodicMemory, SemanticMemory
+from ..models import CognitiveWorkspace, DomainState, LazyDomainDict
 
+# Campos do layout 'hash': o foco e um campo por domínio, com prefixo para
+# que um domínio chamado "current_focus" não colida com o foco.
+_FOCUS_FIELD = "current_focus"
+_DOMAIN_FIELD_PREFIX = "domain:"
 
-class RedisSessionProvider(SessionProvider):
+
+class RedisSessionProvider(VersionedSessionProvider):
     """
     Uma implementação de `SessionProvider` de alta performance para produção.
 
@@ -24,18 +30,54 @@ class RedisSessionProvider(SessionProvider):
     é ideal para aplicações escaláveis e sem estado (stateless), garantindo
     que o gerenciamento de sessão não se torne um gargalo de performance.
 
-    Cada workspace é serializado para JSON e armazenado em uma chave Redis
-    com um tempo de vida (TTL) configurável, permitindo que sessões inativas
-    expirem e liberem memória automaticamente.
+    Cada workspace é serializado por um `WorkspaceCodec` (JSON por padrão, ou
+    o formato binário compacto) e armazenado em uma chave Redis com um tempo
+    de vida (TTL) configurável, permitindo que sessões inativas expirem e
+    liberem memória automaticamente. A leitura reconhece qualquer um dos
+    formatos, então trocar de codec não invalida as sessões existentes.
+
+    Há dois layouts de chave:
+
+    - 'string' (padrão): o workspace inteiro em um único valor.
+    - 'hash': um hash por usuário, com o campo `current_focus` e um campo
+      por domínio. A leitura traz apenas o foco e a lista de domínios; cada
+      domínio é lido no primeiro acesso (normalmente só o domínio em foco).
+      A gravação envia, em uma única ida e volta, o foco, apenas os domínios
+      alterados e a renovação do TTL; se o hash tiver expirado desde a
+      leitura, o workspace é regravado por inteiro. Sessões gravadas no layout 'string'
+      continuam legíveis e são convertidas na próxima gravação.
+
+    `get_workspaces` e `save_workspaces` atendem vários usuários em uma única
+    ida e volta (MGET e pipelines). Para compartilhar conexões entre
+    provedores e processos em lote, passe um `connection_pool` ou um
+    `redis_client` já configurado.
+
+    Cada gravação que altera um workspace também grava um carimbo de versão
+    aleatório em `eca:session-version:<user_id>`, lido junto com o workspace
+    (`get_workspaces_versioned`) ou sozinho (`get_versions`), para que caches
+    locais validem suas cópias sem transferir o workspace.
 
     Attributes:
         redis_client (redis.Redis): A instância do cliente de conexão com o Redis.
+        codec (WorkspaceCodec): O codec usado para serializar os workspaces.
         key_prefix (str): Um namespace para as chaves de sessão, evitando
             colisões com outras aplicações no mesmo Redis.
         ttl_seconds (int): O tempo de vida (TTL) em segundos para as chaves
             de sessão. Um valor de 0 desativa a expiração.
+        layout (str): O layout das chaves, 'string' ou 'hash'.
     """
-    def __init__(self, host: str = 'localhost', port: int = 6379, password: Optional[str] = None, db: int = 0, ttl_seconds: int = 3600):
+    def __init__(
+        self,
+        host: str = 'localhost',
+        port: int = 6379,
+        password: Optional[str] = None,
+        db: int = 0,
+        ttl_seconds: int = 3600,
+        codec: Optional[WorkspaceCodec] = None,
+        layout: str = 'string',
+        connection_pool: Optional["redis.ConnectionPool"] = None,
+        redis_client: Optional["redis.Redis"] = None,
+    ):
         """
         Inicializa o provedor de sessão com os detalhes da conexão Redis.
 
@@ -46,19 +88,40 @@ class RedisSessionProvider(SessionProvider):
             db (int, optional): O número do banco de dados Redis. Padrão 0.
             ttl_seconds (int, optional): O tempo em segundos para a sessão
                 expirar. Padrão 1 hora (3600s). Use 0 para desativar.
+            codec (Optional[WorkspaceCodec], optional): O codec dos workspaces.
+                Padrão `JSONWorkspaceCodec`.
+            layout (str, optional): 'string' (um valor por workspace) ou
+                'hash' (um campo por domínio). Padrão 'string'.
+            connection_pool (Optional[redis.ConnectionPool], optional): Um pool
+                compartilhado com outros provedores (os parâmetros de conexão
+                acima são ignorados). O pool não deve usar `decode_responses`.
+            redis_client (Optional[redis.Redis], optional): Um cliente já
+                configurado, usado no lugar de criar um novo.
+
+        Raises:
+            ValueError: Se `layout` for inválido.
         """
-        # decode_responses=True garante que os valores lidos do Redis venham como strings
-        self.redis_client = redis.Redis(host=host, port=port, password=password, db=db, decode_responses=True)
+        if layout not in ('string', 'hash'):
+            raise ValueError(f"Layout de sessão desconhecido: '{layout}'")
+        # Os valores são lidos como bytes, pois o codec binário não é texto.
+        if redis_client is not None:
+            self.redis_client = redis_client
+        elif connection_pool is not None:
+            self.redis_client = redis.Redis(connection_pool=connection_pool)
+        else:
+            self.redis_client = redis.Redis(host=host, port=port, password=password, db=db)
         self.key_prefix = "eca:session:"
+        self.version_prefix = "eca:session-version:"
         self.ttl_seconds = ttl_seconds
+        self.codec = codec or JSONWorkspaceCodec()
+        self.layout = layout
 
     def get_workspace(self, user_id: str) -> Optional[CognitiveWorkspace]:
         """Carrega a área de trabalho de um usuário a partir do Redis.
 
-        O método busca a string JSON no Redis, a converte de volta para um
-        dicionário e então reconstrói o objeto `CognitiveWorkspace`. A
-        reidratação dos objetos aninhados (como `DomainState`) é feita
-        automaticamente pelo método `__post_init__` da classe `CognitiveWorkspace`.
+        O método busca o valor serializado no Redis e o decodifica com o
+        codec, que reconstrói diretamente o `CognitiveWorkspace` e seus
+        objetos aninhados (como `DomainState`).
 
         Args:
             user_id (str): O ID único do usuário.
@@ -67,38 +130,375 @@ class RedisSessionProvider(SessionProvider):
             Optional[CognitiveWorkspace]: O objeto `CognitiveWorkspace`
             reconstruído, ou `None` se a sessão não for encontrada.
         """
-        key = f"{self.key_prefix}{user_id}"
-        workspace_json = self.redis_client.get(key)
-        
-        if workspace_json:
-            workspace_data = json.loads(workspace_json)
-            return CognitiveWorkspace(**workspace_data)
-        
-        return None
+        return self.get_workspaces([user_id])[0]
+
+    def get_workspaces(self, user_ids: List[str]) -> List[Optional[CognitiveWorkspace]]:
+        """Carrega as áreas de trabalho de vários usuários em uma única ida e volta.
+
+        No layout 'string' é usado um MGET; no layout 'hash', um pipeline com
+        a leitura do foco e da lista de domínios de cada usuário.
+
+        Args:
+            user_ids (List[str]): Os IDs dos usuários.
+
+        Returns:
+            List[Optional[CognitiveWorkspace]]: Os workspaces encontrados (ou
+            `None`), na mesma ordem de `user_ids`.
+        """
+        return [workspace for workspace, _ in self.get_workspaces_versioned(user_ids)]
+
+    def get_workspaces_versioned(self, user_ids: List[str]) -> List[Tuple[Optional[CognitiveWorkspace], Optional[str]]]:
+        """Carrega vários workspaces e suas versões em uma única leitura atômica.
+
+        Args:
+            user_ids (List[str]): Os IDs dos usuários.
+
+        Returns:
+            List[Tuple[Optional[CognitiveWorkspace], Optional[str]]]: Pares
+            (workspace, versão), na ordem de `user_ids`.
+        """
+        if not user_ids:
+            return []
+        if self.layout == 'hash':
+            return self._get_hashes(user_ids)
+
+        keys = []
+        for user_id in user_ids:
+            keys.extend((self._key(user_id), self._version_key(user_id)))
+        values = self.redis_client.mget(keys)
+        results = []
+        for payload, version in zip(values[0::2], values[1::2]):
+            workspace = None
+            if payload:
+                workspace = self.codec.decode(payload)
+                workspace.mark_clean()
+            results.append((workspace, _decode_version(version)))
+        return results
+
+    def get_versions(self, user_ids: List[str]) -> List[Optional[str]]:
+        """Lê apenas as versões dos workspaces, com um único MGET.
+
+        Args:
+            user_ids (List[str]): Os IDs dos usuários.
+
+        Returns:
+            List[Optional[str]]: As versões (ou `None`), na ordem de `user_ids`.
+        """
+        if not user_ids:
+            return []
+        return [_decode_version(v) for v in self.redis_client.mget([self._version_key(u) for u in user_ids])]
     
     def save_workspace(self, workspace: CognitiveWorkspace):
         """Salva o estado da área de trabalho de um usuário no Redis.
 
-        Utiliza `dataclasses.asdict` para converter recursivamente o objeto
-        `CognitiveWorkspace` e todos os seus objetos aninhados em um
-        dicionário, que é então serializado para uma string JSON e salvo no Redis.
+        O workspace é serializado pelo codec, que percorre os campos
+        diretamente (sem a cópia recursiva de `dataclasses.asdict`), e salvo
+        no Redis. Se nada mudou desde a leitura, apenas o TTL é renovado.
 
         Args:
             workspace (CognitiveWorkspace): O objeto `CognitiveWorkspace` a ser salvo.
         """
-        key = f"{self.key_prefix}{workspace.user_id}"
-        
-        # Correção: Usamos asdict para garantir a conversão correta de
-        # dataclasses aninhados em um dicionário.
-        workspace_data = asdict(workspace)
-        
-        # A função `default=str` é um truque para lidar com tipos que o JSON
-        # não conhece, como objetos datetime, convertendo-os para string.
-        workspace_json = json.dumps(workspace_data, default=str)
-        
-        # Salva no Redis com o tempo de expiração (TTL) definido
-        self.redis_client.set(
-            key, 
-            workspace_json, 
-            ex=self.ttl_seconds if self.ttl_seconds > 0 else None
-        )
\ No newline at end of file
+        self.save_workspaces_versioned([workspace])
+
+    def save_workspaces(self, workspaces: List[CognitiveWorkspace]):
+        """Salva vários workspaces com um único pipeline (SET/EXPIRE ou HSET/EXPIRE).
+
+        Args:
+            workspaces (List[CognitiveWorkspace]): Os workspaces a persistir.
+        """
+        self.save_workspaces_versioned(workspaces)
+
+    def save_workspaces_versioned(self, workspaces: List[CognitiveWorkspace]) -> List[Optional[str]]:
+        """Salva vários workspaces e retorna a versão de cada um.
+
+        Workspaces alterados recebem uma nova versão; os inalterados apenas
+        têm o TTL renovado e mantêm a versão atual.
+
+        Args:
+            workspaces (List[CognitiveWorkspace]): Os workspaces a persistir.
+
+        Returns:
+            List[Optional[str]]: As versões, na ordem de `workspaces`.
+        """
+        if not workspaces:
+            return []
+        ttl = self.ttl_seconds if self.ttl_seconds > 0 else None
+        # MULTI/EXEC: o workspace e seu carimbo de versão são gravados juntos,
+        # sem que a gravação de outro processo se intercale entre eles (o que
+        # deixaria um cache local validando uma cópia antiga).
+        pipe = self.redis_client.pipeline(transaction=True)
+        versions: List[Optional[str]] = []
+        pending_reads: List[Tuple[int, Optional[int], int]] = []
+        partial_saves: List[Tuple[int, int]] = []
+        for index, workspace in enumerate(workspaces):
+            version_key = self._version_key(workspace.user_id)
+            if workspace.is_persisted() and not workspace.is_dirty():
+                expire_slot = None
+                if ttl:
+                    expire_slot = len(pipe)
+                    pipe.expire(self._key(workspace.user_id), ttl)
+                    pipe.expire(version_key, ttl)
+                pending_reads.append((index, expire_slot, len(pipe)))
+                pipe.get(version_key)
+                versions.append(None)
+            else:
+                version = os.urandom(8).hex()
+                exists_slot = self._queue_save(pipe, workspace)
+                if exists_slot is not None:
+                    partial_saves.append((index, exists_slot))
+                pipe.set(version_key, version, ex=ttl)
+                versions.append(version)
+        results = pipe.execute()
+
+        # EXPIRE (ou EXISTS, antes de uma gravação parcial) retorna 0 se a
+        # chave expirou desde a leitura: nesse caso o workspace é regravado
+        # por inteiro.
+        expired = [index for index, exists_slot in partial_saves if not results[exists_slot]]
+        for index, expire_slot, read_slot in pending_reads:
+            if expire_slot is not None and not results[expire_slot]:
+                expired.append(index)
+            else:
+                versions[index] = _decode_version(results[read_slot])
+        for workspace, version in zip(workspaces, versions):
+            if version is not None:
+                workspace.mark_clean()
+        if expired:
+            for index in expired:
+                workspaces[index].mark_dirty()
+            for index, version in zip(expired, self.save_workspaces_versioned([workspaces[i] for i in expired])):
+                versions[index] = version
+        return versions
+
+    def _key(self, user_id: str) -> str:
+        """Monta a chave de sessão de um usuário."""
+        return f"{self.key_prefix}{user_id}"
+
+    def _version_key(self, user_id: str) -> str:
+        """Monta a chave da versão do workspace de um usuário."""
+        return f"{self.version_prefix}{user_id}"
+
+    def _queue_save(self, pipe: "redis.client.Pipeline", workspace: CognitiveWorkspace) -> Optional[int]:
+        """Enfileira no pipeline os comandos que gravam um workspace alterado.
+
+        Returns:
+            Optional[int]: No layout 'hash', para uma gravação parcial, a
+            posição do EXISTS que indica se o hash ainda existia. Se não
+            existia (ex: expirou desde a leitura), o workspace precisa ser
+            regravado por inteiro.
+        """
+        key = self._key(workspace.user_id)
+        ttl = self.ttl_seconds if self.ttl_seconds > 0 else None
+        if self.layout == 'string':
+            # Tipos que o JSON não conhece, como datetime, são gravados como texto.
+            pipe.set(key, self.codec.encode(workspace), ex=ttl)
+            return None
+
+        exists_slot = None
+        if workspace.is_persisted():
+            exists_slot = len(pipe)
+            pipe.exists(key)
+        else:
+            pipe.delete(key)
+        # O foco vai sempre junto: é pequeno e garante que um hash recriado
+        # por uma gravação parcial não volte com o foco 'default'.
+        mapping = {_FOCUS_FIELD: workspace.current_focus}
+        mapping.update(
+            (_DOMAIN_FIELD_PREFIX + domain_id, self.codec.encode_domain(domain_id, workspace.active_domains[domain_id]))
+            for domain_id in workspace.dirty_domains()
+        )
+        removed = workspace.removed_domains()
+        if removed:
+            pipe.hdel(key, *[_DOMAIN_FIELD_PREFIX + domain_id for domain_id in removed])
+        pipe.hset(key, mapping=mapping)
+        if ttl:
+            pipe.expire(key, ttl)
+        return exists_slot
+
+    def _get_hashes(self, user_ids: List[str]) -> List[Tuple[Optional[CognitiveWorkspace], Optional[str]]]:
+        """Lê o foco, a lista de domínios e a versão de sessões no layout 'hash'."""
+        keys = [self._key(user_id) for user_id in user_ids]
+        pipe = self.redis_client.pipeline()
+        for user_id, key in zip(user_ids, keys):
+            pipe.type(key)
+            pipe.hget(key, _FOCUS_FIELD)
+            pipe.hkeys(key)
+            pipe.get(self._version_key(user_id))
+        results = pipe.execute(raise_on_error=False)
+
+        workspaces: List[Tuple[Optional[CognitiveWorkspace], Optional[str]]] = []
+        prefix = _DOMAIN_FIELD_PREFIX.encode('utf-8')
+        for i, (key, user_id) in enumerate(zip(keys, user_ids)):
+            key_type, focus, fields, version = results[4 * i:4 * i + 4]
+            if key_type == b'none':
+                workspaces.append((None, None))
+            elif key_type == b'string':
+                # Sessão do layout 'string': como não está marcada como
+                # persistida, a próxima gravação a converte por inteiro.
+                payload = self.redis_client.get(key)
+                workspaces.append((self.codec.decode(payload) if payload else None, None))
+            else:
+                domain_ids = [field[len(prefix):].decode('utf-8') for field in fields if field.startswith(prefix)]
+                workspace = CognitiveWorkspace(user_id=user_id, current_focus=focus.decode('utf-8') if focus else "default")
+                workspace.active_domains = LazyDomainDict(domain_ids, lambda ids, key=key: self._load_domains(key, ids))
+                workspace.mark_clean()
+                workspaces.append((workspace, _decode_version(version)))
+        return workspaces
+
+    def _load_domains(self, key: str, domain_ids: List[str]) -> Dict[str, DomainState]:
+        """Lê os domínios pedidos de um hash de sessão com um único HMGET."""
+        payloads = self.redis_client.hmget(key, [_DOMAIN_FIELD_PREFIX + domain_id for domain_id in domain_ids])
+        domains = {}
+        for payload in payloads:
+            if payload:
+                domain_id, state = self.codec.decode_domain(payload)
+                domains[domain_id] = state
+        return domains
+
+
+class RedisMemoryProvider(MemoryProvider):
+    """Memória episódica em Redis Streams, um stream limitado por usuário e domínio.
+
+    Cada `(user_id, domain_id)` tem seu próprio stream em
+    `eca:episodes:<user_id>:<domain_id>`, com ':' e '%' escapados nos IDs
+    (ex: `a%3Ab`), para que pares distintos nunca compartilhem um stream.
+    `log_interaction` é um único XADD
+    com corte por MAXLEN (aproximado, o que mantém o custo constante), e
+    `fetch_episodic_memories` é um único XREVRANGE das `last_n` entradas
+    mais recentes, sem ler nem reescrever o histórico inteiro.
+
+    A memória semântica é delegada a outro `MemoryProvider` (ex: um
+    `JSONMemoryProvider` ou `MMapMemoryProvider`), se fornecido.
+
+    Attributes:
+        redis_client (redis.Redis): A instância do cliente de conexão com o Redis.
+        semantic_provider (Optional[MemoryProvider]): O provedor da memória
+            semântica.
+        key_prefix (str): O namespace das chaves dos streams.
+        max_episodes (int): Quantidade de episódios mantidos por stream
+            (aproximada, com `approximate_trim`).
+        ttl_seconds (int): Tempo de vida de um stream sem novas interações.
+            Um valor de 0 desativa a expiração.
+    """
+    def __init__(
+        self,
+        host: str = 'localhost',
+        port: int = 6379,
+        password: Optional[str] = None,
+        db: int = 0,
+        semantic_provider: Optional[MemoryProvider] = None,
+        max_episodes: int = 1000,
+        ttl_seconds: int = 0,
+        approximate_trim: bool = True,
+        connection_pool: Optional["redis.ConnectionPool"] = None,
+        redis_client: Optional["redis.Redis"] = None,
+    ):
+        """Inicializa o provedor com os detalhes da conexão Redis.
+
+        Args:
+            host (str, optional): O host do servidor Redis. Padrão 'localhost'.
+            port (int, optional): A porta do servidor Redis. Padrão 6379.
+            password (Optional[str], optional): A senha para o servidor Redis. Padrão None.
+            db (int, optional): O número do banco de dados Redis. Padrão 0.
+            semantic_provider (Optional[MemoryProvider], optional): O provedor
+                usado para a memória semântica. Sem ele, as buscas semânticas
+                retornam listas vazias.
+            max_episodes (int, optional): Limite de episódios por stream.
+                Padrão 1000.
+            ttl_seconds (int, optional): Expiração dos streams inativos, em
+                segundos. Padrão 0 (sem expiração).
+            approximate_trim (bool, optional): Usa `MAXLEN ~`, que corta o
+                stream em blocos inteiros e mantém o XADD O(1); o stream pode
+                passar um pouco de `max_episodes`. Padrão True.
+            connection_pool (Optional[redis.ConnectionPool], optional): Um
+                pool compartilhado (ex: com o `RedisSessionProvider`).
+            redis_client (Optional[redis.Redis], optional): Um cliente já
+                configurado, usado no lugar de criar um novo.
+        """
+        if redis_client is not None:
+            self.redis_client = redis_client
+        elif connection_pool is not None:
+            self.redis_client = redis.Redis(connection_pool=connection_pool)
+        else:
+            self.redis_client = redis.Redis(host=host, port=port, password=password, db=db)
+        self.semantic_provider = semantic_provider
+        self.key_prefix = "eca:episodes:"
+        self.max_episodes = max_episodes
+        self.ttl_seconds = ttl_seconds
+        self.approximate_trim = approximate_trim
+
+    def fetch_semantic_memories(self, user_input: str, domain_id: str, top_k: int = 3, query_embedding: Optional[List[float]] = None) -> List[SemanticMemory]:
+        """Delega a busca semântica ao `semantic_provider`."""
+        if self.semantic_provider is None:
+            return []
+        if query_embedding is None:
+            return self.semantic_provider.fetch_semantic_memories(user_input, domain_id, top_k)
+        return self.semantic_provider.fetch_semantic_memories(user_input, domain_id, top_k, query_embedding=query_embedding)
+
+    def fetch_semantic_memories_batch(self, user_inputs: List[str], domain_id: str, top_k: int = 3, query_embeddings: Optional[List[List[float]]] = None) -> List[List[SemanticMemory]]:
+        """Delega a busca semântica em lote ao `semantic_provider`."""
+        if self.semantic_provider is None:
+            return [[] for _ in user_inputs]
+        if query_embeddings is None:
+            return self.semantic_provider.fetch_semantic_memories_batch(user_inputs, domain_id, top_k)
+        return self.semantic_provider.fetch_semantic_memories_batch(user_inputs, domain_id, top_k, query_embeddings=query_embeddings)
+
+    def fetch_episodic_memories(self, user_id: str, domain_id: str, last_n: int = 5) -> List[EpisodicMemory]:
+        """Lê as `last_n` interações mais recentes com um único XREVRANGE.
+
+        Args:
+            user_id (str): O ID do usuário.
+            domain_id (str): O ID do domínio.
+            last_n (int, optional): O número de interações. Padrão 5.
+
+        Returns:
+            List[EpisodicMemory]: As interações, da mais antiga para a mais
+            recente.
+        """
+        if last_n <= 0:
+            return []
+        entries = self.redis_client.xrevrange(self._stream_key(user_id, domain_id), count=last_n)
+        return [
+            EpisodicMemory(
+                user_id=user_id,
+                domain_id=domain_id,
+                user_input=fields.get(b'user_input', b'').decode('utf-8'),
+                assistant_output=fields.get(b'assistant_output', b'').decode('utf-8'),
+                timestamp=fields.get(b'timestamp', b'').decode('utf-8'),
+            )
+            for _, fields in reversed(entries)
+        ]
+
+    def log_interaction(self, interaction: EpisodicMemory):
+        """Acrescenta a interação ao stream com um XADD limitado por MAXLEN.
+
+        Args:
+            interaction (EpisodicMemory): A interação a ser registrada.
+        """
+        key = self._stream_key(interaction.user_id, interaction.domain_id)
+        fields = {
+            'user_input': interaction.user_input,
+            'assistant_output': interaction.assistant_output,
+            # Tipos como datetime são gravados como texto, como no JSON.
+            'timestamp': str(interaction.timestamp),
+        }
+        if self.ttl_seconds <= 0:
+            self.redis_client.xadd(key, fields, maxlen=self.max_episodes, approximate=self.approximate_trim)
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.xadd(key, fields, maxlen=self.max_episodes, approximate=self.approximate_trim)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+    def _stream_key(self, user_id: str, domain_id: str) -> str:
+        """Monta a chave do stream de um usuário em um domínio."""
+        return f"{self.key_prefix}{_escape_key_part(user_id)}:{_escape_key_part(domain_id)}"
+
+
+def _escape_key_part(value: str) -> str:
+    """Escapa ':' (e '%') para que partes distintas nunca formem a mesma chave."""
+    return value.replace('%', '%25').replace(':', '%3A')
+
+
+def _decode_version(value: Optional[bytes]) -> Optional[str]:
+    """Converte a versão lida do Redis em texto."""
+    return value.decode('utf-8') if value is not None else None
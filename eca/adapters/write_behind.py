@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+import copy
+import threading
+import time
+from typing import Dict, List, Optional
+
+from eca.models import CognitiveWorkspace
+from eca.adapters.base import SessionProvider
+
+
+class WriteBehindSessionProvider(SessionProvider):
+    """Envolve um `SessionProvider` com persistência assíncrona (write-behind).
+
+    `save_workspace` apenas registra uma cópia do workspace em memória e
+    retorna imediatamente, tirando a gravação do caminho crítico do turno.
+    Uma thread em segundo plano persiste os workspaces pendentes em lotes,
+    via `save_workspaces` do provedor interno, quando `flush_interval`
+    segundos se passam ou quando `max_batch_size` usuários acumulam. Salvas
+    repetidas do mesmo usuário entre duas gravações são aglutinadas em uma.
+
+    As leituras veem as próprias escritas: `get_workspace` devolve a versão
+    pendente, se houver, antes de consultar o provedor interno.
+
+    A exposição a perda de dados (ex: queda do processo) fica limitada aos
+    workspaces salvos nos últimos `flush_interval` segundos, e nunca passa de
+    `max_pending` usuários: ao atingir esse limite, `save_workspace` bloqueia
+    até a próxima gravação. Chame `close()` no encerramento da aplicação.
+
+    Se o provedor interno falhar, os workspaces voltam à fila e a thread
+    espera antes de tentar de novo, dobrando a espera a cada falha seguida
+    (a partir de `flush_interval`, até `max_retry_delay` segundos).
+
+    Attributes:
+        inner (SessionProvider): O provedor que de fato persiste as sessões.
+        flush_interval (float): Intervalo máximo, em segundos, entre gravações.
+        max_batch_size (int): Número de usuários pendentes que dispara uma
+            gravação antecipada.
+        max_pending (int): Número máximo de usuários pendentes.
+        max_retry_delay (float): Espera máxima, em segundos, entre tentativas
+            após falhas do provedor interno.
+    """
+    def __init__(
+        self,
+        inner: SessionProvider,
+        flush_interval: float = 1.0,
+        max_batch_size: int = 64,
+        max_pending: int = 1024,
+        max_retry_delay: float = 30.0,
+    ):
+        """Inicializa o wrapper e inicia a thread de gravação.
+
+        Args:
+            inner (SessionProvider): O provedor a ser envolvido.
+            flush_interval (float, optional): Intervalo entre gravações, em
+                segundos. Padrão 1.0.
+            max_batch_size (int, optional): Tamanho de lote que dispara uma
+                gravação antes do intervalo. Padrão 64.
+            max_pending (int, optional): Limite de workspaces pendentes antes
+                de `save_workspace` bloquear. Padrão 1024.
+            max_retry_delay (float, optional): Teto da espera entre tentativas
+                após falhas. Padrão 30.0.
+        """
+        self.inner = inner
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_pending = max(max_pending, max_batch_size)
+        self.max_retry_delay = max_retry_delay
+        self._pending: Dict[str, CognitiveWorkspace] = {}
+        self._in_flight: Dict[str, CognitiveWorkspace] = {}
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def get_workspace(self, user_id: str) -> Optional[CognitiveWorkspace]:
+        """Carrega a área de trabalho, priorizando a versão ainda não persistida.
+
+        Args:
+            user_id (str): O ID do usuário.
+
+        Returns:
+            Optional[CognitiveWorkspace]: O workspace, ou `None`.
+        """
+        with self._condition:
+            workspace = self._pending.get(user_id) or self._in_flight.get(user_id)
+            if workspace is not None:
+                return copy.deepcopy(workspace)
+        return self.inner.get_workspace(user_id)
+
+    def get_workspaces(self, user_ids: List[str]) -> List[Optional[CognitiveWorkspace]]:
+        """Carrega vários workspaces, buscando no provedor interno apenas os não pendentes.
+
+        Args:
+            user_ids (List[str]): Os IDs dos usuários.
+
+        Returns:
+            List[Optional[CognitiveWorkspace]]: Os workspaces, na ordem de
+            `user_ids`.
+        """
+        results: List[Optional[CognitiveWorkspace]] = [None] * len(user_ids)
+        missing: List[int] = []
+        with self._condition:
+            for i, user_id in enumerate(user_ids):
+                workspace = self._pending.get(user_id) or self._in_flight.get(user_id)
+                if workspace is not None:
+                    results[i] = copy.deepcopy(workspace)
+                else:
+                    missing.append(i)
+        if missing:
+            loaded = self.inner.get_workspaces([user_ids[i] for i in missing])
+            for i, workspace in zip(missing, loaded):
+                results[i] = workspace
+        return results
+
+    def save_workspace(self, workspace: CognitiveWorkspace):
+        """Agenda a gravação de uma cópia do workspace e retorna imediatamente.
+
+        Args:
+            workspace (CognitiveWorkspace): O workspace a ser salvo.
+
+        Raises:
+            RuntimeError: Se o provedor já tiver sido fechado.
+        """
+        self.save_workspaces([workspace])
+
+    def save_workspaces(self, workspaces: List[CognitiveWorkspace]):
+        """Agenda a gravação de vários workspaces.
+
+        Args:
+            workspaces (List[CognitiveWorkspace]): Os workspaces a serem salvos.
+
+        Raises:
+            RuntimeError: Se o provedor já tiver sido fechado.
+        """
+        # A cópia isola o snapshot de alterações feitas pelo chamador depois
+        # do retorno, enquanto a gravação ainda não aconteceu.
+        snapshots = [copy.deepcopy(workspace) for workspace in workspaces]
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("O WriteBehindSessionProvider já foi fechado.")
+            for snapshot in snapshots:
+                while snapshot.user_id not in self._pending and len(self._pending) >= self.max_pending:
+                    self._condition.notify_all()
+                    self._condition.wait()
+                previous = self._pending.pop(snapshot.user_id, None)
+                if previous is not None:
+                    # O snapshot substituído nunca foi gravado: suas alterações
+                    # precisam ir junto com as do novo.
+                    if previous.is_focus_dirty() or previous.removed_domains():
+                        snapshot.mark_dirty()
+                    else:
+                        snapshot.mark_dirty(previous.dirty_domains())
+                self._pending[snapshot.user_id] = snapshot
+            if len(self._pending) >= self.max_batch_size:
+                self._condition.notify_all()
+
+    def flush(self):
+        """Persiste imediatamente todos os workspaces pendentes.
+
+        Raises:
+            Exception: Repassa o erro do provedor interno; os workspaces que
+                falharam continuam pendentes.
+        """
+        while self._write_batch():
+            pass
+
+    def close(self):
+        """Interrompe a thread de gravação após persistir tudo o que está pendente."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        """Laço da thread de gravação: espera o gatilho de tempo ou de tamanho."""
+        failures = 0
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closed and len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+            try:
+                self._write_batch()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(max(self.flush_interval, 0.1) * 2 ** (failures - 1), self.max_retry_delay)
+                print(f"Aviso: Falha ao persistir sessões em segundo plano: {e}. Nova tentativa em {delay:.1f}s.")
+                # Sem a espera, um lote cheio que falha seria regravado em
+                # laço, sem pausa; apenas `close()` interrompe a espera.
+                with self._condition:
+                    self._condition.wait_for(lambda: self._closed, delay)
+
+    def _write_batch(self) -> bool:
+        """Grava os workspaces pendentes em uma única chamada ao provedor interno.
+
+        Returns:
+            bool: `True` se havia algo a gravar.
+        """
+        with self._write_lock:
+            with self._condition:
+                if not self._pending:
+                    return False
+                self._in_flight, self._pending = self._pending, {}
+                batch = list(self._in_flight.values())
+            try:
+                self.inner.save_workspaces(batch)
+            except Exception:
+                with self._condition:
+                    # Devolve à fila apenas o que não foi salvo de novo nesse meio-tempo.
+                    for user_id, workspace in self._in_flight.items():
+                        self._pending.setdefault(user_id, workspace)
+                    self._in_flight = {}
+                    self._condition.notify_all()
+                raise
+            with self._condition:
+                self._in_flight = {}
+                self._condition.notify_all()
+            return True
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import functools
+import inspect
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .adapters.base import (
+    PersonaProvider, MemoryProvider, SessionProvider, Tool, DataFormatter
+)
+from .adapters.async_base import (
+    AsyncPersonaProvider, AsyncMemoryProvider, AsyncSessionProvider, AsyncTool
+)
+from .attention import AttentionMechanism
+from .models import CognitiveWorkspace, Persona
+from .embeddings import EmbeddingFunction
+from .orchestrator import ECAOrchestrator, EPISODIC_CONTEXT_LIMIT, SEMANTIC_CONTEXT_LIMIT, _supported_kwargs
+
+
+class AsyncECAOrchestrator(ECAOrchestrator):
+    """
+    Versão assíncrona do `ECAOrchestrator`, que sobrepõe etapas independentes.
+
+    O fluxo síncrono executa carga de sessão, detecção de domínio, buscas de
+    memória, ranqueamento e ferramentas estritamente em sequência, de modo que
+    a latência de um turno é a soma de todas as idas e voltas de rede. Este
+    orquestrador agrupa as etapas que não dependem umas das outras:
+
+    1. Carga da sessão, detecção de domínio e execução das ferramentas.
+    2. Busca das memórias semântica e episódica e carga da persona (todas
+       dependem apenas do domínio detectado).
+    3. Ranqueamento semântico e episódico.
+
+    Os provedores podem implementar tanto as interfaces assíncronas de
+    `eca.adapters.async_base` quanto as síncronas de `eca.adapters.base`.
+    Métodos síncronos são executados no `executor` informado (ou no executor
+    padrão do event loop), sem bloquear o loop.
+
+    Attributes:
+        executor (Optional[Executor]): Executor usado para as chamadas
+            síncronas. `None` usa o executor padrão do event loop.
+    """
+
+    def __init__(
+        self,
+        persona_provider: Union[PersonaProvider, AsyncPersonaProvider],
+        memory_provider: Union[MemoryProvider, AsyncMemoryProvider],
+        session_provider: Union[SessionProvider, AsyncSessionProvider],
+        prompt_language: str = "pt_br",
+        meta_prompt_path_override: Optional[str] = None,
+        semantic_attention: Optional[AttentionMechanism] = None,
+        episodic_attention: Optional[AttentionMechanism] = None,
+        tools: Optional[List[Union[Tool, AsyncTool]]] = None,
+        data_formatters: Optional[Dict[str, DataFormatter]] = None,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        default_tool_timeout: Optional[float] = None,
+        max_tool_workers: Optional[int] = None,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """Inicializa o Orquestrador assíncrono com todas as suas dependências."""
+        super().__init__(
+            persona_provider=persona_provider,
+            memory_provider=memory_provider,
+            session_provider=session_provider,
+            prompt_language=prompt_language,
+            meta_prompt_path_override=meta_prompt_path_override,
+            semantic_attention=semantic_attention,
+            episodic_attention=episodic_attention,
+            tools=tools,
+            data_formatters=data_formatters,
+            tool_timeouts=tool_timeouts,
+            default_tool_timeout=default_tool_timeout,
+            max_tool_workers=max_tool_workers,
+            embedding_function=embedding_function,
+        )
+        self.executor = executor
+
+    async def generate_context_object_async(
+        self,
+        user_id: str,
+        user_input: str,
+        attachment: Optional[Any] = None,
+        tool_execution_mode: str = 'first_match'
+    ) -> CognitiveWorkspace:
+        """Processa uma entrada e retorna o objeto `CognitiveWorkspace` completo."""
+        workspace, _ = await self._build_context_async(user_id, user_input, attachment, tool_execution_mode)
+        return workspace
+
+    async def generate_final_prompt_async(
+        self,
+        user_id: str,
+        user_input: str,
+        attachment: Optional[Any] = None,
+        tool_execution_mode: str = 'first_match'
+    ) -> str:
+        """Orquestra o fluxo completo de forma assíncrona e retorna o prompt final."""
+        workspace, persona = await self._build_context_async(user_id, user_input, attachment, tool_execution_mode)
+        return self._render_prompt(persona, workspace, user_input)
+
+    async def _build_context_async(
+        self,
+        user_id: str,
+        user_input: str,
+        attachment: Optional[Any],
+        tool_execution_mode: str
+    ) -> Tuple[CognitiveWorkspace, Optional[Persona]]:
+        """Executa o pipeline do turno e retorna o workspace e a persona em foco."""
+        # Etapa 1: sessão, domínio e ferramentas não dependem uns dos outros.
+        workspace, (detected_domain, query_embedding), task_data = await asyncio.gather(
+            self._call(self.session_provider.get_workspace, user_id),
+            self._detect_domain_async(user_input),
+            self._run_tool_async(user_input, attachment, mode=tool_execution_mode),
+        )
+        if not workspace:
+            workspace = CognitiveWorkspace(user_id=user_id)
+        workspace = self.workspace_manager.switch_focus(workspace, detected_domain)
+
+        active_domain_state = workspace.active_domains[detected_domain]
+        active_domain_state.active_task = f"Analisando a solicitação '{user_input[:50]}...' para o domínio '{detected_domain}'."
+
+        # Etapa 2: memórias e persona dependem apenas do domínio detectado.
+        all_semantic_memories, all_episodic_memories, persona = await asyncio.gather(
+            self._call(
+                self.memory_provider.fetch_semantic_memories, user_input, domain_id=detected_domain,
+                **_supported_kwargs(self.memory_provider.fetch_semantic_memories, query_embedding=query_embedding)
+            ),
+            self._call(self.memory_provider.fetch_episodic_memories, user_id, domain_id=detected_domain),
+            self._call(self.persona_provider.get_persona_by_id, detected_domain),
+        )
+
+        # Etapa 3: os dois ranqueamentos são independentes entre si.
+        ranked_semantic, ranked_episodic = await asyncio.gather(
+            self._call(
+                self.semantic_attention.rank, user_input, all_semantic_memories,
+                **_supported_kwargs(self.semantic_attention.rank, query_embedding=query_embedding, top_k=SEMANTIC_CONTEXT_LIMIT)
+            ),
+            self._call(
+                self.episodic_attention.rank, user_input, all_episodic_memories,
+                **_supported_kwargs(self.episodic_attention.rank, query_embedding=query_embedding, top_k=EPISODIC_CONTEXT_LIMIT)
+            ),
+        )
+
+        active_domain_state.semantic_memories = ranked_semantic[:SEMANTIC_CONTEXT_LIMIT]
+        active_domain_state.episodic_memories = ranked_episodic[:EPISODIC_CONTEXT_LIMIT]
+        active_domain_state.task_data = task_data
+
+        await self._call(self.session_provider.save_workspace, workspace)
+        return workspace, persona
+
+    async def _detect_domain_async(self, user_input: str) -> Tuple[str, Optional[List[float]]]:
+        """Calcula o embedding da entrada (se configurado) e detecta o domínio."""
+        query_embedding = None
+        if self.embedding_function:
+            query_embedding = await self._call(self.embedding_function, user_input)
+        detected_domain = await self._call(
+            self.persona_provider.detect_domain, user_input,
+            **_supported_kwargs(self.persona_provider.detect_domain, query_embedding=query_embedding)
+        )
+        return detected_domain, query_embedding
+
+    async def _run_tool_async(self, user_input: str, attachment: Optional[Any] = None, mode: str = 'first_match') -> Optional[Any]:
+        """Versão assíncrona de `_run_tool`.
+
+        Aceita os mesmos modos da versão síncrona. Em 'all_matches' as
+        ferramentas já rodam concorrentemente; 'parallel' e 'first_completed'
+        aplicam, além disso, o tempo limite de cada ferramenta.
+        """
+        if mode == 'first_match':
+            for tool in self.tools:
+                if tool.can_handle(user_input, attachment):
+                    return await self._call(tool.load, user_input, attachment)
+            return None
+
+        elif mode == 'all_matches':
+            capable_tools = [tool for tool in self.tools if tool.can_handle(user_input, attachment)]
+            results = await asyncio.gather(
+                *(self._call(tool.load, user_input, attachment) for tool in capable_tools)
+            )
+            executed_results = [
+                {"source_tool": getattr(tool, 'name', tool.__class__.__name__), "data": result}
+                for tool, result in zip(capable_tools, results) if result
+            ]
+            return executed_results if executed_results else None
+
+        elif mode == 'parallel':
+            capable_tools = [tool for tool in self.tools if tool.can_handle(user_input, attachment)]
+            results = await asyncio.gather(
+                *(self._load_tool_with_timeout(tool, user_input, attachment) for tool in capable_tools)
+            )
+            executed_results = [
+                {"source_tool": getattr(tool, 'name', tool.__class__.__name__), "data": result}
+                for tool, result in zip(capable_tools, results) if result
+            ]
+            return executed_results if executed_results else None
+
+        elif mode == 'first_completed':
+            pending = {
+                asyncio.ensure_future(self._load_tool_with_timeout(tool, user_input, attachment))
+                for tool in self.tools if tool.can_handle(user_input, attachment)
+            }
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result:
+                        for other in pending:
+                            other.cancel()
+                        return result
+            return None
+
+        raise ValueError(f"Modo de execução de ferramenta desconhecido: '{mode}'")
+
+    async def _load_tool_with_timeout(self, tool: Union[Tool, AsyncTool], user_input: str, attachment: Optional[Any]) -> Optional[Dict[str, Any]]:
+        """Executa uma ferramenta respeitando seu prazo; falhas e estouros retornam `None`."""
+        tool_name = getattr(tool, 'name', tool.__class__.__name__)
+        timeout = self._tool_timeout(tool_name)
+        try:
+            return await asyncio.wait_for(self._call(tool.load, user_input, attachment), timeout)
+        except asyncio.TimeoutError:
+            print(f"Aviso: A ferramenta '{tool_name}' excedeu o tempo limite de {timeout}s e foi ignorada.")
+        except Exception as e:
+            print(f"Aviso: Erro ao executar a ferramenta '{tool_name}': {e}")
+        return None
+
+    async def _call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Aguarda `func` se for uma corrotina, ou a executa no executor se for síncrona."""
+        if inspect.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
@@ -2,4 +2,5 @@
 """Expõe as classes principais do módulo de atenção."""
 from .base import AttentionMechanism, PassthroughAttention
 from .semantic_attention import SimpleSemanticAttention
+from .lexical_attention import BM25Attention
 from .vector_attention import VectorizedSemanticAttention
\ No newline at end of file
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from abc import ABC, abstractmethod
-from typing import Any, List, TypeVar
+from typing import Any, List, Optional, TypeVar
 
 MemoryType = TypeVar('MemoryType')
 
@@ -17,7 +17,7 @@ class AttentionMechanism(ABC):
     palavras-chave a complexas buscas por similaridade de vetores.
     """
     @abstractmethod
-    def rank(self, user_input: str, memories: List[MemoryType]) -> List[MemoryType]:
+    def rank(self, user_input: str, memories: List[MemoryType], query_embedding: Optional[List[float]] = None, top_k: Optional[int] = None) -> List[MemoryType]:
         """Reordena uma lista de memórias com base na relevância para a entrada.
 
         Args:
@@ -25,6 +25,13 @@ class AttentionMechanism(ABC):
                 contexto para o ranqueamento.
             memories (List[MemoryType]): A lista de objetos de memória
                 (ex: `SemanticMemory`, `EpisodicMemory`) a ser ordenada.
+            query_embedding (Optional[List[float]], optional): O embedding de
+                `user_input`, quando já calculado pelo orquestrador. Mecanismos
+                vetoriais devem usá-lo em vez de vetorizar a entrada de novo.
+            top_k (Optional[int], optional): Se informado, apenas os `top_k`
+                itens mais relevantes são retornados. Implementações devem
+                aproveitá-lo para fazer uma seleção parcial (ex: com um heap)
+                em vez de ordenar todas as memórias.
 
         Returns:
             List[MemoryType]: A mesma lista de memórias, mas reordenada com
@@ -43,7 +50,7 @@ class PassthroughAttention(AttentionMechanism):
     É útil como um comportamento padrão no Orquestrador quando nenhum
     mecanismo de atenção específico é necessário, ou para fins de teste.
     """
-    def rank(self, user_input: str, memories: List[Any]) -> List[Any]:
+    def rank(self, user_input: str, memories: List[Any], query_embedding: Optional[List[float]] = None, top_k: Optional[int] = None) -> List[Any]:
         """Retorna a lista de memórias na mesma ordem em que foi recebida.
 
         Este método ignora a entrada do usuário e simplesmente repassa a lista
@@ -53,8 +60,11 @@ class PassthroughAttention(AttentionMechanism):
             user_input (str): A entrada do usuário (ignorada por esta
                 implementação).
             memories (List[Any]): A lista de memórias a ser retornada.
+            query_embedding (Optional[List[float]], optional): Ignorado.
+            top_k (Optional[int], optional): Se informado, a lista é truncada
+                nos primeiros `top_k` itens.
 
         Returns:
             List[Any]: A lista de memórias original, sem alterações.
         """
-        return memories
\ No newline at end of file
+        return memories if top_k is None else memories[:top_k]
\ No newline at end of file
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .base import AttentionMechanism
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Quebra um texto em termos normalizados para a busca lexical.
+
+    O texto é convertido para minúsculas e tem os acentos removidos, de modo
+    que "Cálculo" e "calculo" resultem no mesmo termo.
+
+    Args:
+        text (str): O texto a ser tokenizado.
+
+    Returns:
+        List[str]: A lista de termos, na ordem em que aparecem.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _TOKEN_PATTERN.findall(stripped)
+
+
+class _PartitionIndex:
+    """Índice invertido de um domínio (ou de um par usuário/domínio).
+
+    Os documentos ficam em ordem de uso (LRU), para que o índice possa ser
+    limitado descartando os menos usados.
+    """
+    def __init__(self):
+        self.documents: "OrderedDict[Hashable, Tuple[Any, int, Counter]]" = OrderedDict()
+        self.postings: Dict[str, Dict[Hashable, int]] = {}
+        self.total_length = 0
+
+    def index(self, key: Hashable, source: Any):
+        """Adiciona um documento, a menos que já esteja atualizado."""
+        existing = self.documents.get(key)
+        if existing is not None:
+            # A comparação de tuplas verifica identidade antes de igualdade,
+            # então memórias inalteradas são reconhecidas sem remontar textos.
+            if existing[0] is source or existing[0] == source:
+                self.documents.move_to_end(key)
+                return
+            self.unindex(key)
+
+        text = source if isinstance(source, str) else f"{source[0]} {source[1]}"
+        term_frequencies = Counter(tokenize(text))
+        length = sum(term_frequencies.values())
+        self.documents[key] = (source, length, term_frequencies)
+        self.total_length += length
+        for term, frequency in term_frequencies.items():
+            self.postings.setdefault(term, {})[key] = frequency
+
+    def unindex(self, key: Hashable):
+        """Remove um documento e suas postings."""
+        existing = self.documents.pop(key, None)
+        if existing is None:
+            return
+        _, length, term_frequencies = existing
+        self.total_length -= length
+        for term in term_frequencies:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+
+    def trim(self, max_documents: int):
+        """Descarta os documentos menos usados além de `max_documents`."""
+        while len(self.documents) > max_documents:
+            self.unindex(next(iter(self.documents)))
+
+
+class BM25Attention(AttentionMechanism):
+    """Um mecanismo de atenção lexical baseado em BM25 e índice invertido.
+
+    Alternativa ao `SimpleSemanticAttention` para domínios com muitas memórias
+    ou textos longos. Em vez de comparar a entrada com cada memória caractere
+    a caractere (custo quadrático no tamanho dos textos), as memórias são
+    tokenizadas uma única vez e guardadas em um índice invertido. No
+    ranqueamento, apenas as listas de postings dos termos presentes na
+    entrada são percorridas.
+
+    Há um índice por domínio (e, para memórias episódicas, por par
+    usuário/domínio), construído de forma incremental: memórias ainda não
+    vistas (ou cujo texto mudou) são indexadas na primeira chamada de `rank`
+    em que aparecem, e `add_memories` permite pré-carregá-lo. O IDF e o
+    tamanho médio dos documentos vêm do índice do domínio da memória, de modo
+    que outros domínios e usuários não interferem na pontuação.
+
+    Os índices são limitados: cada um guarda até `max_documents` memórias e
+    até `max_partitions` índices são mantidos, descartando os menos usados.
+    As memórias são identificadas pelo atributo `id` (em `SemanticMemory`)
+    ou, para `EpisodicMemory`, pelo trio usuário/domínio/timestamp.
+
+    Como no `SimpleSemanticAttention`, `rank` retorna todas as memórias
+    recebidas: as que compartilham termos com a entrada vêm primeiro, por
+    pontuação, seguidas das demais na ordem original.
+
+    Attributes:
+        k1 (float): Parâmetro de saturação da frequência do termo.
+        b (float): Parâmetro de normalização pelo tamanho do documento.
+        max_documents (int): Número máximo de memórias por índice.
+        max_partitions (int): Número máximo de índices (domínios ou pares
+            usuário/domínio) mantidos.
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_documents: int = 10000, max_partitions: int = 1024):
+        """Inicializa os índices vazios.
+
+        Args:
+            k1 (float, optional): Saturação da frequência do termo. Padrão 1.5.
+            b (float, optional): Peso da normalização por tamanho. Padrão 0.75.
+            max_documents (int, optional): Capacidade de cada índice.
+                Padrão 10000.
+            max_partitions (int, optional): Número de índices mantidos.
+                Padrão 1024.
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_documents = max_documents
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[Hashable, _PartitionIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_memories(self, memories: List[Any]):
+        """Indexa (ou reindexa, se o texto mudou) uma lista de memórias.
+
+        Args:
+            memories (List[Any]): Memórias com `text_content` ou com
+                `user_input`/`assistant_output`.
+        """
+        with self._lock:
+            touched = {}
+            for memory in memories:
+                partition = self._partition(memory)
+                partition.index(self._memory_key(memory), self._memory_source(memory))
+                touched[id(partition)] = partition
+            self._trim(touched.values())
+
+    def remove_memory(self, memory: Any):
+        """Remove uma memória do índice, se presente.
+
+        Args:
+            memory (Any): A memória a ser removida.
+        """
+        with self._lock:
+            partition = self._partitions.get(self._partition_key(memory))
+            if partition is not None:
+                partition.unindex(self._memory_key(memory))
+
+    def rank(self, user_input: str, memories: List[Any], query_embedding: Optional[List[float]] = None, top_k: Optional[int] = None) -> List[Any]:
+        """Ordena memórias pela pontuação BM25 em relação à entrada.
+
+        Args:
+            user_input (str): O texto do usuário, usado como consulta.
+            memories (List[Any]): As memórias a serem ranqueadas.
+            query_embedding (Optional[List[float]], optional): Ignorado; a
+                pontuação é puramente lexical.
+            top_k (Optional[int], optional): Se informado, apenas as `top_k`
+                memórias mais relevantes são retornadas.
+
+        Returns:
+            List[Any]: As memórias ordenadas por relevância.
+        """
+        if not memories:
+            return []
+
+        keys = [self._memory_key(memory) for memory in memories]
+        query_terms = set(tokenize(user_input))
+
+        with self._lock:
+            groups: Dict[int, Tuple[_PartitionIndex, set]] = {}
+            for key, memory in zip(keys, memories):
+                partition = self._partition(memory)
+                partition.index(key, self._memory_source(memory))
+                groups.setdefault(id(partition), (partition, set()))[1].add(key)
+            scores: Dict[Hashable, float] = {}
+            for partition, candidates in groups.values():
+                scores.update(self._score(partition, query_terms, candidates))
+            # O corte acontece só depois da pontuação, para não descartar
+            # candidatos desta chamada.
+            self._trim(partition for partition, _ in groups.values())
+
+        scored = [(scores[key], -position) for position, key in enumerate(keys) if key in scores]
+        if top_k is not None:
+            best = heapq.nlargest(top_k, scored)
+        else:
+            best = sorted(scored, reverse=True)
+        ranked = [memories[-position] for _, position in best]
+
+        if top_k is None or len(ranked) < top_k:
+            unscored = [memory for key, memory in zip(keys, memories) if key not in scores]
+            ranked.extend(unscored if top_k is None else unscored[:top_k - len(ranked)])
+        return ranked
+
+    def _score(self, partition: _PartitionIndex, query_terms: set, candidates: set) -> Dict[Hashable, float]:
+        """Calcula a pontuação BM25 dos candidatos que contêm termos da consulta."""
+        total_documents = len(partition.documents)
+        if not total_documents:
+            return {}
+        average_length = partition.total_length / total_documents or 1.0
+
+        scores: Dict[Hashable, float] = {}
+        for term in query_terms:
+            postings = partition.postings.get(term)
+            if not postings:
+                continue
+            document_frequency = len(postings)
+            idf = math.log(1 + (total_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+
+            # Percorre o menor dos dois conjuntos: as postings do termo ou os
+            # candidatos desta chamada.
+            if len(postings) <= len(candidates):
+                matches = ((key, tf) for key, tf in postings.items() if key in candidates)
+            else:
+                matches = ((key, postings[key]) for key in candidates if key in postings)
+
+            for key, term_frequency in matches:
+                length = partition.documents[key][1]
+                norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * term_frequency * (self.k1 + 1) / (term_frequency + norm)
+        return scores
+
+    def _partition(self, memory: Any) -> _PartitionIndex:
+        """Retorna (criando, se preciso) o índice do domínio de uma memória."""
+        partition_key = self._partition_key(memory)
+        partition = self._partitions.get(partition_key)
+        if partition is None:
+            partition = self._partitions[partition_key] = _PartitionIndex()
+        else:
+            self._partitions.move_to_end(partition_key)
+        return partition
+
+    def _trim(self, touched: Iterable[_PartitionIndex]):
+        """Aplica os limites de documentos por índice e de número de índices."""
+        for partition in touched:
+            partition.trim(self.max_documents)
+        while len(self._partitions) > self.max_partitions:
+            self._partitions.popitem(last=False)
+
+    @staticmethod
+    def _partition_key(memory: Any) -> Hashable:
+        """Agrupa memórias semânticas por domínio e episódicas por usuário e domínio."""
+        return (getattr(memory, 'user_id', None), getattr(memory, 'domain_id', None))
+
+    @staticmethod
+    def _memory_key(memory: Any) -> Hashable:
+        """Identifica uma memória de forma estável entre chamadas."""
+        memory_id = getattr(memory, 'id', None)
+        if memory_id is not None:
+            return memory_id
+        return (getattr(memory, 'user_id', None), getattr(memory, 'domain_id', None), getattr(memory, 'timestamp', None))
+
+    @staticmethod
+    def _memory_source(memory: Any) -> Any:
+        """Retorna o texto de uma memória semântica, ou o par entrada/resposta de uma episódica."""
+        text_content = getattr(memory, 'text_content', None)
+        if text_content is not None:
+            return text_content
+        return (getattr(memory, 'user_input', ''), getattr(memory, 'assistant_output', ''))
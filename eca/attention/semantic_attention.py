@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import difflib
-from typing import List
+import heapq
+from typing import List, Optional
 from eca.memory.types import SemanticMemory
 from .base import AttentionMechanism
 
@@ -17,7 +18,7 @@ class SimpleSemanticAttention(AttentionMechanism):
     É uma opção leve e funcional para casos onde uma busca semântica
     completa (baseada em vetores) é desnecessária ou computacionalmente cara.
     """
-    def rank(self, user_input: str, memories: List[SemanticMemory]) -> List[SemanticMemory]:
+    def rank(self, user_input: str, memories: List[SemanticMemory], query_embedding: Optional[List[float]] = None, top_k: Optional[int] = None) -> List[SemanticMemory]:
         """Ordena memórias com base na similaridade de texto usando `difflib`.
 
         O método calcula um "ratio" de similaridade para cada memória comparada
@@ -29,17 +30,26 @@ class SimpleSemanticAttention(AttentionMechanism):
                 comparação.
             memories (List[SemanticMemory]): Uma lista de objetos
                 `SemanticMemory` a serem ranqueados.
+            query_embedding (Optional[List[float]], optional): Ignorado; a
+                comparação é puramente textual.
+            top_k (Optional[int], optional): Se informado, seleciona apenas as
+                `top_k` memórias mais similares com um heap, em O(n log k).
 
         Returns:
             List[SemanticMemory]: A lista de memórias ordenada pela
             similaridade com a entrada do usuário.
         """
+        user_input_lower = user_input.lower()
+
         def _calculate_similarity(memory: SemanticMemory) -> float:
             """Calcula a pontuação de similaridade entre a memória e a entrada."""
             return difflib.SequenceMatcher(
                 None,
-                user_input.lower(),
+                user_input_lower,
                 memory.text_content.lower()
             ).ratio()
-        
+
+        if top_k is not None:
+            # `nlargest` é estável como o `sorted` abaixo, em O(n log k).
+            return heapq.nlargest(top_k, memories, key=_calculate_similarity)
         return sorted(memories, key=_calculate_similarity, reverse=True)
\ No newline at end of file
@@ -1,6 +1,15 @@
 # -*- coding: utf-8 -*-
+import heapq
 import math
-from typing import List, Callable
+import threading
+from collections import OrderedDict
+from typing import Any, List, Callable, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # O NumPy é opcional: sem ele, o cálculo é feito em Python puro.
+    np = None
 
 from eca.memory.types import SemanticMemory
 from .base import AttentionMechanism
@@ -16,28 +25,53 @@ class VectorizedSemanticAttention(AttentionMechanism):
     A classe é projetada para ser flexível, permitindo que o usuário injete
     qualquer função de embedding compatível (ex: de bibliotecas como
     `sentence-transformers`, `transformers`, ou APIs como OpenAI).
-    Notavelmente, o cálculo de similaridade é feito com a biblioteca `math`
-    padrão do Python, evitando dependências pesadas como NumPy ou SciPy.
+    Por padrão, o cálculo de similaridade é feito com a biblioteca `math`
+    padrão do Python, evitando dependências pesadas. Se o NumPy estiver
+    instalado (`pip install eca-lib[numpy]`), os embeddings das memórias são
+    empacotados em uma matriz float32 já normalizada, mantida em cache por
+    conjunto de memórias, e a pontuação de todas elas é um único produto
+    matriz-vetor.
 
     Attributes:
         embed (Callable[[str], List[float]]): A função que converte uma string
             de texto em um vetor de embedding (uma lista de floats).
+        use_numpy (bool): Indica se o backend NumPy está em uso.
+        matrix_cache_size (int): Quantos conjuntos de memórias distintos têm
+            sua matriz mantida em cache (ex: um por domínio).
     """
-    def __init__(self, embedding_function: Callable[[str], List[float]]):
+    def __init__(self, embedding_function: Callable[[str], List[float]], use_numpy: Optional[bool] = None, matrix_cache_size: int = 8):
         """Inicializa o mecanismo com uma função de embedding.
 
         Args:
             embedding_function (Callable[[str], List[float]]): Uma função que
                 aceita uma string como entrada e retorna seu embedding vetorial
-                como uma lista de números de ponto flutuante.
+                como uma lista de números de ponto flutuante. Pode ser um
+                `CachedEmbeddingFunction` compartilhado com os provedores.
+
+            use_numpy (Optional[bool], optional): `True` exige o backend
+                NumPy, `False` força o cálculo em Python puro e `None` (padrão)
+                usa o NumPy se ele estiver instalado.
+            matrix_cache_size (int, optional): Número máximo de matrizes de
+                memórias mantidas em cache. Padrão 8.
 
         Raises:
             TypeError: Se o argumento `embedding_function` não for uma função
                 (callable).
+            ImportError: Se `use_numpy=True` e o NumPy não estiver instalado.
         """
         if not callable(embedding_function):
             raise TypeError("O argumento 'embedding_function' deve ser uma função.")
+        if use_numpy and np is None:
+            raise ImportError(
+                "O pacote 'numpy' não está instalado. "
+                "Por favor, instale a eca-lib com o suporte a NumPy: pip install eca-lib[numpy]"
+            )
         self.embed = embedding_function
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        self.matrix_cache_size = matrix_cache_size
+        self._matrix_lock = threading.Lock()
+        self._matrix_cache: "OrderedDict[Tuple[Any, ...], Tuple[List[int], Any]]" = OrderedDict()
+        self._generation = 0
 
     def _cosine_similarity(self, vec_a: List[float], vec_b: List[float]) -> float:
         """Calcula a similaridade de cossenos entre dois vetores.
@@ -70,11 +104,12 @@ class VectorizedSemanticAttention(AttentionMechanism):
         
         return dot_product / (norm_a * norm_b)
 
-    def rank(self, user_input: str, memories: List[SemanticMemory]) -> List[SemanticMemory]:
+    def rank(self, user_input: str, memories: List[SemanticMemory], query_embedding: Optional[List[float]] = None, top_k: Optional[int] = None) -> List[SemanticMemory]:
         """Rankeia memórias pela similaridade de cossenos de seus embeddings.
 
         O processo consiste em:
-        1. Gerar o embedding vetorial para a entrada do usuário.
+        1. Gerar o embedding vetorial para a entrada do usuário (ou usar o
+           `query_embedding` já calculado pelo orquestrador).
         2. Para cada memória na lista, calcular a similaridade de cossenos
            entre o embedding da entrada e o embedding pré-existente da memória.
         3. Ordenar a lista de memórias com base na pontuação de similaridade,
@@ -85,24 +120,33 @@ class VectorizedSemanticAttention(AttentionMechanism):
             memories (List[SemanticMemory]): A lista de memórias a ser
                 ranqueada. Cada memória deve conter um atributo `embedding`
                 que seja uma lista de floats.
+            query_embedding (Optional[List[float]], optional): O embedding de
+                `user_input`, se já calculado. Evita uma nova chamada à
+                função de embedding.
+            top_k (Optional[int], optional): Se informado, apenas as `top_k`
+                memórias mais similares são selecionadas (com um heap, ou com
+                `argpartition` no backend NumPy) e ordenadas.
 
         Returns:
             List[SemanticMemory]: A lista de memórias ordenada por relevância
             semântica. Se ocorrer um erro ou a lista de entrada estiver vazia,
             a lista original pode ser retornada sem ordenação.
         """
-        if not memories:
+        if not memories or top_k == 0:
             return []
 
         # Gera o embedding para a entrada do usuário e valida o resultado
         try:
-            input_embedding = self.embed(user_input)
+            input_embedding = query_embedding if query_embedding is not None else self.embed(user_input)
             if not isinstance(input_embedding, list):
                 print("Aviso: A função de embedding não retornou uma lista de floats.")
-                return memories # Retorna a lista original sem rankear
+                return memories if top_k is None else memories[:top_k] # Retorna a lista original sem rankear
         except Exception as e:
             print(f"Aviso: Erro ao executar a embedding_function: {e}")
-            return memories
+            return memories if top_k is None else memories[:top_k]
+
+        if self.use_numpy:
+            return self._rank_numpy(input_embedding, memories, top_k)
 
         scored_memories = []
         for mem in memories:
@@ -114,11 +158,98 @@ class VectorizedSemanticAttention(AttentionMechanism):
                 scored_memories.append((mem, score))
 
         # Ordena a lista de tuplas (memória, pontuação) pela pontuação
-        sorted_by_score = sorted(
-            scored_memories,
-            key=lambda x: x[1],
-            reverse=True
-        )
+        if top_k is not None:
+            sorted_by_score = heapq.nlargest(top_k, scored_memories, key=lambda x: x[1])
+        else:
+            sorted_by_score = sorted(
+                scored_memories,
+                key=lambda x: x[1],
+                reverse=True
+            )
 
         # Extrai apenas as memórias da lista ordenada
-        return [mem for mem, score in sorted_by_score]
\ No newline at end of file
+        return [mem for mem, score in sorted_by_score]
+
+    def _rank_numpy(self, input_embedding: List[float], memories: List[SemanticMemory], top_k: Optional[int] = None) -> List[SemanticMemory]:
+        """Ranqueia com um único produto matriz-vetor sobre a matriz em cache."""
+        valid_memories, normalized_matrix = self._get_memory_matrix(memories, len(input_embedding))
+        if not valid_memories:
+            return []
+
+        query = np.asarray(input_embedding, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query))
+        if query_norm == 0:
+            return valid_memories if top_k is None else valid_memories[:top_k]
+
+        scores = normalized_matrix @ (query / query_norm)
+        if top_k is not None and top_k < len(valid_memories):
+            # Seleciona os k melhores em O(n) e ordena apenas eles. Empates na
+            # k-ésima pontuação podem ficar de fora do `argpartition` de forma
+            # arbitrária, então todos os empatados entram antes do corte, e o
+            # índice original desempata, como na ordenação estável.
+            kth_score = scores[np.argpartition(-scores, top_k - 1)[top_k - 1]]
+            candidates = np.flatnonzero(scores >= kth_score)
+            order = candidates[np.lexsort((candidates, -scores[candidates]))][:top_k]
+        else:
+            # A ordenação estável preserva a ordem original em caso de empate,
+            # assim como o `sorted` do caminho em Python puro.
+            order = np.argsort(-scores, kind='stable')
+        return [valid_memories[i] for i in order]
+
+    def invalidate(self):
+        """Descarta as matrizes em cache.
+
+        Necessário apenas quando um embedding é alterado no meio (sem mudar
+        tamanho, primeiro nem último componente) mantendo o `id` da memória,
+        ex: após recarregar a base de um provedor com embeddings recalculados
+        in-place.
+        """
+        with self._matrix_lock:
+            self._generation += 1
+            self._matrix_cache.clear()
+
+    def _get_memory_matrix(self, memories: List[SemanticMemory], dimension: int) -> Tuple[List[SemanticMemory], Any]:
+        """Retorna as memórias válidas e sua matriz normalizada, usando o cache.
+
+        A chave do cache é formada pelo `id` de cada memória e por um carimbo
+        barato do seu embedding (tamanho, primeiro e último componentes), com
+        custo constante por memória. Assim, o cache é aproveitado mesmo por
+        provedores que criam novos objetos a cada consulta (ex: PostgreSQL),
+        sem percorrer os vetores a cada chamada. Alterações que o carimbo não
+        detecta exigem `invalidate()`.
+        """
+        with self._matrix_lock:
+            generation = self._generation
+        key = (dimension, generation, tuple(map(_memory_stamp, memories)))
+        with self._matrix_lock:
+            cached = self._matrix_cache.get(key)
+            if cached is not None:
+                self._matrix_cache.move_to_end(key)
+        if cached is not None:
+            valid_indices, normalized_matrix = cached
+            return [memories[i] for i in valid_indices], normalized_matrix
+
+        valid_indices = [
+            i for i, mem in enumerate(memories)
+            if isinstance(mem.embedding, list) and len(mem.embedding) == dimension
+        ]
+        valid_memories = [memories[i] for i in valid_indices]
+        matrix = np.asarray([mem.embedding for mem in valid_memories], dtype=np.float32).reshape(len(valid_memories), dimension)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Linhas de norma zero ficam zeradas e recebem similaridade 0.0.
+        normalized_matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms != 0)
+
+        with self._matrix_lock:
+            if generation == self._generation:
+                self._matrix_cache[key] = (valid_indices, normalized_matrix)
+                while len(self._matrix_cache) > self.matrix_cache_size:
+                    self._matrix_cache.popitem(last=False)
+        return valid_memories, normalized_matrix
+
+
+def _memory_stamp(memory: SemanticMemory) -> Tuple[Any, ...]:
+    """Identifica uma memória e a versão do seu embedding sem percorrer o vetor."""
+    embedding = memory.embedding
+    if isinstance(embedding, list) and embedding:
+        return (memory.id, len(embedding), embedding[0], embedding[-1])
+    return (memory.id, None)
@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+"""
+Codecs de serialização para o `CognitiveWorkspace`.
+
+Os provedores de sessão convertem o workspace a cada turno. Em vez de
+`dataclasses.asdict` (que copia recursivamente toda a estrutura) seguido de
+`json.dumps`, e de `CognitiveWorkspace.__post_init__` na volta, os codecs
+deste módulo percorrem os campos diretamente e criam os objetos já
+tipados.
+
+Há dois formatos:
+
+- `JSONWorkspaceCodec`: JSON, compatível com os dados gravados pelas versões
+  anteriores (que não tinham o campo `schema_version`).
+- `BinaryWorkspaceCodec`: binário compacto, no estilo do msgpack, com
+  embeddings gravados como vetores contíguos de float64.
+
+Ambos embutem a versão do esquema e decodificam os dois formatos, de modo
+que trocar de codec não invalida as sessões já gravadas.
+
+Opcionalmente, os dados maiores que um limite são comprimidos (zlib, da
+biblioteca padrão, ou lz4, mais rápido, com o extra 'lz4'). Os dados
+comprimidos começam com um byte de cabeçalho que nenhum formato sem
+compressão usa (JSON começa com '{' e o binário com 'E'), então dados
+antigos, sem compressão, continuam legíveis.
+"""
+import json
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+from eca.models import CognitiveWorkspace, DomainState
+from eca.memory.types import EpisodicMemory, SemanticMemory
+
+SCHEMA_VERSION = 1
+
+_BINARY_MAGIC = b"ECW"
+_BINARY_DOMAIN_MAGIC = b"ECD"
+
+# Bytes de cabeçalho dos dados comprimidos.
+_COMPRESSION_HEADERS = {"zlib": 0x01, "lz4": 0x02}
+
+
+def compress_payload(data: bytes, algorithm: Optional[str], threshold: int = 1024, level: Optional[int] = None) -> bytes:
+    """Comprime os dados se passarem do limite e a compressão compensar.
+
+    Args:
+        data (bytes): Os dados serializados.
+        algorithm (Optional[str]): 'zlib', 'lz4' ou `None` (sem compressão).
+        threshold (int, optional): Tamanho mínimo, em bytes, para comprimir.
+        level (Optional[int], optional): Nível de compressão; `None` usa o
+            padrão do algoritmo.
+
+    Returns:
+        bytes: O byte de cabeçalho seguido dos dados comprimidos, ou os dados
+        originais.
+    """
+    if algorithm is None or len(data) < threshold:
+        return data
+    if algorithm == "zlib":
+        compressed = zlib.compress(data, -1 if level is None else level)
+    else:
+        compressed = lz4_frame.compress(data) if level is None else lz4_frame.compress(data, compression_level=level)
+    if len(compressed) + 1 >= len(data):
+        return data
+    return bytes([_COMPRESSION_HEADERS[algorithm]]) + compressed
+
+
+def decompress_payload(data: Any) -> Any:
+    """Descomprime dados gravados por `compress_payload`; outros dados passam intactos.
+
+    Raises:
+        ImportError: Se os dados usarem lz4 e o pacote não estiver instalado.
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)) or not data:
+        return data
+    header = data[0]
+    if header == _COMPRESSION_HEADERS["zlib"]:
+        return zlib.decompress(bytes(data[1:]))
+    if header == _COMPRESSION_HEADERS["lz4"]:
+        _require_lz4()
+        return lz4_frame.decompress(bytes(data[1:]))
+    return data
+
+
+def check_compression(algorithm: Optional[str]):
+    """Valida o nome de um algoritmo de compressão.
+
+    Raises:
+        ValueError: Se o algoritmo for desconhecido.
+        ImportError: Se 'lz4' for pedido sem o pacote instalado.
+    """
+    if algorithm not in (None, "zlib", "lz4"):
+        raise ValueError(f"Algoritmo de compressão desconhecido: '{algorithm}'")
+    if algorithm == "lz4":
+        _require_lz4()
+
+
+def _require_lz4():
+    """Garante que o pacote 'lz4' está disponível."""
+    if lz4_frame is None:
+        raise ImportError(
+            "O pacote 'lz4' não está instalado. "
+            "Por favor, instale a eca-lib com o suporte a lz4: pip install eca-lib[lz4]"
+        )
+
+
+class WorkspaceCodec(ABC):
+    """Interface dos codecs de `CognitiveWorkspace`.
+
+    Subclasses implementam a codificação; a decodificação reconhece o formato
+    (e a compressão) pelo cabeçalho e aceita qualquer um dos formatos deste
+    módulo.
+
+    Attributes:
+        extension (str): Extensão de arquivo sugerida para os dados gerados.
+        compression (Optional[str]): 'zlib', 'lz4' ou `None`.
+        compression_threshold (int): Tamanho mínimo, em bytes, para comprimir.
+        compression_level (Optional[int]): Nível de compressão.
+    """
+    extension = ".bin"
+
+    def __init__(self, compression: Optional[str] = None, compression_threshold: int = 1024, compression_level: Optional[int] = None):
+        """Configura a compressão dos dados gerados.
+
+        Args:
+            compression (Optional[str], optional): 'zlib' (biblioteca padrão),
+                'lz4' (requer o extra 'lz4') ou `None`. Padrão `None`.
+            compression_threshold (int, optional): Dados menores que isso não
+                são comprimidos. Padrão 1024 bytes.
+            compression_level (Optional[int], optional): Nível de compressão;
+                `None` usa o padrão do algoritmo.
+
+        Raises:
+            ValueError: Se o algoritmo for desconhecido.
+            ImportError: Se 'lz4' for pedido sem o pacote instalado.
+        """
+        check_compression(compression)
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+
+    def _compress(self, data: bytes) -> bytes:
+        """Aplica a compressão configurada aos dados serializados."""
+        return compress_payload(data, self.compression, self.compression_threshold, self.compression_level)
+
+    @abstractmethod
+    def encode(self, workspace: CognitiveWorkspace) -> bytes:
+        """Serializa um workspace completo."""
+        pass
+
+    @abstractmethod
+    def encode_domain(self, domain_id: str, state: DomainState) -> bytes:
+        """Serializa um único domínio, para layouts que gravam domínios separadamente."""
+        pass
+
+    def decode(self, data: bytes) -> CognitiveWorkspace:
+        """Reconstrói um workspace gravado por qualquer codec deste módulo.
+
+        Args:
+            data (bytes): Os dados serializados (`str` também é aceito para
+                JSON).
+
+        Returns:
+            CognitiveWorkspace: O workspace reconstruído.
+
+        Raises:
+            ValueError: Se a versão do esquema não for suportada.
+        """
+        data = decompress_payload(data)
+        if isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:3]) == _BINARY_MAGIC:
+            return _decode_binary_workspace(data)
+        return workspace_from_dict(json.loads(data))
+
+    def decode_domain(self, data: bytes) -> Tuple[str, DomainState]:
+        """Reconstrói um domínio gravado por `encode_domain`.
+
+        Returns:
+            Tuple[str, DomainState]: O ID do domínio e seu estado.
+        """
+        data = decompress_payload(data)
+        if isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:3]) == _BINARY_DOMAIN_MAGIC:
+            version, fields = _decode_binary_payload(data)
+            _check_version(version)
+            domain_id, state = fields
+            return domain_id, _domain_from_tuple(state)
+        payload = json.loads(data)
+        _check_version(payload.get("schema_version", SCHEMA_VERSION))
+        return payload["domain_id"], domain_from_dict(payload["state"])
+
+
+class JSONWorkspaceCodec(WorkspaceCodec):
+    """Codec JSON com conversão manual dos campos (sem `asdict`)."""
+    extension = ".json"
+
+    def encode(self, workspace: CognitiveWorkspace) -> bytes:
+        """Serializa o workspace como JSON em UTF-8."""
+        return self._compress(json.dumps(workspace_to_dict(workspace), ensure_ascii=False, default=str).encode('utf-8'))
+
+    def encode_domain(self, domain_id: str, state: DomainState) -> bytes:
+        """Serializa um domínio como JSON em UTF-8."""
+        payload = {"schema_version": SCHEMA_VERSION, "domain_id": domain_id, "state": domain_to_dict(state)}
+        return self._compress(json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+class BinaryWorkspaceCodec(WorkspaceCodec):
+    """Codec binário compacto.
+
+    O workspace é gravado como tuplas posicionais (a ordem dos campos é
+    definida pela versão do esquema no cabeçalho), sem repetir os nomes dos
+    campos. Listas compostas apenas de floats, como os embeddings, são
+    gravadas como um bloco contíguo, sem marcação por elemento.
+    """
+    extension = ".ecw"
+
+    def encode(self, workspace: CognitiveWorkspace) -> bytes:
+        """Serializa o workspace no formato binário."""
+        fields = [
+            workspace.user_id,
+            workspace.current_focus,
+            {domain_id: _domain_to_tuple(state) for domain_id, state in workspace.active_domains.items()},
+        ]
+        return self._compress(_encode_binary_payload(_BINARY_MAGIC, fields))
+
+    def encode_domain(self, domain_id: str, state: DomainState) -> bytes:
+        """Serializa um domínio no formato binário."""
+        return self._compress(_encode_binary_payload(_BINARY_DOMAIN_MAGIC, [domain_id, _domain_to_tuple(state)]))
+
+
+# --- Conversão para dicionários (JSON) ---
+
+def workspace_to_dict(workspace: CognitiveWorkspace) -> Dict[str, Any]:
+    """Converte um workspace em dicionário, no mesmo formato de `asdict`.
+
+    Ao contrário de `asdict`, as listas de embeddings, os metadados e o
+    `task_data` não são copiados: o dicionário referencia os mesmos objetos
+    do workspace e deve ser serializado em seguida.
+    """
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "user_id": workspace.user_id,
+        "current_focus": workspace.current_focus,
+        "active_domains": {
+            domain_id: domain_to_dict(state) for domain_id, state in workspace.active_domains.items()
+        },
+    }
+
+
+def workspace_from_dict(data: Dict[str, Any]) -> CognitiveWorkspace:
+    """Reconstrói um workspace a partir de `workspace_to_dict` (ou de `asdict`).
+
+    Raises:
+        ValueError: Se a versão do esquema for mais nova que a suportada.
+    """
+    _check_version(data.get("schema_version", SCHEMA_VERSION))
+    return CognitiveWorkspace(
+        user_id=data["user_id"],
+        current_focus=data.get("current_focus", "default"),
+        active_domains={
+            domain_id: domain_from_dict(state) for domain_id, state in data.get("active_domains", {}).items()
+        },
+    )
+
+
+def domain_to_dict(state: DomainState) -> Dict[str, Any]:
+    """Converte um `DomainState` em dicionário."""
+    return {
+        "status": state.status,
+        "session_summary": state.session_summary,
+        "active_task": state.active_task,
+        "semantic_memories": [
+            {
+                "id": m.id, "domain_id": m.domain_id, "type": m.type, "text_content": m.text_content,
+                "embedding": m.embedding, "metadata": m.metadata,
+            }
+            for m in state.semantic_memories
+        ],
+        "episodic_memories": [
+            {
+                "user_id": m.user_id, "domain_id": m.domain_id, "user_input": m.user_input,
+                "assistant_output": m.assistant_output, "timestamp": m.timestamp,
+            }
+            for m in state.episodic_memories
+        ],
+        "task_data": state.task_data,
+    }
+
+
+def domain_from_dict(data: Dict[str, Any]) -> DomainState:
+    """Reconstrói um `DomainState` a partir de `domain_to_dict`."""
+    return DomainState(
+        status=data.get("status", "paused"),
+        session_summary=data.get("session_summary", ""),
+        active_task=data.get("active_task", ""),
+        semantic_memories=[SemanticMemory(**m) for m in data.get("semantic_memories", [])],
+        episodic_memories=[EpisodicMemory(**m) for m in data.get("episodic_memories", [])],
+        task_data=data.get("task_data"),
+    )
+
+
+def _check_version(version: int):
+    """Recusa dados gravados por uma versão de esquema mais nova."""
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"Versão de esquema do workspace não suportada: {version}")
+
+
+# --- Formato binário ---
+
+def _domain_to_tuple(state: DomainState) -> List[Any]:
+    """Converte um `DomainState` na sua forma posicional."""
+    return [
+        state.status,
+        state.session_summary,
+        state.active_task,
+        [[m.id, m.domain_id, m.type, m.text_content, m.embedding, m.metadata] for m in state.semantic_memories],
+        [[m.user_id, m.domain_id, m.user_input, m.assistant_output, m.timestamp] for m in state.episodic_memories],
+        state.task_data,
+    ]
+
+
+def _domain_from_tuple(fields: List[Any]) -> DomainState:
+    """Reconstrói um `DomainState` a partir da sua forma posicional."""
+    status, session_summary, active_task, semantic, episodic, task_data = fields
+    return DomainState(
+        status=status,
+        session_summary=session_summary,
+        active_task=active_task,
+        semantic_memories=[SemanticMemory(*m) for m in semantic],
+        episodic_memories=[EpisodicMemory(*m) for m in episodic],
+        task_data=task_data,
+    )
+
+
+def _decode_binary_workspace(data: bytes) -> CognitiveWorkspace:
+    """Reconstrói um workspace gravado por `BinaryWorkspaceCodec.encode`."""
+    version, (user_id, current_focus, domains) = _decode_binary_payload(data)
+    _check_version(version)
+    return CognitiveWorkspace(
+        user_id=user_id,
+        current_focus=current_focus,
+        active_domains={domain_id: _domain_from_tuple(state) for domain_id, state in domains.items()},
+    )
+
+
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+
+
+def _encode_binary_payload(magic: bytes, value: Any) -> bytes:
+    """Grava o cabeçalho (assinatura + versão) seguido do valor codificado."""
+    parts = [magic, bytes([SCHEMA_VERSION])]
+    _encode_value(value, parts)
+    return b"".join(parts)
+
+
+def _decode_binary_payload(data: bytes) -> Tuple[int, Any]:
+    """Lê o cabeçalho e o valor codificado; retorna a versão e o valor."""
+    view = memoryview(data)
+    value, _ = _decode_value(view, 4)
+    return view[3], value
+
+
+def _encode_value(value: Any, parts: List[bytes]):
+    """Codifica um valor com uma marca de tipo de um byte."""
+    if value is None:
+        parts.append(b'N')
+    elif value is True:
+        parts.append(b'T')
+    elif value is False:
+        parts.append(b'F')
+    elif isinstance(value, int):
+        if -(1 << 63) <= value < (1 << 63):
+            parts.append(b'i')
+            parts.append(_I64.pack(value))
+        else:
+            _encode_str(b'I', str(value), parts)
+    elif isinstance(value, float):
+        parts.append(b'd')
+        parts.append(_F64.pack(value))
+    elif isinstance(value, str):
+        _encode_str(b's', value, parts)
+    elif isinstance(value, (list, tuple)):
+        if value and all(type(x) is float for x in value):
+            parts.append(b'v')
+            parts.append(_U32.pack(len(value)))
+            parts.append(array('d', value).tobytes())
+        else:
+            parts.append(b'l')
+            parts.append(_U32.pack(len(value)))
+            for item in value:
+                _encode_value(item, parts)
+    elif isinstance(value, dict):
+        parts.append(b'm')
+        parts.append(_U32.pack(len(value)))
+        for key, item in value.items():
+            _encode_value(key, parts)
+            _encode_value(item, parts)
+    elif isinstance(value, (bytes, bytearray)):
+        parts.append(b'b')
+        parts.append(_U32.pack(len(value)))
+        parts.append(bytes(value))
+    else:
+        # Mesmo comportamento do `default=str` usado na serialização JSON.
+        _encode_str(b's', str(value), parts)
+
+
+def _encode_str(tag: bytes, value: str, parts: List[bytes]):
+    """Codifica um texto como marca + tamanho + UTF-8."""
+    encoded = value.encode('utf-8')
+    parts.append(tag)
+    parts.append(_U32.pack(len(encoded)))
+    parts.append(encoded)
+
+
+def _decode_value(view: memoryview, pos: int) -> Tuple[Any, int]:
+    """Decodifica o valor que começa em `pos`; retorna o valor e a próxima posição."""
+    tag = view[pos]
+    pos += 1
+    if tag == 0x73:  # 's'
+        (length,) = _U32.unpack_from(view, pos)
+        pos += 4
+        return str(view[pos:pos + length], 'utf-8'), pos + length
+    if tag == 0x76:  # 'v'
+        (count,) = _U32.unpack_from(view, pos)
+        pos += 4
+        vector = array('d')
+        vector.frombytes(view[pos:pos + count * 8])
+        return vector.tolist(), pos + count * 8
+    if tag == 0x6c:  # 'l'
+        (count,) = _U32.unpack_from(view, pos)
+        pos += 4
+        items = []
+        for _ in range(count):
+            item, pos = _decode_value(view, pos)
+            items.append(item)
+        return items, pos
+    if tag == 0x6d:  # 'm'
+        (count,) = _U32.unpack_from(view, pos)
+        pos += 4
+        mapping = {}
+        for _ in range(count):
+            key, pos = _decode_value(view, pos)
+            mapping[key], pos = _decode_value(view, pos)
+        return mapping, pos
+    if tag == 0x69:  # 'i'
+        return _I64.unpack_from(view, pos)[0], pos + 8
+    if tag == 0x64:  # 'd'
+        return _F64.unpack_from(view, pos)[0], pos + 8
+    if tag == 0x4e:  # 'N'
+        return None, pos
+    if tag == 0x54:  # 'T'
+        return True, pos
+    if tag == 0x46:  # 'F'
+        return False, pos
+    if tag == 0x49:  # 'I'
+        (length,) = _U32.unpack_from(view, pos)
+        pos += 4
+        return int(str(view[pos:pos + length], 'utf-8')), pos + length
+    if tag == 0x62:  # 'b'
+        (length,) = _U32.unpack_from(view, pos)
+        pos += 4
+        return bytes(view[pos:pos + length]), pos + length
+    raise ValueError(f"Marca de tipo desconhecida no workspace binário: {tag!r}")
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Utilitários para funções de embedding.
+
+Os componentes da eca-lib que fazem busca vetorial recebem uma
+`embedding_function`: qualquer callable que converta um texto em uma lista de
+floats. Este módulo concentra as convenções compartilhadas por eles.
+
+Uma função de embedding pode, opcionalmente, expor um atributo `embed_batch`
+(um callable que recebe uma lista de textos e devolve uma lista de vetores).
+Quando presente, ele é usado pelas operações em lote para vetorizar todas as
+entradas em uma única chamada ao modelo ou à API.
+"""
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, List, Optional, Sequence
+
+EmbeddingFunction = Callable[[str], List[float]]
+
+
+def embed_texts(embedding_function: EmbeddingFunction, texts: Sequence[str]) -> List[List[float]]:
+    """Gera os embeddings de vários textos, em lote quando possível.
+
+    Args:
+        embedding_function (EmbeddingFunction): A função de embedding. Se ela
+            tiver um atributo `embed_batch`, ele é chamado uma única vez com
+            todos os textos.
+        texts (Sequence[str]): Os textos a serem vetorizados.
+
+    Returns:
+        List[List[float]]: Os embeddings, na mesma ordem de `texts`.
+    """
+    if not texts:
+        return []
+    embed_batch = getattr(embedding_function, 'embed_batch', None)
+    if callable(embed_batch):
+        return list(embed_batch(list(texts)))
+    return [embedding_function(text) for text in texts]
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "disk_hits", "misses", "maxsize", "currsize"])
+"""Estatísticas de um `CachedEmbeddingFunction`, no estilo de `functools.lru_cache`."""
+
+
+class CachedEmbeddingFunction:
+    """Envolve uma função de embedding com cache LRU e, opcionalmente, em disco.
+
+    Um único turno pode vetorizar a mesma entrada várias vezes (no roteamento
+    de personas, na busca de memórias e no mecanismo de atenção), e consultas
+    comuns se repetem entre turnos. Uma instância desta classe pode ser
+    passada como `embedding_function` para todos esses componentes ao mesmo
+    tempo, de modo que cada texto seja vetorizado uma única vez.
+
+    O cache tem dois níveis:
+
+    1. Um LRU em memória, limitado a `maxsize` entradas.
+    2. Um arquivo SQLite opcional (`cache_path`), que sobrevive a reinícios
+       e pode ser compartilhado entre processos.
+
+    As chaves são o hash SHA-256 do nome do modelo mais o texto, então trocar
+    de modelo nunca reaproveita vetores antigos.
+
+    Attributes:
+        embedding_function (EmbeddingFunction): A função de embedding original.
+        model_name (str): O identificador do modelo, parte da chave do cache.
+        maxsize (int): O número máximo de vetores mantidos em memória.
+        hits (int): Acertos no cache em memória.
+        disk_hits (int): Acertos no cache em disco.
+        misses (int): Textos que precisaram ser vetorizados.
+    """
+    def __init__(
+        self,
+        embedding_function: EmbeddingFunction,
+        model_name: str,
+        maxsize: int = 1024,
+        cache_path: Optional[str] = None,
+    ):
+        """Inicializa o cache.
+
+        Args:
+            embedding_function (EmbeddingFunction): A função a ser envolvida.
+                Se ela expuser `embed_batch`, ele é usado para os textos
+                ausentes do cache em `embed_batch`.
+            model_name (str): Nome do modelo de embedding (ex:
+                'text-embedding-3-small').
+            maxsize (int, optional): Capacidade do LRU em memória. Padrão 1024.
+            cache_path (Optional[str], optional): Caminho de um arquivo SQLite
+                para o cache persistente. Padrão `None` (apenas memória).
+
+        Raises:
+            TypeError: Se `embedding_function` não for uma função (callable).
+        """
+        if not callable(embedding_function):
+            raise TypeError("O argumento 'embedding_function' deve ser uma função.")
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if cache_path:
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def __call__(self, text: str) -> List[float]:
+        """Retorna o embedding de `text`, consultando o cache antes do modelo."""
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = list(self.embedding_function(text))
+            with self._lock:
+                self.misses += 1
+            self._store({key: vector})
+        return list(vector)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Retorna os embeddings de vários textos, vetorizando apenas os ausentes.
+
+        Os textos que não estão em nenhum nível do cache são deduplicados e
+        enviados em uma única chamada à função original (via `embed_texts`).
+
+        Args:
+            texts (List[str]): Os textos a serem vetorizados.
+
+        Returns:
+            List[List[float]]: Os embeddings, na mesma ordem de `texts`.
+        """
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vector = self._lookup(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                found[key] = vector
+
+        if missing:
+            vectors = embed_texts(self.embedding_function, list(missing.values()))
+            computed = {key: list(vector) for key, vector in zip(missing, vectors)}
+            with self._lock:
+                self.misses += len(computed)
+            self._store(computed)
+            found.update(computed)
+
+        return [list(found[key]) for key in keys]
+
+    def cache_info(self) -> CacheInfo:
+        """Retorna os contadores de acertos e falhas e a ocupação do LRU."""
+        with self._lock:
+            return CacheInfo(self.hits, self.disk_hits, self.misses, self.maxsize, len(self._memory))
+
+    def cache_clear(self):
+        """Esvazia o cache em memória e zera os contadores (o cache em disco é mantido)."""
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def close(self):
+        """Fecha a conexão com o cache em disco, se houver."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _key(self, text: str) -> str:
+        """Calcula a chave do cache a partir do nome do modelo e do texto."""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        """Procura um vetor no LRU e, em seguida, no disco."""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            vector = array('d', row[0]).tolist()
+            self.disk_hits += 1
+            self._remember(key, vector)
+            return vector
+
+    def _store(self, vectors: Dict[str, List[float]]):
+        """Grava vetores recém-calculados nos dois níveis do cache."""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, array('d', vector).tobytes()) for key, vector in vectors.items()]
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, vector: List[float]):
+        """Insere no LRU em memória, descartando o item menos usado se cheio."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""Índice aproximado de vizinhos mais próximos (ANN) para memórias semânticas.
+
+Implementa um índice do tipo IVF (Inverted File): os embeddings são agrupados
+por k-means esférico em `n_lists` centróides, e cada vetor fica na lista do
+centróide mais próximo. Numa busca, apenas as `n_probe` listas cujos
+centróides são mais similares à consulta são examinadas, o que torna o custo
+sublinear no número de memórias.
+
+O cálculo usa NumPy quando disponível e recai para Python puro caso
+contrário. A similaridade é sempre a de cossenos.
+"""
+import heapq
+import math
+import random
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    # O NumPy é opcional: sem ele, o índice é calculado em Python puro.
+    np = None
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    """Retorna o vetor com norma 1 (ou o próprio vetor, se for nulo)."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+def _dot(vec_a: Sequence[float], vec_b: Sequence[float]) -> float:
+    """Produto escalar entre dois vetores em Python puro."""
+    return sum(a * b for a, b in zip(vec_a, vec_b))
+
+
+class IVFIndex:
+    """Índice IVF sobre uma lista de embeddings.
+
+    O índice referencia os vetores por posição (a ordem em que foram
+    passados a `build`), de modo que o chamador mantém o mapeamento entre
+    posições e memórias.
+
+    Attributes:
+        dimension (int): A dimensão dos vetores indexados.
+        centroids (Any): Os centróides normalizados (matriz NumPy ou lista
+            de listas).
+        lists (List[List[int]]): Para cada centróide, as posições dos vetores
+            atribuídos a ele.
+    """
+    def __init__(self, dimension: int, centroids: Any, lists: List[List[int]], vectors: Sequence[Sequence[float]]):
+        """Monta o índice a partir de centróides e listas já calculados.
+
+        Prefira `IVFIndex.build` ou `IVFIndex.from_dict`.
+
+        Args:
+            dimension (int): A dimensão dos vetores.
+            centroids (Any): Os centróides, um por lista.
+            lists (List[List[int]]): As posições dos vetores em cada lista.
+            vectors (Sequence[Sequence[float]]): Os vetores indexados (serão
+                normalizados).
+        """
+        self.dimension = dimension
+        self.lists = [list(positions) for positions in lists]
+        if np is not None:
+            self.centroids = np.asarray(centroids, dtype=np.float32).reshape(len(self.lists), dimension)
+            self._vectors = self._normalized_matrix(vectors, dimension)
+            self._list_arrays = [np.asarray(positions, dtype=np.int64) for positions in self.lists]
+        else:
+            self.centroids = [list(c) for c in centroids]
+            self._vectors = [_normalize(v) for v in vectors]
+
+    def __len__(self) -> int:
+        """Retorna o número de vetores indexados."""
+        return len(self._vectors)
+
+    @classmethod
+    def build(cls, vectors: Sequence[Sequence[float]], n_lists: Optional[int] = None, n_iterations: int = 10, seed: int = 0) -> "IVFIndex":
+        """Constrói o índice agrupando os vetores com k-means esférico.
+
+        Args:
+            vectors (Sequence[Sequence[float]]): Os embeddings a indexar, todos
+                com a mesma dimensão.
+            n_lists (Optional[int], optional): Número de listas (centróides).
+                Padrão: raiz quadrada do número de vetores.
+            n_iterations (int, optional): Iterações do k-means. Padrão 10.
+            seed (int, optional): Semente para a escolha inicial dos
+                centróides, garantindo índices reprodutíveis. Padrão 0.
+
+        Returns:
+            IVFIndex: O índice construído.
+        """
+        if not vectors:
+            return cls(0, [], [], [])
+        dimension = len(vectors[0])
+        if n_lists is None:
+            n_lists = int(math.sqrt(len(vectors)))
+        n_lists = max(1, min(n_lists, len(vectors)))
+
+        rng = random.Random(seed)
+        initial = rng.sample(range(len(vectors)), n_lists)
+        if np is not None:
+            return cls._build_numpy(vectors, dimension, initial, n_iterations)
+
+        normalized = [_normalize(v) for v in vectors]
+        centroids = [normalized[i] for i in initial]
+        assignments: List[int] = []
+        for _ in range(n_iterations):
+            assignments = [max(range(n_lists), key=lambda c: _dot(centroids[c], v)) for v in normalized]
+            sums = [[0.0] * dimension for _ in range(n_lists)]
+            for vector, cluster in zip(normalized, assignments):
+                target = sums[cluster]
+                for i, x in enumerate(vector):
+                    target[i] += x
+            # Um centróide sem vetores atribuídos mantém a posição anterior.
+            centroids = [_normalize(s) if any(s) else centroids[c] for c, s in enumerate(sums)]
+
+        assignments = [max(range(n_lists), key=lambda c: _dot(centroids[c], v)) for v in normalized]
+        lists: List[List[int]] = [[] for _ in range(n_lists)]
+        for position, cluster in enumerate(assignments):
+            lists[cluster].append(position)
+        return cls(dimension, centroids, lists, vectors)
+
+    @classmethod
+    def _build_numpy(cls, vectors: Sequence[Sequence[float]], dimension: int, initial: List[int], n_iterations: int) -> "IVFIndex":
+        """Versão vetorizada do k-means esférico."""
+        matrix = cls._normalized_matrix(vectors, dimension)
+        centroids = matrix[initial].copy()
+        for _ in range(n_iterations):
+            assignments = np.argmax(matrix @ centroids.T, axis=1)
+            for cluster in range(len(centroids)):
+                members = matrix[assignments == cluster]
+                if len(members):
+                    mean = members.sum(axis=0)
+                    norm = np.linalg.norm(mean)
+                    if norm:
+                        centroids[cluster] = mean / norm
+
+        assignments = np.argmax(matrix @ centroids.T, axis=1)
+        lists = [np.flatnonzero(assignments == cluster).tolist() for cluster in range(len(centroids))]
+        return cls(dimension, centroids, lists, vectors)
+
+    def search(self, query: Sequence[float], k: int, n_probe: int = 8) -> List[int]:
+        """Retorna as posições dos `k` vetores mais similares à consulta.
+
+        Args:
+            query (Sequence[float]): O embedding da consulta.
+            k (int): O número de resultados.
+            n_probe (int, optional): Quantas listas examinar. Mais listas dão
+                mais precisão (revocação) a um custo maior. Padrão 8.
+
+        Returns:
+            List[int]: As posições, da mais para a menos similar. Empates são
+            desfeitos pela posição original.
+        """
+        if not self.lists or k <= 0 or len(query) != self.dimension:
+            return []
+        n_probe = max(1, min(n_probe, len(self.lists)))
+
+        if np is not None:
+            q = np.asarray(query, dtype=np.float32)
+            q_norm = float(np.linalg.norm(q))
+            if q_norm:
+                q = q / q_norm
+            probe = np.argsort(-(self.centroids @ q), kind='stable')[:n_probe]
+            candidates = np.concatenate([self._list_arrays[c] for c in probe])
+            if not len(candidates):
+                return []
+            scores = self._vectors[candidates] @ q
+            if k < len(candidates):
+                # Os empatados com a k-ésima pontuação podem ficar de fora do
+                # `argpartition` de forma arbitrária: todos entram antes do
+                # corte, e a posição original desempata.
+                kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+                selected = np.flatnonzero(scores >= kth_score)
+            else:
+                selected = np.arange(len(candidates))
+            order = selected[np.lexsort((candidates[selected], -scores[selected]))][:k]
+            return candidates[order].tolist()
+
+        q = _normalize(query)
+        probe = heapq.nlargest(n_probe, range(len(self.lists)), key=lambda c: _dot(self.centroids[c], q))
+        candidates = sorted(p for c in probe for p in self.lists[c])
+        best = heapq.nlargest(k, candidates, key=lambda p: _dot(self._vectors[p], q))
+        return best
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa centróides e listas para persistência em JSON.
+
+        Os vetores não são incluídos: eles já estão no arquivo de memórias e
+        são passados novamente a `from_dict`.
+        """
+        centroids = self.centroids.tolist() if np is not None else self.centroids
+        return {"dimension": self.dimension, "centroids": centroids, "lists": self.lists}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], vectors: Sequence[Sequence[float]]) -> "IVFIndex":
+        """Reconstrói um índice persistido com `to_dict`.
+
+        Args:
+            data (Dict[str, Any]): O dicionário gerado por `to_dict`.
+            vectors (Sequence[Sequence[float]]): Os mesmos vetores, na mesma
+                ordem, usados para construir o índice.
+
+        Returns:
+            IVFIndex: O índice restaurado.
+        """
+        return cls(data["dimension"], data["centroids"], data["lists"], vectors)
+
+    @staticmethod
+    def _normalized_matrix(vectors: Sequence[Sequence[float]], dimension: int) -> Any:
+        """Empacota os vetores em uma matriz float32 com linhas normalizadas."""
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), dimension)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms != 0)
@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
+import copy
+import hashlib
+import json
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterable, List, Dict, Any, Optional
 
 from eca.memory.types import EpisodicMemory, SemanticMemory
 
+_MISSING = object()
+
 
 @dataclass
 class PersonaConfig:
@@ -99,6 +104,52 @@ class DomainState:
     episodic_memories: List[EpisodicMemory] = field(default_factory=list)
     task_data: Optional[Dict[str, Any]] = None
 
+    def __setattr__(self, name: str, value: Any):
+        """Marca o domínio como modificado quando um campo recebe um valor diferente.
+
+        Alterações feitas no próprio objeto (ex: `task_data["x"] = 1` ou
+        `semantic_memories.append(...)`) não passam por aqui; elas são
+        detectadas por `is_dirty`, que compara o conteúdo das listas e do
+        `task_data` com o registrado na última leitura ou gravação.
+        """
+        if name in self.__dataclass_fields__:
+            current = self.__dict__.get(name, _MISSING)
+            if current is not value and current != value:
+                self.__dict__['_dirty'] = True
+        object.__setattr__(self, name, value)
+
+    def is_dirty(self) -> bool:
+        """Indica se o domínio mudou desde a última leitura ou gravação."""
+        if self.__dict__.get('_dirty', True):
+            return True
+        digest = self.__dict__.get('_digest')
+        if digest is None or digest != self._content_digest():
+            self.__dict__['_dirty'] = True
+            return True
+        return False
+
+    def _mark_clean(self):
+        """Registra o estado atual como persistido."""
+        self.__dict__['_dirty'] = False
+        self.__dict__['_digest'] = self._content_digest()
+
+    def _content_digest(self) -> Optional[bytes]:
+        """Resume o conteúdo dos campos mutáveis (listas e `task_data`).
+
+        Os campos simples são rastreados por `__setattr__`; os mutáveis podem
+        ser alterados no próprio objeto e por isso são comparados pelo
+        conteúdo. Retorna `None` (sempre considerado alterado) se o conteúdo
+        não puder ser serializado.
+        """
+        try:
+            payload = json.dumps(
+                [self.semantic_memories, self.episodic_memories, self.task_data],
+                default=_digest_default, ensure_ascii=False,
+            )
+        except (TypeError, ValueError):
+            return None
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
 
 @dataclass
 class CognitiveWorkspace:
@@ -108,6 +159,11 @@ class CognitiveWorkspace:
     o foco atual do usuário e mantém um dicionário de todos os domínios com
     os quais o usuário interagiu, cada um com seu próprio estado.
 
+    O workspace registra quais domínios foram criados, modificados ou
+    removidos e se o foco mudou desde a última leitura ou gravação, para que
+    os provedores de sessão persistam apenas a diferença (ou nada, em um
+    turno sem mudanças).
+
     Attributes:
         user_id (str): O identificador único do usuário.
         current_focus (str): O ID do domínio que está atualmente em foco.
@@ -145,4 +201,227 @@ class CognitiveWorkspace:
                 # Agora, cria o objeto DomainState com os dados já tratados
                 rehydrated_domains[domain_id] = DomainState(**domain_data)
             
-            self.active_domains = rehydrated_domains
\ No newline at end of file
+            self.active_domains = rehydrated_domains
+
+    def __setattr__(self, name: str, value: Any):
+        """Registra mudanças de foco e substituições de `active_domains`."""
+        if name == 'current_focus' and self.__dict__.get(name, _MISSING) != value:
+            self.__dict__['_focus_dirty'] = True
+        elif name == 'active_domains':
+            # Um novo dicionário invalida o registro do que já foi persistido.
+            self.__dict__['_persisted_domains'] = None
+        object.__setattr__(self, name, value)
+
+    # --- Rastreamento de alterações ---
+    # Os provedores de sessão usam estes métodos para gravar apenas o que
+    # mudou desde a última leitura ou gravação do workspace.
+
+    def dirty_domains(self) -> List[str]:
+        """Retorna os IDs dos domínios novos ou modificados.
+
+        Returns:
+            List[str]: Os domínios a persistir. Todos, se o workspace nunca
+            foi lido nem gravado por um provedor.
+        """
+        persisted = self.__dict__.get('_persisted_domains')
+        if persisted is None:
+            return list(self.active_domains)
+        return [
+            domain_id for domain_id, state in _loaded_items(self.active_domains)
+            if state.is_dirty() or domain_id not in persisted
+        ]
+
+    def removed_domains(self) -> List[str]:
+        """Retorna os IDs dos domínios persistidos que não existem mais."""
+        persisted = self.__dict__.get('_persisted_domains')
+        if persisted is None:
+            return []
+        return [domain_id for domain_id in persisted if domain_id not in self.active_domains]
+
+    def is_persisted(self) -> bool:
+        """Indica se o workspace foi lido ou gravado por um provedor de sessão.
+
+        Enquanto for `False`, os provedores gravam o workspace por inteiro.
+        """
+        return self.__dict__.get('_persisted_domains') is not None
+
+    def is_focus_dirty(self) -> bool:
+        """Indica se `current_focus` mudou desde a última leitura ou gravação."""
+        return self.__dict__.get('_focus_dirty', True) or not self.is_persisted()
+
+    def is_dirty(self) -> bool:
+        """Indica se há algo a persistir (foco, domínios novos, modificados ou removidos)."""
+        return self.is_focus_dirty() or bool(self.dirty_domains()) or bool(self.removed_domains())
+
+    def mark_dirty(self, domain_ids: Optional[List[str]] = None):
+        """Força a gravação de domínios alterados sem atribuição de campo.
+
+        Args:
+            domain_ids (Optional[List[str]], optional): Os domínios a marcar.
+                Se omitido, o workspace inteiro é marcado.
+        """
+        if domain_ids is None:
+            self.__dict__['_persisted_domains'] = None
+            return
+        for domain_id in domain_ids:
+            state = self.active_domains.get(domain_id)
+            if state is not None:
+                state.__dict__['_dirty'] = True
+
+    def mark_clean(self):
+        """Registra que o estado atual está persistido.
+
+        Chamado pelos provedores de sessão após carregar ou gravar o
+        workspace.
+        """
+        for _, state in _loaded_items(self.active_domains):
+            state._mark_clean()
+        self.__dict__['_focus_dirty'] = False
+        if isinstance(self.active_domains, LazyDomainDict):
+            self.__dict__['_persisted_domains'] = set(self.active_domains.domain_ids())
+        else:
+            self.__dict__['_persisted_domains'] = set(self.active_domains)
+
+
+class LazyDomainDict(dict):
+    """Dicionário de domínios que carrega cada `DomainState` no primeiro acesso.
+
+    Usado por provedores de sessão que gravam os domínios separadamente: o
+    workspace é carregado apenas com os IDs, e um turno que acessa somente o
+    domínio em foco lê somente esse domínio. Operações que percorrem o
+    dicionário inteiro (`items`, `values`, iteração, comparação) carregam os
+    domínios restantes de uma vez.
+    """
+    def __init__(self, domain_ids: Iterable[str], loader: Callable[[List[str]], Dict[str, DomainState]]):
+        """Registra os domínios existentes sem carregá-los.
+
+        Args:
+            domain_ids (Iterable[str]): Os IDs de todos os domínios persistidos.
+            loader (Callable[[List[str]], Dict[str, DomainState]]): Função que
+                lê os domínios pedidos. Domínios ausentes no resultado (ex: que
+                expiraram) são descartados.
+        """
+        super().__init__()
+        self._unloaded: Dict[str, None] = dict.fromkeys(domain_ids)
+        self._loader = loader
+
+    def domain_ids(self) -> List[str]:
+        """Retorna os IDs de todos os domínios, sem carregá-los."""
+        return list(dict.keys(self)) + list(self._unloaded)
+
+    def loaded_items(self):
+        """Retorna os pares (ID, estado) já carregados."""
+        return dict.items(self)
+
+    def _load(self, domain_ids: List[str]):
+        """Carrega os domínios pedidos que ainda não foram lidos."""
+        wanted = [domain_id for domain_id in domain_ids if domain_id in self._unloaded]
+        if not wanted:
+            return
+        loaded = self._loader(wanted)
+        for domain_id in wanted:
+            del self._unloaded[domain_id]
+            state = loaded.get(domain_id)
+            if state is not None:
+                state._mark_clean()
+                dict.__setitem__(self, domain_id, state)
+
+    def _load_all(self):
+        self._load(list(self._unloaded))
+
+    def __getitem__(self, domain_id: str) -> DomainState:
+        self._load([domain_id])
+        return dict.__getitem__(self, domain_id)
+
+    def get(self, domain_id: str, default: Any = None) -> Any:
+        self._load([domain_id])
+        return dict.get(self, domain_id, default)
+
+    def __contains__(self, domain_id: object) -> bool:
+        return dict.__contains__(self, domain_id) or domain_id in self._unloaded
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + len(self._unloaded)
+
+    def __setitem__(self, domain_id: str, state: DomainState):
+        self._unloaded.pop(domain_id, None)
+        dict.__setitem__(self, domain_id, state)
+
+    def __delitem__(self, domain_id: str):
+        if domain_id in self._unloaded:
+            del self._unloaded[domain_id]
+            return
+        dict.__delitem__(self, domain_id)
+
+    def pop(self, domain_id: str, *default: Any) -> Any:
+        self._load([domain_id])
+        return dict.pop(self, domain_id, *default)
+
+    def setdefault(self, domain_id: str, default: Optional[DomainState] = None) -> Any:
+        self._load([domain_id])
+        return dict.setdefault(self, domain_id, default)
+
+    def __iter__(self):
+        self._load_all()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self._load_all()
+        return dict.keys(self)
+
+    def values(self):
+        self._load_all()
+        return dict.values(self)
+
+    def items(self):
+        self._load_all()
+        return dict.items(self)
+
+    def popitem(self):
+        self._load_all()
+        return dict.popitem(self)
+
+    def update(self, *args: Any, **kwargs: Any):
+        for domain_id, state in dict(*args, **kwargs).items():
+            self[domain_id] = state
+
+    def clear(self):
+        self._unloaded.clear()
+        dict.clear(self)
+
+    def copy(self) -> Dict[str, DomainState]:
+        self._load_all()
+        return dict(dict.items(self))
+
+    def __eq__(self, other: object) -> bool:
+        self._load_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __repr__(self) -> str:
+        self._load_all()
+        return dict.__repr__(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, DomainState]:
+        # A cópia é um dicionário comum: não carrega a conexão do provedor.
+        self._load_all()
+        return {domain_id: copy.deepcopy(state, memo) for domain_id, state in dict.items(self)}
+
+    def __reduce__(self):
+        self._load_all()
+        return (dict, (dict(dict.items(self)),))
+
+
+def _digest_default(value: Any) -> Any:
+    """Converte para o resumo de conteúdo objetos que o JSON não conhece."""
+    fields = getattr(value, '__dict__', None)
+    return fields if fields is not None else str(value)
+
+
+def _loaded_items(domains: Dict[str, DomainState]):
+    """Percorre os domínios sem forçar a carga de um `LazyDomainDict`."""
+    if isinstance(domains, LazyDomainDict):
+        return domains.loaded_items()
+    return domains.items()
\ No newline at end of file
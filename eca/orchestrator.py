@@ -1,15 +1,49 @@
 # -*- coding: utf-8 -*-
+import copy
+import functools
+import inspect
 import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import importlib.resources
 
 from .adapters.base import (
     PersonaProvider, MemoryProvider, SessionProvider, Tool, DataFormatter
 )
 from .workspace import CognitiveWorkspaceManager
-from .models import CognitiveWorkspace, PersonaConfig # Importar PersonaConfig para type hints
+from .models import CognitiveWorkspace, DomainState, Persona, PersonaConfig # Importar PersonaConfig para type hints
+from .memory import SemanticMemory, EpisodicMemory
 from .attention import AttentionMechanism, PassthroughAttention
+from .embeddings import EmbeddingFunction, embed_texts
+
+
+# Quantas memórias de cada tipo entram no contexto de um turno.
+SEMANTIC_CONTEXT_LIMIT = 3
+EPISODIC_CONTEXT_LIMIT = 5
+
+
+@functools.lru_cache(maxsize=None)
+def _accepts_kwarg(func: Any, name: str) -> bool:
+    """Verifica, com cache, se a função aceita o argumento nomeado `name`."""
+    try:
+        parameters = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in parameters or any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters.values())
+
+
+def _supported_kwargs(method: Any, **candidates: Any) -> Dict[str, Any]:
+    """Filtra argumentos opcionais, mantendo apenas os aceitos por `method`.
+
+    Permite repassar parâmetros novos (como `query_embedding`) aos provedores
+    e mecanismos de atenção embutidos sem quebrar implementações de terceiros
+    escritas com a assinatura original. Valores `None` são descartados.
+    """
+    func = getattr(method, '__func__', method)
+    return {name: value for name, value in candidates.items() if value is not None and _accepts_kwarg(func, name)}
 
 
 class ECAOrchestrator:
@@ -33,6 +67,22 @@ class ECAOrchestrator:
         data_formatters (Dict[str, DataFormatter]): Mapeamento de formatadores para
             processar os dados retornados pelas ferramentas.
         meta_prompt_template (str): O template mestre do prompt.
+        tool_timeouts (Dict[str, float]): Tempo limite, em segundos, por nome de
+            ferramenta nos modos concorrentes ('parallel' e 'first_completed').
+        default_tool_timeout (Optional[float]): Tempo limite aplicado às
+            ferramentas sem entrada em `tool_timeouts`. `None` aguarda sem limite.
+        embedding_function (Optional[EmbeddingFunction]): Se informada, o
+            embedding da entrada é calculado uma única vez por turno e repassado
+            como `query_embedding` aos provedores e mecanismos de atenção que
+            aceitam esse parâmetro.
+
+    Nos modos concorrentes, as ferramentas rodam em um pool de até
+    `max_tool_workers` threads. Uma ferramenta que estoura o prazo é
+    ignorada, mas sua thread não pode ser interrompida e segue ocupada até
+    `load` retornar; ferramentas que travam indefinidamente reduzem o pool e
+    devem impor seus próprios timeouts de rede. Chame `close()` (ou use o
+    orquestrador como gerenciador de contexto) para liberar o pool no
+    encerramento.
     """
 
     def __init__(
@@ -46,6 +96,10 @@ class ECAOrchestrator:
         episodic_attention: Optional[AttentionMechanism] = None,
         tools: Optional[List[Tool]] = None,
         data_formatters: Optional[Dict[str, DataFormatter]] = None,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        default_tool_timeout: Optional[float] = None,
+        max_tool_workers: Optional[int] = None,
+        embedding_function: Optional[EmbeddingFunction] = None,
     ):
         """Inicializa o Orquestrador com todas as suas dependências."""
         self.persona_provider = persona_provider
@@ -56,6 +110,11 @@ class ECAOrchestrator:
         self.workspace_manager = CognitiveWorkspaceManager()
         self.tools = tools if tools else []
         self.data_formatters = data_formatters if data_formatters else {}
+        self.tool_timeouts = tool_timeouts if tool_timeouts else {}
+        self.default_tool_timeout = default_tool_timeout
+        self.embedding_function = embedding_function
+        # O pool só cria threads quando a primeira tarefa é submetida.
+        self._tool_executor = ThreadPoolExecutor(max_workers=max_tool_workers, thread_name_prefix="eca-tool")
 
         if meta_prompt_path_override:
             with open(meta_prompt_path_override, 'r', encoding='utf-8') as f:
@@ -71,6 +130,12 @@ class ECAOrchestrator:
                     f"O template de prompt padrão para o idioma '{prompt_language}' não foi encontrado."
                 )
 
+        # Segmentos do template ao redor de {{DYNAMIC_CONTEXT}} e blocos de
+        # persona pré-compilados, reutilizados entre os turnos.
+        self._template_source: Optional[str] = None
+        self._template_segments: List[str] = []
+        self._persona_blocks: Dict[str, Tuple[Persona, str]] = {}
+
     def generate_context_object(
         self,
         user_id: str,
@@ -80,21 +145,21 @@ class ECAOrchestrator:
     ) -> CognitiveWorkspace:
         """Processa uma entrada e retorna o objeto `CognitiveWorkspace` completo."""
         workspace = self.workspace_manager.load_or_create(self.session_provider, user_id)
-        detected_domain = self.persona_provider.detect_domain(user_input)
-        workspace = self.workspace_manager.switch_focus(workspace, detected_domain)
-
-        active_domain_state = workspace.active_domains[detected_domain]
-        active_domain_state.active_task = f"Analisando a solicitação '{user_input[:50]}...' para o domínio '{detected_domain}'."
+        query_embedding = self.embedding_function(user_input) if self.embedding_function else None
+        detected_domain = self.persona_provider.detect_domain(
+            user_input, **_supported_kwargs(self.persona_provider.detect_domain, query_embedding=query_embedding)
+        )
 
-        all_semantic_memories = self.memory_provider.fetch_semantic_memories(user_input, domain_id=detected_domain)
+        all_semantic_memories = self.memory_provider.fetch_semantic_memories(
+            user_input, domain_id=detected_domain,
+            **_supported_kwargs(self.memory_provider.fetch_semantic_memories, query_embedding=query_embedding)
+        )
         all_episodic_memories = self.memory_provider.fetch_episodic_memories(user_id, domain_id=detected_domain)
 
-        ranked_semantic = self.semantic_attention.rank(user_input, all_semantic_memories)
-        ranked_episodic = self.episodic_attention.rank(user_input, all_episodic_memories)
-
-        active_domain_state.semantic_memories = ranked_semantic[:3]
-        active_domain_state.episodic_memories = ranked_episodic[:5]
-        active_domain_state.task_data = self._run_tool(user_input, attachment, mode=tool_execution_mode)
+        self._populate_focused_domain(
+            workspace, detected_domain, user_input, all_semantic_memories, all_episodic_memories,
+            attachment, tool_execution_mode, query_embedding
+        )
 
         self.session_provider.save_workspace(workspace)
         return workspace
@@ -108,42 +173,216 @@ class ECAOrchestrator:
     ) -> str:
         """Orquestra o fluxo completo e retorna o prompt final para o LLM."""
         context_object = self.generate_context_object(user_id, user_input, attachment, tool_execution_mode)
-        dynamic_context_str = self._flatten_context_to_string(context_object, user_input)
-        final_prompt = self.meta_prompt_template.replace("{{DYNAMIC_CONTEXT}}", dynamic_context_str)
-        return final_prompt
+        persona = self.persona_provider.get_persona_by_id(context_object.current_focus)
+        return self._render_prompt(persona, context_object, user_input)
 
-    def _flatten_context_to_string(self, workspace: CognitiveWorkspace, user_input: str) -> str:
-        """Converte o objeto `CognitiveWorkspace` em uma string de contexto formatada."""
-        active_domain_id = workspace.current_focus
-        active_domain_state = workspace.active_domains.get(active_domain_id)
-        persona = self.persona_provider.get_persona_by_id(active_domain_id)
+    def generate_final_prompts(
+        self,
+        batch: Sequence[Tuple[Any, ...]],
+        tool_execution_mode: str = 'first_match'
+    ) -> List[str]:
+        """Gera os prompts finais de um lote de mensagens, na ordem de entrada.
 
-        if not persona:
-            return f"[ERROR: Persona com id '{active_domain_id}' não encontrada.]"
+        Pensado para processamento offline de filas de mensagens. Em vez de
+        repetir o fluxo de `generate_final_prompt` para cada item, as etapas
+        que envolvem I/O são agrupadas:
 
-        context_parts = []
+        - Os domínios de todas as entradas são detectados em uma única chamada
+          (`PersonaProvider.detect_domains`).
+        - As memórias semânticas são buscadas em lote por domínio
+          (`MemoryProvider.fetch_semantic_memories_batch`), permitindo que
+          provedores vetoriais gerem todos os embeddings de uma só vez.
+        - As sessões são carregadas e salvas em lote
+          (`SessionProvider.get_workspaces` e `save_workspaces`).
+
+        Mensagens do mesmo usuário são aplicadas ao seu workspace na ordem em
+        que aparecem no lote, como se fossem turnos consecutivos.
+
+        Args:
+            batch (Sequence[Tuple[Any, ...]]): Itens no formato
+                `(user_id, user_input)` ou `(user_id, user_input, attachment)`.
+            tool_execution_mode (str, optional): Modo de execução das
+                ferramentas, repassado a `_run_tool`. Padrão 'first_match'.
+
+        Returns:
+            List[str]: Os prompts finais, na mesma ordem do lote.
+        """
+        requests = [(item[0], item[1], item[2] if len(item) > 2 else None) for item in batch]
+        if not requests:
+            return []
+
+        user_inputs = [user_input for _, user_input, _ in requests]
+        query_embeddings = embed_texts(self.embedding_function, user_inputs) if self.embedding_function else None
+        detected_domains = self.persona_provider.detect_domains(
+            user_inputs, **_supported_kwargs(self.persona_provider.detect_domains, query_embeddings=query_embeddings)
+        )
+
+        user_ids = list(dict.fromkeys(user_id for user_id, _, _ in requests))
+        loaded_workspaces = self.session_provider.get_workspaces(user_ids)
+        workspaces = {
+            user_id: workspace or CognitiveWorkspace(user_id=user_id)
+            for user_id, workspace in zip(user_ids, loaded_workspaces)
+        }
+
+        indices_by_domain: Dict[str, List[int]] = {}
+        for index, domain_id in enumerate(detected_domains):
+            indices_by_domain.setdefault(domain_id, []).append(index)
+
+        semantic_by_index: Dict[int, List[SemanticMemory]] = {}
+        personas: Dict[str, Optional[Persona]] = {}
+        for domain_id, indices in indices_by_domain.items():
+            domain_embeddings = [query_embeddings[i] for i in indices] if query_embeddings else None
+            domain_results = self.memory_provider.fetch_semantic_memories_batch(
+                [user_inputs[i] for i in indices], domain_id=domain_id,
+                **_supported_kwargs(self.memory_provider.fetch_semantic_memories_batch, query_embeddings=domain_embeddings)
+            )
+            semantic_by_index.update(zip(indices, domain_results))
+            personas[domain_id] = self.persona_provider.get_persona_by_id(domain_id)
+
+        final_prompts = []
+        for index, (user_id, user_input, attachment) in enumerate(requests):
+            detected_domain = detected_domains[index]
+            workspace = workspaces[user_id]
+            all_episodic_memories = self.memory_provider.fetch_episodic_memories(user_id, domain_id=detected_domain)
+
+            self._populate_focused_domain(
+                workspace, detected_domain, user_input, semantic_by_index[index], all_episodic_memories,
+                attachment, tool_execution_mode, query_embeddings[index] if query_embeddings else None
+            )
+            final_prompts.append(self._render_prompt(personas[detected_domain], workspace, user_input))
+
+        self.session_provider.save_workspaces(list(workspaces.values()))
+        return final_prompts
+
+    def _populate_focused_domain(
+        self,
+        workspace: CognitiveWorkspace,
+        detected_domain: str,
+        user_input: str,
+        all_semantic_memories: List[SemanticMemory],
+        all_episodic_memories: List[EpisodicMemory],
+        attachment: Optional[Any],
+        tool_execution_mode: str,
+        query_embedding: Optional[List[float]] = None
+    ) -> DomainState:
+        """Muda o foco do workspace e preenche o domínio ativo para o turno."""
+        workspace = self.workspace_manager.switch_focus(workspace, detected_domain)
+
+        active_domain_state = workspace.active_domains[detected_domain]
+        active_domain_state.active_task = f"Analisando a solicitação '{user_input[:50]}...' para o domínio '{detected_domain}'."
+
+        ranked_semantic = self.semantic_attention.rank(
+            user_input, all_semantic_memories,
+            **_supported_kwargs(self.semantic_attention.rank, query_embedding=query_embedding, top_k=SEMANTIC_CONTEXT_LIMIT)
+        )
+        ranked_episodic = self.episodic_attention.rank(
+            user_input, all_episodic_memories,
+            **_supported_kwargs(self.episodic_attention.rank, query_embedding=query_embedding, top_k=EPISODIC_CONTEXT_LIMIT)
+        )
+
+        active_domain_state.semantic_memories = ranked_semantic[:SEMANTIC_CONTEXT_LIMIT]
+        active_domain_state.episodic_memories = ranked_episodic[:EPISODIC_CONTEXT_LIMIT]
+        active_domain_state.task_data = self._run_tool(user_input, attachment, mode=tool_execution_mode)
+        return active_domain_state
+
+    def _render_prompt(self, persona: Optional[Persona], workspace: CognitiveWorkspace, user_input: str) -> str:
+        """Insere o contexto dinâmico no template mestre e retorna o prompt final."""
+        if self._template_source is not self.meta_prompt_template:
+            self._template_source = self.meta_prompt_template
+            self._template_segments = self.meta_prompt_template.split("{{DYNAMIC_CONTEXT}}")
+        dynamic_context_str = self._render_context(persona, workspace, user_input)
+        return dynamic_context_str.join(self._template_segments)
+
+    def _get_persona_block(self, persona: Persona) -> str:
+        """Retorna as tags estáticas da persona, compiladas uma vez e reutilizadas.
+
+        O bloco fica em cache por ID de persona junto com uma cópia da persona
+        usada para gerá-lo. Se o provedor passar a retornar uma persona
+        diferente (ex: após uma atualização no banco), o bloco é recompilado.
+        """
+        cached = self._persona_blocks.get(persona.id)
+        if cached is not None and cached[0] == persona:
+            return cached[1]
+
+        block = self._compile_persona_block(persona)
+        self._persona_blocks[persona.id] = (copy.deepcopy(persona), block)
+        return block
+
+    def close(self):
+        """Encerra o pool de ferramentas sem aguardar as que ainda estão rodando.
+
+        Tarefas ainda na fila são canceladas. Threads presas em ferramentas
+        travadas não são interrompidas: terminam quando `load` retornar.
+        """
+        self._tool_executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> "ECAOrchestrator":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def invalidate_persona_cache(self, persona_id: Optional[str] = None):
+        """Descarta os blocos de persona pré-compilados.
+
+        Args:
+            persona_id (Optional[str], optional): A persona a ser descartada.
+                Se `None`, todo o cache é limpo.
+        """
+        if persona_id is None:
+            self._persona_blocks.clear()
+        else:
+            self._persona_blocks.pop(persona_id, None)
+
+    @staticmethod
+    def _compile_persona_block(persona: Persona) -> str:
+        """Monta as tags IDENTITY, TONE_OF_VOICE, VERBOSITY, OUTPUT_FORMAT, FORBIDDEN_TOPICS e GOLDEN_RULES."""
         # Adicionamos um type hint para o config para facilitar o acesso aos novos campos
-        config: PersonaConfig = persona.config 
+        config: PersonaConfig = persona.config
+        block_parts = [f"[IDENTITY:{persona.name}|{persona.id.upper()}|OBJECTIVE:{config.objective}]"]
 
-        # --- CONSTRUÇÃO DO PROMPT  ---
-        context_parts.append(f"[TIMESTAMP:{datetime.now().isoformat()}]")
-        context_parts.append(f"[IDENTITY:{persona.name}|{persona.id.upper()}|OBJECTIVE:{config.objective}]")
-        
         if config.tone_of_voice:
-            context_parts.append(f"[TONE_OF_VOICE:{', '.join(config.tone_of_voice)}]")
-        
+            block_parts.append(f"[TONE_OF_VOICE:{', '.join(config.tone_of_voice)}]")
+
         if config.verbosity and config.verbosity != "normal":
-             context_parts.append(f"[VERBOSITY:{config.verbosity}]")
+            block_parts.append(f"[VERBOSITY:{config.verbosity}]")
 
         if config.output_format:
-            context_parts.append(f"[OUTPUT_FORMAT:{config.output_format}]")
-            
+            block_parts.append(f"[OUTPUT_FORMAT:{config.output_format}]")
+
         if config.forbidden_topics:
-            context_parts.append(f"[FORBIDDEN_TOPICS:{', '.join(config.forbidden_topics)}]")
+            block_parts.append(f"[FORBIDDEN_TOPICS:{', '.join(config.forbidden_topics)}]")
 
         if config.golden_rules:
             rules_str = "\n".join([f"- {rule}" for rule in config.golden_rules])
-            context_parts.append(f"[GOLDEN_RULES:\n{rules_str}]")
+            block_parts.append(f"[GOLDEN_RULES:\n{rules_str}]")
+
+        return "\n".join(block_parts)
+
+    def _flatten_context_to_string(self, workspace: CognitiveWorkspace, user_input: str) -> str:
+        """Converte o objeto `CognitiveWorkspace` em uma string de contexto formatada."""
+        persona = self.persona_provider.get_persona_by_id(workspace.current_focus)
+        return self._render_context(persona, workspace, user_input)
+
+    def _render_context(self, persona: Optional[Persona], workspace: CognitiveWorkspace, user_input: str) -> str:
+        """Monta a string de contexto a partir de uma persona já carregada.
+
+        Separado de `_flatten_context_to_string` para que orquestradores que
+        obtêm a persona por outros meios (ex: de forma assíncrona) reutilizem
+        a mesma formatação.
+        """
+        active_domain_id = workspace.current_focus
+        active_domain_state = workspace.active_domains.get(active_domain_id)
+
+        if not persona:
+            return f"[ERROR: Persona com id '{active_domain_id}' não encontrada.]"
+
+        context_parts = []
+
+        # --- CONSTRUÇÃO DO PROMPT  ---
+        context_parts.append(f"[TIMESTAMP:{datetime.now().isoformat()}]")
+        # As tags de identidade e comportamento só mudam com a persona.
+        context_parts.append(self._get_persona_block(persona))
 
         context_parts.append(f"[USER:{workspace.user_id}]")
 
@@ -182,7 +421,18 @@ class ECAOrchestrator:
         return "\n".join(context_parts)
 
     def _run_tool(self, user_input: str, attachment: Optional[Any] = None, mode: str = 'first_match') -> Optional[Any]:
-        """Busca e executa ferramentas compatíveis com base no modo de execução."""
+        """Busca e executa ferramentas compatíveis com base no modo de execução.
+
+        Modos disponíveis:
+            - 'first_match': executa apenas a primeira ferramenta compatível.
+            - 'all_matches': executa todas as compatíveis, em sequência.
+            - 'parallel': executa todas as compatíveis em um pool de threads,
+              respeitando o tempo limite de cada uma. Ferramentas que estouram
+              o prazo ou falham são ignoradas e os resultados restantes mantêm
+              a ordem de `self.tools`.
+            - 'first_completed': executa todas as compatíveis em paralelo e
+              retorna o primeiro resultado não vazio que chegar dentro do prazo.
+        """
         if mode == 'first_match':
             for tool in self.tools:
                 if tool.can_handle(user_input, attachment):
@@ -199,5 +449,83 @@ class ECAOrchestrator:
                         executed_results.append({"source_tool": tool_name, "data": result})
             
             return executed_results if executed_results else None
+
+        elif mode == 'parallel':
+            return self._run_tools_parallel(user_input, attachment)
+
+        elif mode == 'first_completed':
+            return self._run_tools_first_completed(user_input, attachment)
         
-        raise ValueError(f"Modo de execução de ferramenta desconhecido: '{mode}'")
\ No newline at end of file
+        raise ValueError(f"Modo de execução de ferramenta desconhecido: '{mode}'")
+
+    def _tool_timeout(self, tool_name: str) -> Optional[float]:
+        """Retorna o tempo limite configurado para uma ferramenta."""
+        return self.tool_timeouts.get(tool_name, self.default_tool_timeout)
+
+    def _run_tools_parallel(self, user_input: str, attachment: Optional[Any]) -> Optional[List[Dict[str, Any]]]:
+        """Executa todas as ferramentas compatíveis no pool, cada uma com seu prazo."""
+        started_at = time.monotonic()
+        submitted = [
+            (getattr(tool, 'name', tool.__class__.__name__), self._tool_executor.submit(tool.load, user_input, attachment))
+            for tool in self.tools if tool.can_handle(user_input, attachment)
+        ]
+
+        executed_results = []
+        # Percorrer na ordem de submissão mantém o resultado determinístico;
+        # o prazo de cada ferramenta conta a partir do início da execução.
+        for tool_name, future in submitted:
+            timeout = self._tool_timeout(tool_name)
+            remaining = None if timeout is None else max(0.0, started_at + timeout - time.monotonic())
+            try:
+                result = future.result(timeout=remaining)
+            except FuturesTimeoutError:
+                future.cancel()
+                print(f"Aviso: A ferramenta '{tool_name}' excedeu o tempo limite de {timeout}s e foi ignorada.")
+                continue
+            except Exception as e:
+                print(f"Aviso: Erro ao executar a ferramenta '{tool_name}': {e}")
+                continue
+            if result:
+                executed_results.append({"source_tool": tool_name, "data": result})
+
+        return executed_results if executed_results else None
+
+    def _run_tools_first_completed(self, user_input: str, attachment: Optional[Any]) -> Optional[Dict[str, Any]]:
+        """Executa as ferramentas compatíveis em paralelo e retorna a primeira resposta."""
+        started_at = time.monotonic()
+        pending = {}
+        for tool in self.tools:
+            if tool.can_handle(user_input, attachment):
+                tool_name = getattr(tool, 'name', tool.__class__.__name__)
+                pending[self._tool_executor.submit(tool.load, user_input, attachment)] = tool_name
+
+        while pending:
+            deadlines = {
+                future: started_at + timeout
+                for future, timeout in ((f, self._tool_timeout(name)) for f, name in pending.items())
+                if timeout is not None
+            }
+            # Acorda no próximo prazo para descartar a ferramenta que expirou.
+            wait_timeout = max(0.0, min(deadlines.values()) - time.monotonic()) if deadlines else None
+
+            done, _ = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                tool_name = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Aviso: Erro ao executar a ferramenta '{tool_name}': {e}")
+                    continue
+                if result:
+                    for other in pending:
+                        other.cancel()
+                    return result
+
+            now = time.monotonic()
+            for future, deadline in deadlines.items():
+                if future in pending and now >= deadline:
+                    tool_name = pending.pop(future)
+                    future.cancel()
+                    print(f"Aviso: A ferramenta '{tool_name}' excedeu o tempo limite de {self._tool_timeout(tool_name)}s e foi ignorada.")
+
+        return None
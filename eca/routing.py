@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Roteamento de domínios por palavras-chave e expressões regulares.
+
+As regras de cada domínio (palavras-chave, padrões e prioridade) são
+compiladas em uma única expressão regular, com um grupo nomeado por domínio,
+de modo que a entrada do usuário é percorrida uma única vez,
+independentemente do número de domínios ou de palavras-chave. Padrões com
+grupos nomeados, referências a grupos (ex: `\\1`) ou flags globais (ex:
+`(?i)`), que mudariam de sentido ou seriam inválidos dentro da expressão
+combinada, são testados à parte.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Referências numeradas a grupos (ex: `\1`). A detecção é conservadora: um
+# falso positivo apenas faz o padrão ser testado à parte.
+_BACKREFERENCE = re.compile(r"\\[1-9]")
+
+# Flags globais embutidas no início de um padrão (ex: `(?i)`), que deixam de
+# ser válidas quando o padrão é envolvido por outro grupo.
+_GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+# Regras usadas quando nenhuma persona declara as suas, preservando o
+# roteamento histórico do `JSONPersonaProvider`.
+DEFAULT_ROUTES: Dict[str, Dict[str, Any]] = {
+    "fiscal": {"keywords": ["nota", "icms", "fiscal", "nfe", "nf-e"], "priority": 1},
+    "product_catalog": {"keywords": ["produto", "cadastrar", "sku", "item"], "priority": 0},
+}
+
+
+class KeywordDomainRouter:
+    """Detecta o domínio de uma entrada com uma única passada sobre o texto.
+
+    Cada rota associa um domínio a:
+
+    - `keywords`: termos procurados como substrings, sem diferenciar
+      maiúsculas de minúsculas (ex: "nf-e").
+    - `patterns`: expressões regulares (ex: r"\\bncm\\s*\\d{4}").
+    - `priority`: inteiro; maior vence. Padrão 0.
+
+    Regras de desempate, em ordem: maior `priority`, maior número de
+    ocorrências, ocorrência mais cedo no texto e, por fim, a ordem de
+    declaração das rotas. As ocorrências são procuradas a partir de cada
+    posição do texto, inclusive sobrepostas, de modo que um termo longo de
+    um domínio não esconde um termo de maior prioridade contido nele. Em uma
+    mesma posição, entre domínios vale a ordem de prioridade, e dentro de um
+    domínio os termos mais longos são testados antes.
+
+    Padrões com grupos nomeados, referências a grupos ou flags globais
+    embutidas (ex: `(?i)`) não entram na expressão combinada (onde a
+    numeração dos grupos muda, os nomes podem colidir e as flags só são
+    aceitas no início): cada um é compilado e percorrido separadamente.
+
+    Attributes:
+        default_domain (str): O domínio retornado quando nada corresponde.
+    """
+    def __init__(self, routes: Dict[str, Dict[str, Any]], default_domain: str = "default"):
+        """Compila as rotas em uma única expressão regular.
+
+        Args:
+            routes (Dict[str, Dict[str, Any]]): As regras por ID de domínio,
+                na ordem de declaração.
+            default_domain (str, optional): O domínio de fallback.
+
+        Raises:
+            re.error: Se algum padrão for uma expressão regular inválida.
+        """
+        self.default_domain = default_domain
+        self._domains: List[str] = []
+        self._priorities: List[int] = []
+        self._separate_patterns: List[Tuple[int, re.Pattern]] = []
+
+        declared = list(routes.items())
+        # Domínios de maior prioridade aparecem antes na alternância.
+        order = sorted(range(len(declared)), key=lambda i: -int(declared[i][1].get("priority", 0)))
+        alternatives = []
+        for declaration_index in order:
+            rule = declared[declaration_index][1]
+            terms = sorted((re.escape(kw) for kw in rule.get("keywords", []) if kw), key=len, reverse=True)
+            for pattern in rule.get("patterns", []):
+                compiled = re.compile(pattern, re.IGNORECASE)
+                if compiled.groupindex or _BACKREFERENCE.search(pattern) or _GLOBAL_FLAGS.match(pattern):
+                    self._separate_patterns.append((declaration_index, compiled))
+                else:
+                    terms.append(f"(?:{pattern})")
+            if not terms:
+                continue
+            alternatives.append(f"(?P<_r{declaration_index}>{'|'.join(terms)})")
+
+        for domain_id, rule in declared:
+            self._domains.append(domain_id)
+            self._priorities.append(int(rule.get("priority", 0)))
+        # O lookahead não consome o texto: cada posição é testada, e uma
+        # ocorrência não impede outra que comece dentro dela.
+        self._pattern: Optional[re.Pattern] = (
+            re.compile(f"(?=(?:{'|'.join(alternatives)}))", re.IGNORECASE) if alternatives else None
+        )
+
+    @classmethod
+    def from_personas(cls, personas_data: List[Dict[str, Any]], default_domain: str = "default") -> "KeywordDomainRouter":
+        """Cria o roteador a partir das entradas de um arquivo de personas.
+
+        Cada persona pode declarar um objeto `routing` com `keywords`,
+        `patterns` e `priority`. Se nenhuma o fizer, são usadas as regras de
+        `DEFAULT_ROUTES`.
+
+        Args:
+            personas_data (List[Dict[str, Any]]): As personas, como lidas do JSON.
+            default_domain (str, optional): O domínio de fallback.
+
+        Returns:
+            KeywordDomainRouter: O roteador compilado.
+        """
+        routes = {p["id"]: p["routing"] for p in personas_data if p.get("routing")}
+        return cls(routes or DEFAULT_ROUTES, default_domain=default_domain)
+
+    def detect(self, text: str) -> str:
+        """Retorna o domínio que melhor corresponde ao texto.
+
+        Args:
+            text (str): A entrada do usuário.
+
+        Returns:
+            str: O ID do domínio, ou `default_domain`.
+        """
+        hits: Dict[int, Tuple[int, int]] = {}
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                self._add_hit(hits, int(match.lastgroup[2:]), match.start())
+        for index, pattern in self._separate_patterns:
+            for match in pattern.finditer(text):
+                self._add_hit(hits, index, match.start())
+        if not hits:
+            return self.default_domain
+
+        best = max(hits, key=lambda i: (self._priorities[i], hits[i][0], -hits[i][1], -i))
+        return self._domains[best]
+
+    @staticmethod
+    def _add_hit(hits: Dict[int, Tuple[int, int]], index: int, position: int):
+        """Conta uma ocorrência do domínio `index`, guardando a primeira posição."""
+        count, first = hits.get(index, (0, position))
+        hits[index] = (count + 1, min(first, position))
@@ -50,8 +50,9 @@ class CognitiveWorkspaceManager:
             CognitiveWorkspace: A mesma instância da área de trabalho, agora com
             o foco e os estados dos domínios atualizados.
         """
-        # Pausa o domínio que estava ativo anteriormente
-        if workspace.current_focus in workspace.active_domains:
+        # Pausa o domínio que estava ativo anteriormente. Se o foco não muda,
+        # o status não é alterado, e o domínio não fica marcado como modificado.
+        if workspace.current_focus != new_domain_id and workspace.current_focus in workspace.active_domains:
             workspace.active_domains[workspace.current_focus].status = "paused"
             
         # Define o novo foco
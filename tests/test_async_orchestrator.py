@@ -0,0 +1,79 @@
+"""Unit tests for the asynchronous ECA Orchestrator."""
+import asyncio
+import time
+
+from eca import (
+    AsyncECAOrchestrator, AsyncMemoryProvider, AsyncTool,
+    Persona, PersonaConfig, PersonaProvider, SessionProvider,
+)
+
+
+class InMemoryPersonaProvider(PersonaProvider):
+    def __init__(self):
+        self.persona = Persona(
+            id="fiscal", name="ÁBACO", semantic_description="",
+            config=PersonaConfig(persona="p", objective="Analisar notas."),
+        )
+
+    def get_persona_by_id(self, persona_id):
+        return self.persona if persona_id == "fiscal" else None
+
+    def detect_domain(self, user_input):
+        time.sleep(0.1)
+        return "fiscal"
+
+
+class SlowAsyncMemoryProvider(AsyncMemoryProvider):
+    async def fetch_semantic_memories(self, user_input, domain_id, top_k=3):
+        await asyncio.sleep(0.1)
+        return []
+
+    async def fetch_episodic_memories(self, user_id, domain_id, last_n=5):
+        await asyncio.sleep(0.1)
+        return []
+
+    async def log_interaction(self, interaction):
+        pass
+
+
+class InMemorySessionProvider(SessionProvider):
+    def __init__(self):
+        self.sessions = {}
+
+    def get_workspace(self, user_id):
+        time.sleep(0.1)
+        return self.sessions.get(user_id)
+
+    def save_workspace(self, workspace):
+        self.sessions[workspace.user_id] = workspace
+
+
+class SlowAsyncTool(AsyncTool):
+    name = "nfe_loader"
+
+    def can_handle(self, user_input, attachment=None):
+        return "nfe" in user_input
+
+    async def load(self, user_input, attachment=None):
+        await asyncio.sleep(0.1)
+        return {"numero": "78910"}
+
+
+def test_async_orchestrator_overlaps_independent_stages():
+    session_provider = InMemorySessionProvider()
+    orchestrator = AsyncECAOrchestrator(
+        persona_provider=InMemoryPersonaProvider(),
+        memory_provider=SlowAsyncMemoryProvider(),
+        session_provider=session_provider,
+        tools=[SlowAsyncTool()],
+    )
+
+    start = time.perf_counter()
+    prompt = asyncio.run(orchestrator.generate_final_prompt_async("ana", "status da nfe 78910"))
+    elapsed = time.perf_counter() - start
+
+    # Sessão + domínio + ferramenta e depois as duas memórias: ~0.2s em vez de ~0.5s.
+    assert elapsed < 0.4
+    assert "[IDENTITY:ÁBACO|FISCAL|OBJECTIVE:Analisar notas.]" in prompt
+    assert '[INPUT_DATA:{"numero": "78910"}]' in prompt
+    assert session_provider.sessions["ana"].current_focus == "fiscal"
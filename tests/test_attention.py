@@ -0,0 +1,137 @@
+"""Unit tests for the attention mechanisms."""
+import random
+
+import pytest
+
+from eca.attention import BM25Attention, SimpleSemanticAttention, VectorizedSemanticAttention
+from eca.memory import SemanticMemory
+
+
+def _memories(count, dimension=16, seed=7):
+    rng = random.Random(seed)
+    return [
+        SemanticMemory(
+            id=f"mem-{i}", domain_id="fiscal", type="fato", text_content=f"memória {i}",
+            embedding=[rng.uniform(-1, 1) for _ in range(dimension)],
+        )
+        for i in range(count)
+    ]
+
+
+def test_numpy_backend_matches_pure_python_ranking():
+    pytest.importorskip("numpy")
+    memories = _memories(200)
+    query = memories[42].embedding
+
+    pure = VectorizedSemanticAttention(lambda text: query, use_numpy=False)
+    vectorized = VectorizedSemanticAttention(lambda text: query, use_numpy=True)
+
+    assert [m.id for m in vectorized.rank("q", memories)] == [m.id for m in pure.rank("q", memories)]
+
+
+def test_numpy_matrix_is_cached_and_invalidated_when_memories_change():
+    pytest.importorskip("numpy")
+    memories = _memories(10)
+    attention = VectorizedSemanticAttention(lambda text: memories[0].embedding, use_numpy=True)
+
+    attention.rank("q", memories)
+    attention.rank("q", list(memories))
+    assert len(attention._matrix_cache) == 1
+
+    memories[3].embedding = list(memories[0].embedding)
+    ranked = attention.rank("q", memories)
+    assert len(attention._matrix_cache) == 2
+    assert {m.id for m in ranked[:2]} == {"mem-0", "mem-3"}
+
+
+def test_numpy_matrix_cache_follows_ids_and_embedding_contents():
+    pytest.importorskip("numpy")
+    memories = _memories(10)
+    query = list(memories[0].embedding)
+    attention = VectorizedSemanticAttention(lambda text: query, use_numpy=True)
+
+    attention.rank("q", memories)
+    reloaded = [SemanticMemory(**vars(m)) for m in _memories(10)]
+    for memory in reloaded:
+        memory.embedding = list(memory.embedding)
+    ranked = attention.rank("q", reloaded)
+    assert len(attention._matrix_cache) == 1
+    assert all(any(m is r for r in reloaded) for m in ranked)
+
+    reloaded[5].embedding[:] = query
+    assert [m.id for m in attention.rank("q", reloaded, top_k=2)] == ["mem-0", "mem-5"]
+    assert len(attention._matrix_cache) == 2
+
+    reloaded[7].embedding[1:-1] = query[1:-1]
+    attention.invalidate()
+    assert [m.id for m in attention.rank("q", reloaded, top_k=3)] == ["mem-0", "mem-5", "mem-7"]
+    assert len(attention._matrix_cache) == 1
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_top_k_matches_head_of_full_ranking(use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    memories = _memories(300)
+    attention = VectorizedSemanticAttention(lambda text: memories[10].embedding, use_numpy=use_numpy)
+
+    full = attention.rank("q", memories)
+    assert [m.id for m in attention.rank("q", memories, top_k=5)] == [m.id for m in full[:5]]
+
+
+def test_numpy_top_k_keeps_original_order_among_ties_at_the_cut():
+    pytest.importorskip("numpy")
+    memories = _memories(200, dimension=4)
+    for i, memory in enumerate(memories):
+        memory.embedding = [1.0, 0.0, 0.0, 0.0] if i % 3 else [0.0, 1.0, 0.0, 0.0]
+    attention = VectorizedSemanticAttention(lambda text: [1.0, 0.0, 0.0, 0.0], use_numpy=True)
+
+    full = attention.rank("q", memories)
+    for top_k in (1, 5, 50):
+        assert [m.id for m in attention.rank("q", memories, top_k=top_k)] == [m.id for m in full[:top_k]]
+
+
+def test_simple_attention_top_k_is_stable():
+    memories = _memories(20)
+    for memory in memories:
+        memory.text_content = "mesmo texto"
+    ranked = SimpleSemanticAttention().rank("mesmo texto", memories, top_k=3)
+    assert [m.id for m in ranked] == ["mem-0", "mem-1", "mem-2"]
+
+
+def test_bm25_ranks_shared_terms_first_and_reindexes_changed_memories():
+    memories = [
+        SemanticMemory(id="a", domain_id="fiscal", type="fato", text_content="Cadastro de produtos e SKUs."),
+        SemanticMemory(id="b", domain_id="fiscal", type="fato", text_content="O cálculo do ICMS na nota fiscal."),
+        SemanticMemory(id="c", domain_id="fiscal", type="fato", text_content="Prazo de entrega do fornecedor."),
+    ]
+    attention = BM25Attention()
+
+    assert [m.id for m in attention.rank("calculo icms", memories)] == ["b", "a", "c"]
+
+    memories[2] = SemanticMemory(id="c", domain_id="fiscal", type="fato", text_content="ICMS ICMS e calculo do ICMS.")
+    assert [m.id for m in attention.rank("calculo icms", memories, top_k=2)] == ["c", "b"]
+
+
+def test_bm25_keeps_bounded_per_domain_indexes():
+    fiscal = [
+        SemanticMemory(id="a", domain_id="fiscal", type="fato", text_content="nota fiscal de entrada"),
+        SemanticMemory(id="b", domain_id="fiscal", type="fato", text_content="nota de saida"),
+    ]
+    others = [
+        SemanticMemory(id=f"x{i}", domain_id="estoque", type="fato", text_content="nota nota nota")
+        for i in range(20)
+    ]
+    fresh = BM25Attention(max_documents=4)
+    used = BM25Attention(max_documents=4, max_partitions=2)
+    used.rank("nota fiscal", others)
+
+    fiscal_index = used._partition(fiscal[0])
+    assert used.rank("nota fiscal", fiscal) == fresh.rank("nota fiscal", fiscal)
+    assert used._score(fiscal_index, {"nota", "fiscal"}, {"a", "b"}) == \
+        fresh._score(fresh._partition(fiscal[0]), {"nota", "fiscal"}, {"a", "b"})
+    assert set(fiscal_index.postings["nota"]) == {"a", "b"}
+    assert all(len(index.documents) <= 4 for index in used._partitions.values())
+
+    used.rank("nota", [SemanticMemory(id="r", domain_id="rh", type="fato", text_content="nota")])
+    assert len(used._partitions) == 2
@@ -0,0 +1,70 @@
+"""Unit tests for the workspace codecs."""
+import json
+from dataclasses import asdict
+
+import pytest
+
+from eca.codec import BinaryWorkspaceCodec, JSONWorkspaceCodec, SCHEMA_VERSION
+from eca.memory import EpisodicMemory, SemanticMemory
+from eca.models import CognitiveWorkspace, DomainState
+
+
+def _workspace():
+    fiscal = DomainState(
+        status="active", session_summary="resumo", active_task="analisar NF-e",
+        semantic_memories=[SemanticMemory(
+            id="m1", domain_id="fiscal", type="regra", text_content="Alíquota de ICMS",
+            embedding=[0.1, -2.5, 3.0], metadata={"fonte": "RICMS", "artigos": [1, 2]},
+        )],
+        episodic_memories=[EpisodicMemory(
+            user_id="ana", domain_id="fiscal", user_input="oi", assistant_output="olá",
+            timestamp="2025-07-11T10:30:00-03:00",
+        )],
+        task_data={"nfe": {"itens": [{"valor": 10.5, "qtd": 3, "ok": True, "obs": None}]}, "grande": 1 << 70},
+    )
+    return CognitiveWorkspace(user_id="ana", current_focus="fiscal", active_domains={"fiscal": fiscal, "rh": DomainState()})
+
+
+@pytest.mark.parametrize("codec", [JSONWorkspaceCodec(), BinaryWorkspaceCodec()])
+def test_codecs_round_trip_workspaces_and_domains(codec):
+    workspace = _workspace()
+
+    assert codec.decode(codec.encode(workspace)) == workspace
+    domain_id, state = codec.decode_domain(codec.encode_domain("fiscal", workspace.active_domains["fiscal"]))
+    assert (domain_id, state) == ("fiscal", workspace.active_domains["fiscal"])
+
+
+def test_codecs_read_each_other_and_legacy_payloads():
+    workspace = _workspace()
+    legacy = json.dumps(asdict(workspace))
+
+    assert JSONWorkspaceCodec().decode(BinaryWorkspaceCodec().encode(workspace)) == workspace
+    assert BinaryWorkspaceCodec().decode(legacy.encode("utf-8")) == workspace
+    assert JSONWorkspaceCodec().decode(legacy) == workspace
+    assert len(BinaryWorkspaceCodec().encode(workspace)) < len(JSONWorkspaceCodec().encode(workspace))
+
+
+def test_newer_schema_versions_are_rejected():
+    payload = json.loads(JSONWorkspaceCodec().encode(_workspace()))
+    payload["schema_version"] = SCHEMA_VERSION + 1
+    with pytest.raises(ValueError):
+        JSONWorkspaceCodec().decode(json.dumps(payload))
+
+
+@pytest.mark.parametrize("codec_class", [JSONWorkspaceCodec, BinaryWorkspaceCodec])
+def test_large_payloads_are_compressed_and_old_payloads_still_load(codec_class):
+    workspace = _workspace()
+    workspace.active_domains["fiscal"].task_data = {"itens": [{"descricao": "Parafuso sextavado", "valor": i} for i in range(200)]}
+    plain = codec_class().encode(workspace)
+    codec = codec_class(compression="zlib", compression_threshold=256)
+
+    compressed = codec.encode(workspace)
+    assert compressed[0] == 0x01 and len(compressed) < len(plain) / 2
+    assert codec.decode(compressed) == workspace
+    assert codec.decode(plain) == workspace
+    assert codec.encode_domain("rh", DomainState()) == codec_class().encode_domain("rh", DomainState())
+
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ValueError):
+        JSONWorkspaceCodec(compression="brotli")
@@ -0,0 +1,41 @@
+"""Unit tests for the shared embedding cache."""
+from eca import CachedEmbeddingFunction
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return [float(len(text)), 1.0]
+
+
+def test_lru_counts_hits_and_evicts_least_recently_used():
+    embedder = CountingEmbedder()
+    cached = CachedEmbeddingFunction(embedder, model_name="fake", maxsize=2)
+
+    assert cached("nota") == [4.0, 1.0]
+    cached("nota")
+    cached("icms")
+    cached("sku")  # remove "nota", a menos usada
+    cached("nota")
+
+    assert embedder.calls == ["nota", "icms", "sku", "nota"]
+    info = cached.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 4, 2)
+
+
+def test_disk_tier_survives_new_instance_and_is_keyed_by_model(tmp_path):
+    cache_path = str(tmp_path / "embeddings.sqlite")
+    CachedEmbeddingFunction(CountingEmbedder(), model_name="fake", cache_path=cache_path)("nfe 78910")
+
+    embedder = CountingEmbedder()
+    reopened = CachedEmbeddingFunction(embedder, model_name="fake", cache_path=cache_path)
+    assert reopened.embed_batch(["nfe 78910", "nfe 78910", "sku"]) == [[9.0, 1.0], [9.0, 1.0], [3.0, 1.0]]
+    assert embedder.calls == ["sku"]
+    assert reopened.cache_info().disk_hits == 1
+
+    other_model = CachedEmbeddingFunction(embedder, model_name="outro", cache_path=cache_path)
+    other_model("nfe 78910")
+    assert embedder.calls == ["sku", "nfe 78910"]
@@ -0,0 +1,321 @@
+"""Unit tests for the memory providers."""
+import io
+import json
+import math
+import random
+import time
+from dataclasses import asdict
+
+import pytest
+
+from eca.adapters import json_adapter
+from eca.adapters.json_adapter import JSONMemoryProvider, _iter_json_array, _scan_json_array
+from eca.memory import EpisodicMemory
+
+
+def _write_semantic(path, count, dimension=8, seed=3):
+    rng = random.Random(seed)
+    records = [
+        {
+            "id": f"mem-{i}", "domain_id": "fiscal" if i % 4 else "rh", "type": "fato",
+            "text_content": f"memória {i}", "embedding": [rng.uniform(-1, 1) for _ in range(dimension)],
+        }
+        for i in range(count)
+    ]
+    path.write_text(json.dumps(records), encoding="utf-8")
+    return records
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    return dot / (math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b)))
+
+
+def test_semantic_search_returns_nearest_memories(tmp_path):
+    semantic_path = tmp_path / "semantic.json"
+    records = _write_semantic(semantic_path, 400)
+    query = records[9]["embedding"]
+    provider = JSONMemoryProvider(str(semantic_path), str(tmp_path / "episodic.json"), ann_min_domain_size=10_000)
+
+    fiscal = [r for r in records if r["domain_id"] == "fiscal"]
+    expected = sorted(fiscal, key=lambda r: -_cosine(r["embedding"], query))[:3]
+    found = provider.fetch_semantic_memories("q", "fiscal", top_k=3, query_embedding=query)
+
+    assert [m.id for m in found] == [r["id"] for r in expected]
+
+
+def test_ann_index_is_persisted_and_reused(tmp_path):
+    semantic_path = tmp_path / "semantic.json"
+    records = _write_semantic(semantic_path, 400)
+    query = records[9]["embedding"]
+    provider = JSONMemoryProvider(str(semantic_path), str(tmp_path / "episodic.json"), ann_min_domain_size=100)
+
+    first = provider.fetch_semantic_memories("q", "fiscal", top_k=3, query_embedding=query)
+    assert first[0].id == "mem-9"
+    persisted = json.loads((tmp_path / "semantic.json.ann.json").read_text(encoding="utf-8"))
+    assert "fiscal" in persisted["domains"]
+
+    reloaded = JSONMemoryProvider(str(semantic_path), str(tmp_path / "episodic.json"), ann_min_domain_size=100)
+    assert "fiscal" in reloaded._semantic.persisted_ann
+    again = reloaded.fetch_semantic_memories("q", "fiscal", top_k=3, query_embedding=query)
+    assert [m.id for m in again] == [m.id for m in first]
+
+
+def test_reload_reuses_ann_indexes_of_unchanged_domains(tmp_path, monkeypatch):
+    semantic_path = tmp_path / "semantic.json"
+    records = _write_semantic(semantic_path, 400)
+    query = records[9]["embedding"]
+    provider = JSONMemoryProvider(str(semantic_path), str(tmp_path / "episodic.json"), ann_min_domain_size=100)
+    first = provider.fetch_semantic_memories("q", "fiscal", top_k=3, query_embedding=query)
+
+    for record in records:
+        if record["domain_id"] == "rh":
+            record["text_content"] += " (revisada)"
+    semantic_path.write_text(json.dumps(records), encoding="utf-8")
+    monkeypatch.setattr(json_adapter.IVFIndex, "build", pytest.fail)
+    assert provider.reload() is True
+
+    assert "fiscal" in provider._semantic.ann_indexes
+    again = provider.fetch_semantic_memories("q", "fiscal", top_k=3, query_embedding=query)
+    assert [m.id for m in again] == [m.id for m in first]
+    persisted = json.loads((tmp_path / "semantic.json.ann.json").read_text(encoding="utf-8"))
+    assert persisted["source"] == provider._semantic.fingerprint
+    assert "fiscal" in persisted["domains"]
+
+
+def test_ann_search_keeps_original_order_among_ties_at_the_cut():
+    pytest.importorskip("numpy")
+    from eca.memory.ann import IVFIndex
+
+    vectors = [[1.0, 0.0] if i % 3 else [0.0, 1.0] for i in range(200)]
+    index = IVFIndex.build(vectors, n_lists=1)
+    expected = [i for i in range(200) if i % 3]
+    for k in (1, 5, 50):
+        assert index.search([1.0, 0.0], k) == expected[:k]
+
+
+def test_semantic_search_without_embedding_keeps_domain_order(tmp_path):
+    semantic_path = tmp_path / "semantic.json"
+    _write_semantic(semantic_path, 20)
+    provider = JSONMemoryProvider(str(semantic_path), str(tmp_path / "episodic.json"))
+
+    found = provider.fetch_semantic_memories("q", "fiscal", top_k=2)
+    assert [m.id for m in found] == ["mem-1", "mem-2"]
+
+
+def _interaction(user_id, domain_id, turn):
+    return EpisodicMemory(
+        user_id=user_id, domain_id=domain_id, user_input=f"pergunta {turn}",
+        assistant_output=f"resposta {turn}", timestamp=f"2025-07-11T10:{turn:02d}:00-03:00",
+    )
+
+
+def test_jsonl_log_appends_one_line_per_turn_and_reads_legacy_files(tmp_path):
+    episodic_path = tmp_path / "episodic.json"
+    episodic_path.write_text(json.dumps([asdict(_interaction("ana", "fiscal", 0))]), encoding="utf-8")
+
+    provider = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(episodic_path), episodic_format="jsonl", fsync_policy="always")
+    provider.log_interaction(_interaction("ana", "fiscal", 1))
+    provider.log_interaction(_interaction("ana", "rh", 2))
+    provider.close()
+
+    lines = episodic_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["user_input"] for line in lines] == ["pergunta 0", "pergunta 1", "pergunta 2"]
+
+    reloaded = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(episodic_path), episodic_format="jsonl")
+    assert [m.user_input for m in reloaded.fetch_episodic_memories("ana", "fiscal")] == ["pergunta 0", "pergunta 1"]
+
+
+def test_compaction_drops_corrupt_lines_and_applies_retention(tmp_path):
+    episodic_path = tmp_path / "episodic.jsonl"
+    provider = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(episodic_path), episodic_format="jsonl")
+    for turn in range(5):
+        provider.log_interaction(_interaction("ana", "fiscal", turn))
+    provider.close()
+    with open(episodic_path, "a", encoding="utf-8") as f:
+        f.write('{"user_id": "ana", "dom')
+
+    provider = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(episodic_path), episodic_format="jsonl")
+    provider.compact_episodic_log(keep_last=2)
+
+    lines = episodic_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["user_input"] for line in lines] == ["pergunta 3", "pergunta 4"]
+
+
+def test_torn_last_line_does_not_swallow_the_next_append(tmp_path):
+    episodic_path = tmp_path / "episodic.jsonl"
+    provider = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(episodic_path), episodic_format="jsonl")
+    provider.log_interaction(_interaction("ana", "fiscal", 0))
+    provider.close()
+    with open(episodic_path, "a", encoding="utf-8") as f:
+        f.write('{"user_id": "ana", "dom')
+
+    provider = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(episodic_path), episodic_format="jsonl")
+    provider.log_interaction(_interaction("ana", "fiscal", 1))
+    provider.log_interaction(_interaction("ana", "fiscal", 2))
+    provider.close()
+
+    reloaded = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(episodic_path), episodic_format="jsonl")
+    assert [m.user_input for m in reloaded.episodic_log] == ["pergunta 0", "pergunta 1", "pergunta 2"]
+
+
+def test_compaction_keeps_appends_made_while_rewriting(tmp_path, monkeypatch):
+    from eca.adapters import json_adapter
+
+    episodic_path = tmp_path / "episodic.jsonl"
+    provider = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(episodic_path), episodic_format="jsonl", episodic_keep_last=3)
+    for turn in range(6):
+        provider.log_interaction(_interaction("ana", "fiscal", turn))
+
+    original = json_adapter._jsonl_bytes
+    calls = []
+
+    def _slow_snapshot(interactions):
+        # A primeira chamada serializa o snapshot fora do lock: um turno
+        # registrado aqui não pode ficar bloqueado nem se perder.
+        if not calls:
+            provider.log_interaction(_interaction("ana", "fiscal", 6))
+        calls.append(len(interactions))
+        return original(interactions)
+
+    monkeypatch.setattr(json_adapter, "_jsonl_bytes", _slow_snapshot)
+    provider.compact_episodic_log()
+    provider.close()
+
+    lines = episodic_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["user_input"] for line in lines] == ["pergunta 3", "pergunta 4", "pergunta 5", "pergunta 6"]
+    assert calls == [3, 1]
+
+
+def test_retention_bounds_the_in_memory_log(tmp_path):
+    provider = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(tmp_path / "episodic.jsonl"), episodic_format="jsonl", episodic_keep_last=2)
+    for turn in range(1500):
+        provider.log_interaction(_interaction("ana", "fiscal", turn % 60))
+    provider.close()
+
+    assert len(provider.episodic_log) < 1024
+    assert len(provider.fetch_episodic_memories("ana", "fiscal")) == 2
+
+
+def test_episodic_index_matches_full_scan(tmp_path):
+    provider = JSONMemoryProvider(str(tmp_path / "semantic.json"), str(tmp_path / "episodic.jsonl"), episodic_format="jsonl", episodic_index_size=3)
+    for turn in range(10):
+        provider.log_interaction(_interaction("ana" if turn % 2 else "bia", "fiscal", turn))
+    provider.close()
+
+    assert [m.user_input for m in provider.fetch_episodic_memories("ana", "fiscal", last_n=2)] == ["pergunta 7", "pergunta 9"]
+    assert len(provider.fetch_episodic_memories("ana", "fiscal", last_n=5)) == 5
+    assert provider.fetch_episodic_memories("ana", "rh") == []
+
+
+def test_mmap_store_matches_json_provider(tmp_path):
+    pytest.importorskip("numpy")
+    from eca.adapters.mmap_adapter import MMapMemoryProvider, convert_json_to_mmap_store
+
+    semantic_path = tmp_path / "semantic.json"
+    records = _write_semantic(semantic_path, 120)
+    json_provider = JSONMemoryProvider(str(semantic_path), str(tmp_path / "episodic.json"))
+    convert_json_to_mmap_store(str(semantic_path), str(tmp_path / "store"))
+    provider = MMapMemoryProvider(str(tmp_path / "store"), episodic_provider=json_provider)
+
+    queries = [records[5]["embedding"], records[42]["embedding"]]
+    expected = [json_provider.fetch_semantic_memories("q", "fiscal", top_k=4, query_embedding=q) for q in queries]
+    found = provider.fetch_semantic_memories_batch(["a", "b"], "fiscal", top_k=4, query_embeddings=queries)
+    assert [[m.id for m in memories] for memories in found] == [[m.id for m in memories] for memories in expected]
+    assert found[0][0].text_content == "memória 5"
+    assert [m.id for m in provider.fetch_semantic_memories("q", "rh", top_k=2)] == ["mem-0", "mem-4"]
+    provider.close()
+
+
+def test_mmap_search_keeps_original_order_among_ties_at_the_cut(tmp_path):
+    pytest.importorskip("numpy")
+    from eca.adapters.mmap_adapter import MMapMemoryProvider, convert_json_to_mmap_store
+
+    semantic_path = tmp_path / "semantic.json"
+    records = _write_semantic(semantic_path, 200, dimension=2)
+    for i, record in enumerate(records):
+        record["domain_id"] = "fiscal"
+        record["embedding"] = [1.0, 0.0] if i % 3 else [0.0, 1.0]
+    semantic_path.write_text(json.dumps(records), encoding="utf-8")
+    convert_json_to_mmap_store(str(semantic_path), str(tmp_path / "store"))
+    provider = MMapMemoryProvider(str(tmp_path / "store"), episodic_provider=None)
+
+    expected = [r["id"] for i, r in enumerate(records) if i % 3]
+    for top_k in (1, 5, 50):
+        found = provider.fetch_semantic_memories("q", "fiscal", top_k=top_k, query_embedding=[1.0, 0.0])
+        assert [m.id for m in found] == expected[:top_k]
+    provider.close()
+
+
+def test_stream_parser_handles_items_larger_than_chunk(tmp_path):
+    path = tmp_path / "items.json"
+    items = [{"id": i, "text": "x" * (i * 37), "nested": {"a": [1, 2, "]"]}} for i in range(20)]
+    path.write_text(json.dumps(items, indent=2), encoding="utf-8")
+
+    parsed = [item for item, _ in _iter_json_array(str(path), chunk_size=16)]
+    assert parsed == items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_lazy_scanner_reads_only_boundaries_and_domain_id(chunk_size):
+    items = [
+        {"id": "a", "domain_id": "x\"]{y", "type": "domain_id", "embedding": [1.5, -2e-3]},
+        {"type": "fato", "nested": {"domain_id": "não"}, "domain_id" : "z", "text": "ç" * 40},
+    ]
+    content = json.dumps(items, indent=2, ensure_ascii=False).encode("utf-8")
+
+    scanned = list(_scan_json_array(io.BytesIO(content), "domain_id", chunk_size=chunk_size))
+    assert [domain_id for domain_id, _, _ in scanned] == ["x\"]{y", "z"]
+    assert [json.loads(content[offset:offset + length]) for _, offset, length in scanned] == items
+    with pytest.raises(json.JSONDecodeError):
+        list(_scan_json_array(io.BytesIO(content[:-3]), "domain_id", chunk_size=chunk_size))
+
+
+def test_stream_and_lazy_modes_match_eager_loading(tmp_path):
+    semantic_path = tmp_path / "semantic.json"
+    records = _write_semantic(semantic_path, 40)
+    query = records[13]["embedding"]
+    providers = {
+        mode: JSONMemoryProvider(str(semantic_path), str(tmp_path / "episodic.json"), semantic_load_mode=mode)
+        for mode in ("eager", "stream", "lazy")
+    }
+
+    assert providers["lazy"]._semantic.pending_domains.keys() == {"fiscal", "rh"}
+    results = {
+        mode: [m.id for m in provider.fetch_semantic_memories("q", "fiscal", top_k=5, query_embedding=query)]
+        for mode, provider in providers.items()
+    }
+    assert results["stream"] == results["eager"] == results["lazy"]
+    assert list(providers["lazy"]._semantic.pending_domains) == ["rh"]
+    assert [m.id for m in providers["lazy"].semantic_memories] == [r["id"] for r in records]
+
+
+def test_lazy_mode_rescans_positions_when_file_changes_before_first_use(tmp_path):
+    semantic_path = tmp_path / "semantic.json"
+    _write_semantic(semantic_path, 8)
+    provider = JSONMemoryProvider(str(semantic_path), str(tmp_path / "episodic.json"), semantic_load_mode="lazy")
+
+    records = _write_semantic(semantic_path, 12, seed=5)
+    fiscal = provider.fetch_semantic_memories("q", "fiscal", top_k=20)
+    assert [m.id for m in fiscal] == [r["id"] for r in records if r["domain_id"] == "fiscal"]
+
+
+def test_reload_swaps_semantic_state_when_file_changes(tmp_path):
+    semantic_path = tmp_path / "semantic.json"
+    _write_semantic(semantic_path, 8)
+    provider = JSONMemoryProvider(str(semantic_path), str(tmp_path / "episodic.json"), reload_interval=0.05)
+    old_state = provider._semantic
+    assert provider.reload() is False
+
+    _write_semantic(semantic_path, 12)
+    deadline = time.monotonic() + 2
+    while provider._semantic is old_state and time.monotonic() < deadline:
+        time.sleep(0.01)
+    provider.close()
+
+    assert len(provider.semantic_memories) == 12
+    assert len(old_state.memories) == 8
+
+    semantic_path.write_text("[{\"id\": ", encoding="utf-8")
+    assert provider.reload() is False
+    assert len(provider.semantic_memories) == 12
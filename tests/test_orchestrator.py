@@ -1,5 +1,17 @@
 # tests/test_orchestrator.py
 """Unit tests for the ECA Orchestrator."""
+import json
+import re
+import shutil
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from eca.adapters.base import Tool
+from eca.adapters.json_adapter import JSONMemoryProvider, JSONPersonaProvider, JSONSessionProvider
+from eca.attention import VectorizedSemanticAttention
+from eca.orchestrator import ECAOrchestrator
 
 # import pytest
 # from eca.orchestrator import OrquestradorECA
@@ -8,4 +20,146 @@ def test_orchestrator_initialization():
     """Tests the basic initialization of the orchestrator."""
     # orchestrator = OrquestradorECA()
     # assert orchestrator is not None
-    assert True # Placeholder test
\ No newline at end of file
+    assert True # Placeholder test
+
+
+class SleepyTool(Tool):
+    def __init__(self, name, delay, payload):
+        self._name = name
+        self.delay = delay
+        self.payload = payload
+
+    @property
+    def name(self):
+        return self._name
+
+    def can_handle(self, user_input, attachment=None):
+        return True
+
+    def load(self, user_input, attachment=None):
+        time.sleep(self.delay)
+        return self.payload
+
+
+def _orchestrator_with_tools(tools, **kwargs):
+    return ECAOrchestrator(
+        persona_provider=None, memory_provider=None, session_provider=None,
+        tools=tools, **kwargs
+    )
+
+
+class BlockingTool(Tool):
+    """Fica presa em `load` até `release` ser sinalizado."""
+    def __init__(self, name):
+        self._name = name
+        self.release = threading.Event()
+        self.finished = threading.Event()
+
+    @property
+    def name(self):
+        return self._name
+
+    def can_handle(self, user_input, attachment=None):
+        return True
+
+    def load(self, user_input, attachment=None):
+        self.release.wait(timeout=5)
+        self.finished.set()
+        return {"origem": self._name}
+
+
+def test_parallel_tools_respect_per_tool_timeouts_and_order():
+    blocked = BlockingTool("ocr")
+    with _orchestrator_with_tools(
+        [blocked, SleepyTool("api", 0.01, {"status": "ok"}), SleepyTool("cache", 0.0, {"hit": True})],
+        tool_timeouts={"ocr": 0.2},
+    ) as orchestrator:
+        results = orchestrator._run_tool("nfe", mode="parallel")
+        assert not blocked.finished.is_set()
+        blocked.release.set()
+
+    assert [r["source_tool"] for r in results] == ["api", "cache"]
+
+
+def test_first_completed_returns_fastest_answer():
+    blocked = BlockingTool("lenta")
+    with _orchestrator_with_tools([blocked, SleepyTool("rapida", 0.0, {"origem": "rapida"})]) as orchestrator:
+        result = orchestrator._run_tool("nfe", mode="first_completed")
+        assert not blocked.finished.is_set()
+        blocked.release.set()
+
+    assert result == {"origem": "rapida"}
+
+
+def test_close_does_not_wait_for_hung_tools():
+    blocked = BlockingTool("travada")
+    orchestrator = _orchestrator_with_tools([blocked], default_tool_timeout=0.05)
+    assert orchestrator._run_tool("nfe", mode="parallel") is None
+
+    orchestrator.close()
+    assert not blocked.finished.is_set()
+    blocked.release.set()
+    assert blocked.finished.wait(timeout=5)
+
+
+def _json_orchestrator(tmp_path):
+    tmp_path.mkdir(exist_ok=True)
+    examples = Path(__file__).resolve().parent.parent / "examples" / "database"
+    shutil.copy(examples / "personas.json", tmp_path / "personas.json")
+    shutil.copy(examples / "memories.json", tmp_path / "memories.json")
+    (tmp_path / "interaction_log.json").write_text("[]", encoding="utf-8")
+    return ECAOrchestrator(
+        persona_provider=JSONPersonaProvider(str(tmp_path / "personas.json")),
+        memory_provider=JSONMemoryProvider(str(tmp_path / "memories.json"), str(tmp_path / "interaction_log.json")),
+        session_provider=JSONSessionProvider(str(tmp_path / "sessions.json")),
+    )
+
+
+def test_batch_prompts_match_sequential_prompts(tmp_path):
+    batch = [
+        ("ana", "qual o status da nfe 78910"),
+        ("bruno", "quero cadastrar um produto novo"),
+        ("ana", "e o icms dessa nota?"),
+    ]
+
+    batch_prompts = _json_orchestrator(tmp_path / "batch").generate_final_prompts(batch)
+    sequential = _json_orchestrator(tmp_path / "seq")
+    sequential_prompts = [sequential.generate_final_prompt(user_id, text) for user_id, text in batch]
+
+    def strip_timestamp(prompt):
+        return re.sub(r"\[TIMESTAMP:[^\]]*\]", "", prompt)
+
+    assert [strip_timestamp(p) for p in batch_prompts] == [strip_timestamp(p) for p in sequential_prompts]
+    sessions = json.loads((tmp_path / "batch" / "sessions.json").read_text(encoding="utf-8"))
+    assert sessions["ana"]["current_focus"] == "fiscal"
+    assert sessions["bruno"]["current_focus"] == "product_catalog"
+
+
+def test_persona_block_is_recompiled_when_persona_changes(tmp_path):
+    orchestrator = _json_orchestrator(tmp_path)
+    assert "OBJECTIVE:Analisar documentos fiscais" in orchestrator.generate_final_prompt("ana", "status da nfe")
+
+    persona = orchestrator.persona_provider.personas["fiscal"]
+    orchestrator.persona_provider.personas["fiscal"] = replace(
+        persona, config=replace(persona.config, objective="Novo objetivo.")
+    )
+
+    prompt = orchestrator.generate_final_prompt("ana", "status da nfe")
+    assert "OBJECTIVE:Novo objetivo.]" in prompt
+    assert "{{DYNAMIC_CONTEXT}}" not in prompt
+
+
+def test_query_embedding_is_computed_once_per_turn(tmp_path):
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return [1.0, 0.0]
+
+    orchestrator = _json_orchestrator(tmp_path)
+    orchestrator.embedding_function = embed
+    orchestrator.semantic_attention = VectorizedSemanticAttention(embed)
+
+    orchestrator.generate_final_prompt("ana", "status da nfe")
+
+    assert calls == ["status da nfe"]
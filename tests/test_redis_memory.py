@@ -0,0 +1,50 @@
+"""Unit tests for the Redis Streams episodic memory provider, run against fakeredis."""
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("redis")
+
+from eca.adapters.redis_adapter import RedisMemoryProvider  # noqa: E402
+from eca.memory import EpisodicMemory, SemanticMemory  # noqa: E402
+
+
+def _episode(i, domain_id="fiscal"):
+    return EpisodicMemory(
+        user_id="ana", domain_id=domain_id, user_input=f"pergunta {i}",
+        assistant_output=f"resposta {i}", timestamp=f"2025-07-11T10:{i:02d}:00",
+    )
+
+
+def test_streams_keep_recent_episodes_per_user_and_domain():
+    provider = RedisMemoryProvider(redis_client=fakeredis.FakeRedis(), max_episodes=10, ttl_seconds=60, approximate_trim=False)
+    for i in range(30):
+        provider.log_interaction(_episode(i))
+    provider.log_interaction(_episode(99, domain_id="rh"))
+
+    recent = provider.fetch_episodic_memories("ana", "fiscal", last_n=3)
+    assert recent == [_episode(27), _episode(28), _episode(29)]
+    assert provider.fetch_episodic_memories("ana", "rh") == [_episode(99, domain_id="rh")]
+    assert provider.fetch_episodic_memories("bia", "fiscal") == []
+    assert provider.redis_client.xlen("eca:episodes:ana:fiscal") == 10
+    assert provider.redis_client.ttl("eca:episodes:ana:fiscal") > 0
+
+
+def test_ids_containing_the_separator_get_distinct_streams():
+    provider = RedisMemoryProvider(redis_client=fakeredis.FakeRedis())
+    first = EpisodicMemory(user_id="a:b", domain_id="c", user_input="1", assistant_output="", timestamp="t1")
+    second = EpisodicMemory(user_id="a", domain_id="b:c", user_input="2", assistant_output="", timestamp="t2")
+    provider.log_interaction(first)
+    provider.log_interaction(second)
+
+    assert provider.fetch_episodic_memories("a:b", "c") == [first]
+    assert provider.fetch_episodic_memories("a", "b:c") == [second]
+
+
+def test_semantic_search_is_delegated():
+    class _Semantic:
+        def fetch_semantic_memories(self, user_input, domain_id, top_k=3, query_embedding=None):
+            return [SemanticMemory(id="m1", domain_id=domain_id, type="regra", text_content=user_input)]
+
+    provider = RedisMemoryProvider(redis_client=fakeredis.FakeRedis(), semantic_provider=_Semantic())
+    assert provider.fetch_semantic_memories("ICMS", "fiscal")[0].text_content == "ICMS"
+    assert RedisMemoryProvider(redis_client=fakeredis.FakeRedis()).fetch_semantic_memories("ICMS", "fiscal") == []
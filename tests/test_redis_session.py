@@ -0,0 +1,163 @@
+"""Unit tests for the Redis session provider, run against fakeredis."""
+import json
+from dataclasses import asdict
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("redis")
+
+from eca.adapters.redis_adapter import RedisSessionProvider  # noqa: E402
+from eca.codec import BinaryWorkspaceCodec  # noqa: E402
+from eca.models import CognitiveWorkspace, DomainState  # noqa: E402
+
+
+def _provider(**kwargs):
+    provider = RedisSessionProvider(**kwargs)
+    provider.redis_client = fakeredis.FakeRedis()
+    return provider
+
+
+def test_binary_codec_reads_sessions_saved_as_legacy_json():
+    provider = _provider(codec=BinaryWorkspaceCodec())
+    legacy = CognitiveWorkspace(user_id="ana", current_focus="fiscal", active_domains={"fiscal": DomainState(status="active")})
+    provider.redis_client.set("eca:session:ana", json.dumps(asdict(legacy)))
+
+    assert provider.get_workspace("ana") == legacy
+    provider.save_workspace(legacy)
+    assert provider.redis_client.get("eca:session:ana").startswith(b"ECW")
+    assert provider.get_workspace("ana") == legacy
+    assert provider.redis_client.ttl("eca:session:ana") > 0
+
+
+def test_unchanged_workspace_only_refreshes_ttl():
+    provider = _provider(ttl_seconds=60)
+    provider.save_workspace(CognitiveWorkspace(user_id="ana", active_domains={"rh": DomainState()}))
+    provider.redis_client.expire("eca:session:ana", 5)
+    provider.redis_client.append("eca:session:ana", b" ")
+
+    provider.save_workspace(provider.get_workspace("ana"))
+    assert provider.redis_client.get("eca:session:ana").endswith(b" ")
+    assert provider.redis_client.ttl("eca:session:ana") > 5
+
+
+def test_hash_layout_loads_and_writes_only_touched_domains():
+    provider = _provider(layout='hash')
+    domains = {"fiscal": DomainState(status="active", active_task="NF-e"), "rh": DomainState()}
+    provider.save_workspace(CognitiveWorkspace(user_id="ana", current_focus="fiscal", active_domains=domains))
+    assert provider.redis_client.type("eca:session:ana") == b"hash"
+
+    workspace = provider.get_workspace("ana")
+    assert "rh" in workspace.active_domains and len(workspace.active_domains) == 2
+    assert dict.__len__(workspace.active_domains) == 0
+    assert workspace.active_domains["fiscal"].active_task == "NF-e"
+    assert dict.__len__(workspace.active_domains) == 1
+
+    provider.redis_client.hset("eca:session:ana", "domain:rh", b"not loaded")
+    workspace.active_domains["fiscal"].active_task = "ICMS"
+    workspace.current_focus = "product_catalog"
+    workspace.active_domains["product_catalog"] = DomainState(status="active")
+    provider.save_workspace(workspace)
+
+    assert provider.redis_client.hget("eca:session:ana", "domain:rh") == b"not loaded"
+    assert provider.redis_client.hget("eca:session:ana", "current_focus") == b"product_catalog"
+    provider.redis_client.hdel("eca:session:ana", "domain:rh")
+    loaded = provider.get_workspace("ana")
+    assert loaded.active_domains["fiscal"].active_task == "ICMS"
+    assert sorted(loaded.active_domains) == ["fiscal", "product_catalog"]
+
+
+def test_hash_layout_rewrites_workspace_whose_hash_expired_before_a_partial_save():
+    provider = _provider(layout='hash')
+    domains = {"fiscal": DomainState(status="active"), "rh": DomainState(session_summary="férias")}
+    provider.save_workspace(CognitiveWorkspace(user_id="ana", current_focus="fiscal", active_domains=domains))
+
+    workspace = provider.get_workspace("ana")
+    assert workspace.active_domains["rh"].session_summary == "férias"
+    assert workspace.active_domains["fiscal"].status == "active"
+    provider.redis_client.delete("eca:session:ana")
+    workspace.active_domains["fiscal"].active_task = "ICMS"
+    provider.save_workspace(workspace)
+
+    loaded = provider.get_workspace("ana")
+    assert loaded.current_focus == "fiscal"
+    assert loaded.active_domains["fiscal"].active_task == "ICMS"
+    assert loaded.active_domains["rh"].session_summary == "férias"
+
+
+def test_hash_layout_converts_string_sessions_on_save():
+    legacy = CognitiveWorkspace(user_id="ana", current_focus="rh", active_domains={"rh": DomainState()})
+    provider = _provider(layout='hash')
+    provider.redis_client.set("eca:session:ana", json.dumps(asdict(legacy)))
+
+    workspace = provider.get_workspace("ana")
+    assert workspace == legacy
+    provider.save_workspace(workspace)
+    assert provider.redis_client.type("eca:session:ana") == b"hash"
+    assert provider.get_workspace("ana") == legacy
+
+
+@pytest.mark.parametrize("layout", ["string", "hash"])
+def test_bulk_apis_share_an_injected_connection_pool(layout):
+    import redis
+
+    connection_class = getattr(fakeredis, "FakeRedisConnection", None) or fakeredis.FakeConnection
+    pool = redis.ConnectionPool(connection_class=connection_class, server=fakeredis.FakeServer())
+    writer = RedisSessionProvider(connection_pool=pool, layout=layout)
+    reader = RedisSessionProvider(connection_pool=pool, layout=layout)
+    workspaces = [CognitiveWorkspace(user_id=u, current_focus="rh", active_domains={"rh": DomainState()}) for u in ("ana", "bia")]
+
+    writer.save_workspaces(workspaces)
+    loaded = reader.get_workspaces(["bia", "carla", "ana"])
+
+    assert [w and w.user_id for w in loaded] == ["bia", None, "ana"]
+    assert loaded[2] == workspaces[0]
+    assert reader.redis_client.connection_pool is writer.redis_client.connection_pool
+
+
+@pytest.mark.parametrize("layout", ["string", "hash"])
+def test_payload_and_version_are_written_in_one_transaction(layout):
+    provider = _provider(layout=layout)
+    pipelines = []
+    original = provider.redis_client.pipeline
+
+    def recording_pipeline(transaction=True, **kwargs):
+        pipelines.append(transaction)
+        return original(transaction=transaction, **kwargs)
+
+    provider.redis_client.pipeline = recording_pipeline
+    provider.save_workspace(CognitiveWorkspace(user_id="ana", current_focus="rh"))
+    assert pipelines == [True]
+
+
+def test_near_cache_reuses_saved_workspace_until_another_worker_writes():
+    from eca.adapters.near_cache import NearCacheSessionProvider
+
+    remote = _provider()
+    cache = NearCacheSessionProvider(remote)
+    workspace = CognitiveWorkspace(user_id="ana", current_focus="rh", active_domains={"rh": DomainState()})
+    cache.save_workspace(workspace)
+
+    assert cache.get_workspace("ana") is workspace
+    cache.save_workspace(workspace)
+
+    other_worker = remote.get_workspace("ana")
+    other_worker.current_focus = "fiscal"
+    remote.save_workspace(other_worker)
+    reloaded = cache.get_workspace("ana")
+    assert reloaded is not workspace and reloaded.current_focus == "fiscal"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_near_cache_drops_workspaces_changed_after_save():
+    from eca.adapters.near_cache import NearCacheSessionProvider
+
+    cache = NearCacheSessionProvider(_provider(), max_entries=1)
+    ana = CognitiveWorkspace(user_id="ana")
+    cache.save_workspaces([ana, CognitiveWorkspace(user_id="bia")])
+    assert cache.get_workspace("ana") is not ana
+
+    bia = cache.get_workspace("bia")
+    cache.save_workspace(bia)
+    bia.current_focus = "rh"
+    assert cache.get_workspace("bia").current_focus == "default"
@@ -0,0 +1,95 @@
+"""Unit tests for domain routing and the JSON persona provider."""
+import json
+from pathlib import Path
+
+from eca.adapters.json_adapter import JSONPersonaProvider
+from eca.routing import DEFAULT_ROUTES, KeywordDomainRouter
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples" / "database"
+
+
+def _legacy_detect(text):
+    lowered = text.lower()
+    if any(kw in lowered for kw in ["nota", "icms", "fiscal", "nfe", "nf-e"]):
+        return "fiscal"
+    if any(kw in lowered for kw in ["produto", "cadastrar", "sku", "item"]):
+        return "product_catalog"
+    return "default"
+
+
+def test_default_routes_reproduce_legacy_routing():
+    router = KeywordDomainRouter(DEFAULT_ROUTES)
+    inputs = [
+        "Preciso cadastrar um produto", "Qual o ICMS da nota?", "novo SKU para a NF-e",
+        "bom dia", "itemizar o pedido", "", "PRODUTO fiscal",
+    ]
+    assert [router.detect(text) for text in inputs] == [_legacy_detect(text) for text in inputs]
+
+
+def test_priority_hits_and_declaration_order_break_ties():
+    router = KeywordDomainRouter({
+        "rh": {"keywords": ["férias", "salário"]},
+        "financeiro": {"keywords": ["salário", "pagamento"], "patterns": [r"\bboleto\s+\d+"]},
+        "juridico": {"keywords": ["processo"], "priority": 5},
+    })
+    assert router.detect("salário") == "rh"
+    assert router.detect("pagamento do salário") == "financeiro"
+    assert router.detect("Boleto 123 atrasado") == "financeiro"
+    assert router.detect("processo sobre férias e salário") == "juridico"
+    assert router.detect("sem correspondência") == "default"
+
+
+def test_persona_file_declares_routing(tmp_path):
+    data = json.loads((EXAMPLES / "personas.json").read_text(encoding="utf-8"))
+    data[1]["routing"] = {"keywords": ["estoque"], "priority": 2}
+    path = tmp_path / "personas.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    provider = JSONPersonaProvider(str(path))
+    assert provider.detect_domain("nota fiscal do estoque") == "product_catalog"
+    assert provider.detect_domain("cadastrar produto") == "default"
+
+
+def test_persona_provider_reloads_changed_file(tmp_path):
+    data = json.loads((EXAMPLES / "personas.json").read_text(encoding="utf-8"))
+    path = tmp_path / "personas.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    provider = JSONPersonaProvider(str(path))
+    assert provider.detect_domain("estoque") == "default"
+
+    data[1]["routing"] = {"keywords": ["estoque"]}
+    data[1]["name"] = "ESTOQUE"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    assert provider.reload() is True
+    assert provider.detect_domain("estoque") == "product_catalog"
+    assert provider.get_persona_by_id("product_catalog").name == "ESTOQUE"
+    assert provider.reload() is False
+
+
+def test_patterns_with_named_groups_or_backreferences_route_correctly():
+    router = KeywordDomainRouter({
+        "fiscal": {"keywords": ["nota"], "patterns": [r"\bnf\s*(?P<numero>\d+)"]},
+        "rh": {"patterns": [r"\b(\w)\1\b", r"(?P<numero>ponto)"]},
+    })
+    assert router.detect("NF 123") == "fiscal"
+    assert router.detect("zz") == "rh"
+    assert router.detect("bater o ponto") == "rh"
+    assert router.detect("zy") == "default"
+
+
+def test_overlapping_keyword_does_not_hide_higher_priority_domain():
+    router = KeywordDomainRouter({"a": {"keywords": ["ab"]}, "b": {"keywords": ["b"], "priority": 1}})
+    assert router.detect("ab") == "b"
+    assert router.detect("a") == "default"
+
+
+def test_pattern_with_inline_global_flag_is_accepted(tmp_path):
+    data = json.loads((EXAMPLES / "personas.json").read_text(encoding="utf-8"))
+    data[0]["routing"] = {"patterns": [r"(?i)\bncm\s*\d{4}"]}
+    path = tmp_path / "personas.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    provider = JSONPersonaProvider(str(path))
+    assert provider.detect_domain("qual o NCM 8471?") == data[0]["id"]
+    assert provider.detect_domain("bom dia") == "default"
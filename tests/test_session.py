@@ -0,0 +1,203 @@
+"""Unit tests for the session providers."""
+import time
+
+from eca.adapters import json_adapter
+from eca.adapters.json_adapter import JSONSessionProvider, ShardedJSONSessionProvider
+from eca.adapters.write_behind import WriteBehindSessionProvider
+from eca.memory import EpisodicMemory
+from eca.models import CognitiveWorkspace, DomainState
+
+
+def test_sharded_sessions_round_trip_one_file_per_user(tmp_path):
+    provider = ShardedJSONSessionProvider(str(tmp_path / "sessions"))
+    workspace = CognitiveWorkspace(user_id="ana", current_focus="fiscal", active_domains={"fiscal": DomainState(status="active")})
+    provider.save_workspace(workspace)
+    provider.save_workspace(CognitiveWorkspace(user_id="bia/../x"))
+
+    assert len(list((tmp_path / "sessions").glob("*/*.json"))) == 2
+    loaded = ShardedJSONSessionProvider(str(tmp_path / "sessions")).get_workspace("ana")
+    assert loaded.current_focus == "fiscal"
+    assert loaded.active_domains["fiscal"].status == "active"
+    assert provider.get_workspace("carla") is None
+
+
+def test_sharded_sessions_import_legacy_file(tmp_path):
+    legacy = JSONSessionProvider(str(tmp_path / "sessions.json"))
+    legacy.save_workspaces([CognitiveWorkspace(user_id="ana"), CognitiveWorkspace(user_id="bia")])
+
+    provider = ShardedJSONSessionProvider(str(tmp_path / "sessions"))
+    assert provider.import_sessions(str(tmp_path / "sessions.json")) == 2
+    assert [w.user_id for w in provider.get_workspaces(["bia", "ana"])] == ["bia", "ana"]
+
+
+def test_workspace_tracks_changed_domains():
+    workspace = CognitiveWorkspace(user_id="ana", active_domains={"fiscal": DomainState(), "rh": DomainState()})
+    assert not workspace.is_persisted() and workspace.is_dirty()
+
+    workspace.mark_clean()
+    workspace.active_domains["fiscal"].status = "paused"
+    workspace.current_focus = "default"
+    assert not workspace.is_dirty()
+
+    workspace.active_domains["fiscal"].active_task = "Analisando"
+    workspace.active_domains["catalog"] = DomainState()
+    del workspace.active_domains["rh"]
+    assert workspace.dirty_domains() == ["fiscal", "catalog"]
+    assert workspace.removed_domains() == ["rh"]
+
+
+def test_sharded_per_domain_layout_writes_only_changed_domains(tmp_path, monkeypatch):
+    writes = []
+    original = json_adapter._atomic_write_bytes
+    monkeypatch.setattr(json_adapter, "_atomic_write_bytes", lambda path, data, **kw: (writes.append(path), original(path, data, **kw)))
+    provider = ShardedJSONSessionProvider(str(tmp_path / "sessions"), per_domain=True)
+    provider.save_workspace(CognitiveWorkspace(user_id="ana", current_focus="fiscal", active_domains={"fiscal": DomainState(status="active"), "rh": DomainState()}))
+    assert len(writes) == 3
+
+    writes.clear()
+    workspace = provider.get_workspace("ana")
+    provider.save_workspace(workspace)
+    assert writes == []
+
+    workspace.active_domains["rh"].active_task = "Férias"
+    provider.save_workspace(workspace)
+    assert len(writes) == 1
+
+    del workspace.active_domains["fiscal"]
+    workspace.current_focus = "rh"
+    provider.save_workspace(workspace)
+    loaded = provider.get_workspace("ana")
+    assert loaded.current_focus == "rh"
+    assert list(loaded.active_domains) == ["rh"] and loaded.active_domains["rh"].active_task == "Férias"
+
+
+def test_sharded_per_domain_layout_reads_single_file_sessions(tmp_path):
+    ShardedJSONSessionProvider(str(tmp_path)).save_workspace(CognitiveWorkspace(user_id="ana", active_domains={"rh": DomainState()}))
+    provider = ShardedJSONSessionProvider(str(tmp_path), per_domain=True)
+
+    workspace = provider.get_workspace("ana")
+    provider.save_workspace(workspace)
+
+    assert list(tmp_path.glob("*/*.json")) == []
+    assert list(provider.get_workspace("ana").active_domains) == ["rh"]
+
+
+def test_json_session_provider_skips_unchanged_workspaces(tmp_path):
+    provider = JSONSessionProvider(str(tmp_path / "sessions.json"))
+    provider.save_workspace(CognitiveWorkspace(user_id="ana", active_domains={"rh": DomainState()}))
+    (tmp_path / "sessions.json").write_text("{}")
+
+    workspace = provider.get_workspace("ana")
+    provider.save_workspace(workspace)
+    assert (tmp_path / "sessions.json").read_text() == "{}"
+
+    workspace.active_domains["rh"].session_summary = "Resumo"
+    provider.save_workspace(workspace)
+    assert JSONSessionProvider(str(tmp_path / "sessions.json")).get_workspace("ana").active_domains["rh"].session_summary == "Resumo"
+
+
+def test_in_place_domain_edits_are_persisted(tmp_path):
+    provider = JSONSessionProvider(str(tmp_path / "sessions.json"))
+    provider.save_workspace(CognitiveWorkspace(user_id="ana", active_domains={"rh": DomainState(task_data={"x": 1})}))
+
+    workspace = provider.get_workspace("ana")
+    state = workspace.active_domains["rh"]
+    assert not workspace.is_dirty()
+    state.task_data["y"] = 2
+    state.episodic_memories.append(EpisodicMemory("ana", "rh", "oi", "olá", "2025-07-11T10:00:00"))
+    assert workspace.dirty_domains() == ["rh"]
+    provider.save_workspace(workspace)
+
+    loaded = JSONSessionProvider(str(tmp_path / "sessions.json")).get_workspace("ana").active_domains["rh"]
+    assert loaded.task_data == {"x": 1, "y": 2}
+    assert [m.user_input for m in loaded.episodic_memories] == ["oi"]
+
+
+def test_json_session_cache_is_not_aliased_to_saved_workspaces(tmp_path):
+    provider = JSONSessionProvider(str(tmp_path / "sessions.json"))
+    ana = CognitiveWorkspace(user_id="ana", active_domains={"rh": DomainState(task_data={"a": 1})})
+    provider.save_workspace(ana)
+
+    ana.active_domains["rh"].task_data["a"] = 999
+    provider.save_workspace(CognitiveWorkspace(user_id="bia"))
+
+    assert JSONSessionProvider(str(tmp_path / "sessions.json")).get_workspace("ana").active_domains["rh"].task_data == {"a": 1}
+    assert provider.get_workspace("ana").active_domains["rh"].task_data == {"a": 1}
+
+
+class _RecordingSessionProvider(JSONSessionProvider):
+    def __init__(self, file_path, delay=0.0):
+        super().__init__(file_path)
+        self.delay = delay
+        self.batches = []
+
+    def save_workspaces(self, workspaces):
+        time.sleep(self.delay)
+        self.batches.append([w.user_id for w in workspaces])
+        super().save_workspaces(workspaces)
+
+
+def test_write_behind_returns_immediately_and_coalesces_writes(tmp_path):
+    inner = _RecordingSessionProvider(str(tmp_path / "sessions.json"), delay=0.2)
+    provider = WriteBehindSessionProvider(inner, flush_interval=10)
+
+    start = time.perf_counter()
+    for focus in ("fiscal", "rh", "product_catalog"):
+        provider.save_workspace(CognitiveWorkspace(user_id="ana", current_focus=focus))
+    assert time.perf_counter() - start < 0.1
+    assert provider.get_workspace("ana").current_focus == "product_catalog"
+    assert inner.get_workspace("ana") is None
+
+    provider.close()
+    assert inner.batches == [["ana"]]
+    assert JSONSessionProvider(str(tmp_path / "sessions.json")).get_workspace("ana").current_focus == "product_catalog"
+
+
+def test_write_behind_flushes_when_batch_size_is_reached(tmp_path):
+    inner = _RecordingSessionProvider(str(tmp_path / "sessions.json"))
+    provider = WriteBehindSessionProvider(inner, flush_interval=10, max_batch_size=2)
+
+    provider.save_workspaces([CognitiveWorkspace(user_id="ana"), CognitiveWorkspace(user_id="bia")])
+    deadline = time.monotonic() + 2
+    while not inner.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    provider.close()
+
+    assert inner.batches == [["ana", "bia"]]
+
+
+def test_json_session_file_compression_reads_uncompressed_files(tmp_path):
+    path = str(tmp_path / "sessions.json")
+    workspaces = [CognitiveWorkspace(user_id=f"user-{i}", active_domains={"rh": DomainState(session_summary="x" * 50)}) for i in range(20)]
+    JSONSessionProvider(path).save_workspaces(workspaces)
+
+    provider = JSONSessionProvider(path, compression="zlib")
+    assert provider.get_workspace("user-3") == workspaces[3]
+    provider.save_workspace(CognitiveWorkspace(user_id="ana"))
+
+    assert (tmp_path / "sessions.json").read_bytes()[0] == 0x01
+    assert JSONSessionProvider(path).get_workspace("user-3") == workspaces[3]
+
+
+def test_write_behind_backs_off_after_inner_failures(tmp_path, capsys):
+    class FlakyProvider(_RecordingSessionProvider):
+        failing = True
+        attempts = 0
+
+        def save_workspaces(self, workspaces):
+            self.attempts += 1
+            if self.failing:
+                raise OSError("disco indisponível")
+            super().save_workspaces(workspaces)
+
+    inner = FlakyProvider(str(tmp_path / "sessions.json"))
+    provider = WriteBehindSessionProvider(inner, flush_interval=0.05, max_batch_size=1)
+    provider.save_workspace(CognitiveWorkspace(user_id="ana"))
+    time.sleep(0.3)
+    attempts = inner.attempts
+
+    inner.failing = False
+    provider.close()
+    assert 1 <= attempts <= 5
+    assert capsys.readouterr().out.count("Aviso") == inner.attempts - 1
+    assert JSONSessionProvider(str(tmp_path / "sessions.json")).get_workspace("ana") is not None